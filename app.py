@@ -1,44 +1,79 @@
 # -*- coding: utf-8 -*-
-from flask import Flask, render_template_string, request, redirect, url_for, Response, jsonify
+from flask import Flask, render_template, request, redirect, url_for, Response, jsonify
+from jinja2 import DictLoader
+from markupsafe import Markup
 import os
 import csv
-import io
-import base64
 import datetime as dt
 import json  # ← 追加
+import gzip
+import hashlib
+import heapq
+import mimetypes
 import unicodedata
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import japanize_matplotlib
 import re
 import threading
-import queue
 import time
+from collections import OrderedDict
+from chart_pool import ChartRenderPool
+from score_ledger import ScoreLedger
 from shared_data import SharedDataConflictError, SharedDataCoordinator
+from sync_outbox import SyncOutbox, job_keys
+from task_index import CompletionIndex, ScoreIndex, TreeIndex, completed_datetime
+from task_journal import TaskJournal
+from task_storage import TASK_FIELDS, CsvTaskStorage, SqliteTaskStorage
+from task_store import TaskSnapshot, TaskStore, file_signature
 
 
 
 
 
-app = Flask(__name__)
+# 静的ファイルは内容のハッシュ付きの名前で /assets/ から配る（下の static_asset）
+app = Flask(__name__, static_folder=None)
 
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(APP_DIR, 'static')
+# 名前に内容のハッシュが入るので、ブラウザには1年間そのまま使わせてよい
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# これより小さい応答は圧縮しても得にならないのでそのまま返す
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+# PNGはすでに圧縮済みなので対象にしない
+GZIP_MIMETYPES = {
+    'text/html',
+    'text/css',
+    'text/javascript',
+    'text/plain',
+    'application/json',
+    'application/javascript',
+    'image/svg+xml',
+}
+# 静的ファイルは内容が変わらないので、圧縮結果をハッシュ付きの名前ごとに覚えておく
+STATIC_GZIP_CACHE = {}
+STATIC_GZIP_CACHE_LOCK = threading.Lock()
 CONFIGURED_DATA_DIR = os.environ.get('TASKLIST_DATA_DIR', '').strip()
 DATA_DIR = os.path.abspath(os.path.expanduser(CONFIGURED_DATA_DIR)) if CONFIGURED_DATA_DIR else os.path.join(APP_DIR, 'data')
 CRED_DIR = os.path.join(APP_DIR, 'unupload')
 TASKS_CSV = os.path.join(DATA_DIR, 'tasks.csv')
+TASKS_JOURNAL = os.path.join(DATA_DIR, 'tasks.journal.jsonl')
 TAGS_CSV = os.path.join(DATA_DIR, 'tags.csv')
 TAG_RULES_JSON = os.path.join(DATA_DIR, 'tag_rules.json')  # ← 追加
-SHARED_DATA_MODE = bool(CONFIGURED_DATA_DIR)
+# データフォルダを指定するとGoogle Drive共有として扱う。TASKLIST_SHARED_DATA=0 なら手元の別フォルダとして使う
+SHARED_DATA_MODE = bool(CONFIGURED_DATA_DIR) and (
+    os.environ.get('TASKLIST_SHARED_DATA', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+)
 SHARED_DATA_SENTINEL = os.path.join(DATA_DIR, '.tasklist-shared.json')
-
-TASK_FIELDS = [
-    'id', 'title', 'tag', 'score', 'base_score',
-    'extension_count', 'link_bonus_awarded', 'sort_order', 'due_date',
-    'completed', 'completed_at', 'parent_id', 'recur',
-    'google_task_id', 'sync_pending'
-]
+TASKS_DB = os.path.join(DATA_DIR, 'tasklist.sqlite3')
+GOOGLE_SYNC_STATE_JSON = os.path.join(DATA_DIR, 'google_sync_state.json')
+SYNC_OUTBOX_JSON = os.path.join(DATA_DIR, 'sync_outbox.json')
+SCORE_LEDGER_JSON = os.path.join(DATA_DIR, 'score_ledger.json')
+STORAGE_BACKEND = os.environ.get('TASKLIST_STORAGE_BACKEND', 'csv').strip().lower() or 'csv'
+if STORAGE_BACKEND not in ('csv', 'sqlite'):
+    raise RuntimeError(f'TASKLIST_STORAGE_BACKEND は csv か sqlite を指定してください: {STORAGE_BACKEND}')
+if SHARED_DATA_MODE:
+    # SQLiteのWALファイルはGoogle Drive経由で安全に共有できないため、
+    # 共有中は常にCSVへ保存する。
+    STORAGE_BACKEND = 'csv'
 
 GOOGLE_TASKLIST_TITLE = os.environ.get('GOOGLE_TASKLIST_TITLE', 'TODO同期')
 GOOGLE_CREDENTIALS_JSON = os.environ.get(
@@ -66,21 +101,124 @@ VALID_RECURS = {'none', 'weekly', 'monthly'}
 
 DATA_LOCK = threading.RLock()
 TASKS_LOCK = DATA_LOCK
-SYNC_QUEUE = queue.Queue()
 SYNC_WORKER_LOCK = threading.Lock()
 SYNC_STATE_LOCK = threading.Lock()
 SYNC_WORKER_STARTED = False
 SYNC_PULL_REQUESTED = False
 SYNC_PULL_LAST_ENQUEUED_AT = 0.0
 GOOGLE_PULL_MIN_INTERVAL_SEC = 30
+# 普段は前回以降に更新されたタスクだけを取得し、全件の突き合わせはたまに行う。
+GOOGLE_FULL_SYNC_INTERVAL_SEC = 6 * 60 * 60
+# 同期ワーカーはたまったジョブをまとめて処理し、API呼び出しはHTTPバッチで送る。
+GOOGLE_SYNC_MAX_JOBS_PER_ROUND = 200
+# 失敗した同期ジョブは30秒後から間隔を倍々にして、最長30分おきにやり直す
+GOOGLE_SYNC_RETRY_MIN_SEC = 30
+GOOGLE_SYNC_RETRY_MAX_SEC = 30 * 60
+GOOGLE_BATCH_MAX_REQUESTS = 50
+
+# 1項目だけの変更はtasks.csvを書き直さず、ジャーナルへ1行追記する。
+JOURNALED_TASK_OPS = {'complete', 'reopen', 'reschedule', 'reorder', 'delete'}
+TASKS_JOURNAL_MAX_BYTES = 256 * 1024
+TASKS_JOURNAL_MAX_AGE_SEC = 6 * 60 * 60
+
+# Google Tasksの認証情報とタスクリストIDはプロセス全体で共有する。
+# discoveryクライアント（httplib2）はスレッド間で共有できないため、スレッドごとに持つ。
+GOOGLE_CLIENT_LOCK = threading.Lock()
+# ブラウザでの再認証は時間がかかるので GOOGLE_CLIENT_LOCK の外で行い、
+# 同時に複数のブラウザ認証が始まらないようにだけこのロックで順番にする。
+GOOGLE_AUTH_LOCK = threading.Lock()
+GOOGLE_CLIENT_CACHE = {
+    'creds': None,
+    'tasklist_id': None,
+    'generation': 0
+}
+GOOGLE_CLIENT_LOCAL = threading.local()
+SYNC_METRICS_LOCK = threading.Lock()
+SYNC_METRICS = {
+    'service_builds': 0,
+    'service_reuses': 0,
+    'credential_refreshes': 0,
+    'tasklist_lookups': 0,
+    'tasklist_reuses': 0,
+    'client_invalidations': 0,
+    'full_pulls': 0,
+    'incremental_pulls': 0,
+    'pulled_tasks': 0,
+    'batch_calls': 0,
+    'batched_requests': 0
+}
 
+# 起動から何秒後にグラフ描画モジュールを裏で読み込むか（負の値で無効）
+CHART_WARMUP_DELAY_SEC = float(os.environ.get('TASKLIST_CHART_WARMUP_SEC', '2'))
+# グラフを描く子プロセスの数（0でこのプロセス内で描く）と、1枚を待つ上限秒数。
+# CPUが1つだけなら子プロセスに分けても速くならないため、既定では使わない
+CHART_RENDER_WORKERS = int(os.environ.get(
+    'TASKLIST_CHART_WORKERS',
+    '1' if (os.cpu_count() or 1) > 1 else '0'
+))
+CHART_RENDER_TIMEOUT_SEC = float(os.environ.get('TASKLIST_CHART_TIMEOUT_SEC', '30'))
+# png: サーバーでmatplotlibが描く / svg: ブラウザが /api/charts/* のデータから描く
+CHART_MODES = ('png', 'svg')
+CHART_MODE = os.environ.get('TASKLIST_CHART_MODE', 'png').strip().lower()
+# 描画済みPNGを (グラフ名, データの版, 日付) ごとに保持し、古いものから捨てる
+CHART_CACHE_MAX_ENTRIES = 8
 CHART_CACHE_LOCK = threading.Lock()
-CHART_CACHE = {
-    'version': None,
-    'png_bytes': None
-}
+CHART_CACHE = OrderedDict()
+# 同じグラフを二重に描かないよう、グラフ名ごとに描画を1本にする
+CHART_RENDER_LOCKS = {}
+# 書き込みが落ち着いてから何秒後に表示済みのグラフを裏で描き直すか（負の値で無効）
+CHART_PRERENDER_DELAY_SEC = float(os.environ.get('TASKLIST_CHART_PRERENDER_SEC', '0.3'))
+CHART_PRERENDER_LOCK = threading.Lock()
+CHART_PRERENDER_TIMER = None
+# 索引ページの部分ごとの描画結果。部分ごとの版は、その部分に映る値が変わったときだけ上げる
+INDEX_FRAGMENT_SECTIONS = ('overdue', 'parent_options', 'tree', 'calendar', 'recent_done')
+INDEX_FRAGMENT_LOCK = threading.Lock()
+INDEX_FRAGMENT_VERSIONS = dict.fromkeys(INDEX_FRAGMENT_SECTIONS, 0)
+INDEX_FRAGMENT_STORE_VERSION = None
+INDEX_FRAGMENT_CACHE = {}
 
 SHARED_STORAGE = SharedDataCoordinator(DATA_DIR, enabled=SHARED_DATA_MODE)
+# 同じタスクへの同期依頼は1件にまとめ、未処理分は再起動後も残す
+SYNC_OUTBOX = SyncOutbox(
+    SYNC_OUTBOX_JSON,
+    SHARED_STORAGE,
+    retry_delay=GOOGLE_SYNC_RETRY_MIN_SEC,
+    max_retry_delay=GOOGLE_SYNC_RETRY_MAX_SEC
+)
+# 完了日×タグごとの実効スコア合計。長期間の集計をタスク数によらず返す
+SCORE_LEDGER = ScoreLedger(SCORE_LEDGER_JSON, SHARED_STORAGE)
+# 台帳は書き込みのたびには保存せず、この秒数の間の変更をまとめて書き出す（負の値で毎回保存）
+SCORE_LEDGER_SAVE_DELAY_SEC = float(os.environ.get('TASKLIST_SCORE_LEDGER_SAVE_SEC', '5'))
+SCORE_LEDGER_SAVE_LOCK = threading.Lock()
+SCORE_LEDGER_SAVE_TIMER = None
+ANALYTICS_RANGES = (30, 90, 365)
+TASK_JOURNAL = TaskJournal(
+    TASKS_JOURNAL,
+    SHARED_STORAGE,
+    max_bytes=TASKS_JOURNAL_MAX_BYTES,
+    max_age_seconds=TASKS_JOURNAL_MAX_AGE_SEC
+)
+CSV_STORAGE = CsvTaskStorage(
+    TASKS_CSV,
+    TAGS_CSV,
+    TASK_FIELDS,
+    SHARED_STORAGE,
+    TASK_JOURNAL
+)
+if STORAGE_BACKEND == 'sqlite':
+    # 初回だけ既存のtasks.csv（とジャーナル）とtags.csvを取り込む。
+    TASK_STORAGE = SqliteTaskStorage(
+        TASKS_DB,
+        TASK_FIELDS,
+        import_task_rows=lambda: (
+            CSV_STORAGE.load_task_rows() if os.path.exists(TASKS_CSV) else []
+        ),
+        import_tags=lambda: (
+            CSV_STORAGE.load_tags() if os.path.exists(TAGS_CSV) else []
+        )
+    )
+else:
+    TASK_STORAGE = CSV_STORAGE
 
 
 # ---------- 永続化 ----------
@@ -125,25 +263,7 @@ def _ensure_files():
         return
 
     os.makedirs(DATA_DIR, exist_ok=True)
-    if not os.path.exists(TAGS_CSV):
-        def write_initial_tags(f):
-            w = csv.writer(f)
-            w.writerow(['tag'])
-            w.writerow(['マイタスク'])
-        SHARED_STORAGE.atomic_write_data_file(
-            TAGS_CSV,
-            write_initial_tags,
-            create_backup=False
-        )
-    if not os.path.exists(TASKS_CSV):
-        def write_initial_tasks(f):
-            w = csv.DictWriter(f, fieldnames=TASK_FIELDS)
-            w.writeheader()
-        SHARED_STORAGE.atomic_write_data_file(
-            TASKS_CSV,
-            write_initial_tasks,
-            create_backup=False
-        )
+    TASK_STORAGE.ensure()
 
 
 def ensure_files():
@@ -153,11 +273,7 @@ def ensure_files():
 def read_tags():
     with TASKS_LOCK:
         ensure_files()
-        tags = []
-        with open(TAGS_CSV, 'r', newline='', encoding='utf-8-sig') as f:
-            r = csv.DictReader(f)
-            for row in r:
-                tags.append(row['tag'])
+        tags = TASK_STORAGE.load_tags()
         if 'マイタスク' not in tags:
             tags.insert(0, 'マイタスク')
             write_tags(tags)
@@ -165,42 +281,38 @@ def read_tags():
 
 def write_tags(tags):
     with TASKS_LOCK:
-        def write_file(f):
-            w = csv.writer(f)
-            w.writerow(['tag'])
-            for t in tags:
-                w.writerow([t])
-        SHARED_STORAGE.atomic_write_data_file(TAGS_CSV, write_file)
+        TASK_STORAGE.save_tags(tags)
 
-def read_tasks():
-    ensure_files()
-    tasks = []
-    with open(TASKS_CSV, 'r', newline='', encoding='utf-8-sig') as f:
-        r = csv.DictReader(f)
-        for row in r:
-            task_id = to_int(row.get('id'), 0)
-            if task_id <= 0:
-                continue
+def task_from_row(row):
+    task_id = to_int(row.get('id'), 0)
+    if task_id <= 0:
+        return None
 
-            sort_order_raw = (row.get('sort_order') or '').strip()
-            task = {
-                'id': task_id,
-                'title': (row.get('title') or '').strip(),
-                'tag': (row.get('tag') or 'マイタスク').strip() or 'マイタスク',
-                'score': to_int(row.get('score'), 0),
-                'base_score': to_int(row.get('base_score'), to_int(row.get('score'), 0)),
-                'extension_count': max(to_int(row.get('extension_count'), 0), 0),
-                'link_bonus_awarded': 1 if to_int(row.get('link_bonus_awarded'), 0) else 0,
-                'sort_order': to_int(sort_order_raw, 0),
-                '_sort_order_missing': not bool(sort_order_raw),
-                'due_date': sanitize_due_date(row.get('due_date')),
-                'completed': 1 if to_int(row.get('completed'), 0) else 0,
-                'completed_at': (row.get('completed_at') or '').strip(),
-                'parent_id': sanitize_parent_id(row.get('parent_id')),
-                'recur': sanitize_recur(row.get('recur', 'none')),
-                'google_task_id': (row.get('google_task_id') or '').strip(),
-                'sync_pending': 1 if to_int(row.get('sync_pending'), 0) else 0
-            }
+    sort_order_raw = (row.get('sort_order') or '').strip()
+    return {
+        'id': task_id,
+        'title': (row.get('title') or '').strip(),
+        'tag': (row.get('tag') or 'マイタスク').strip() or 'マイタスク',
+        'score': to_int(row.get('score'), 0),
+        'base_score': to_int(row.get('base_score'), to_int(row.get('score'), 0)),
+        'extension_count': max(to_int(row.get('extension_count'), 0), 0),
+        'link_bonus_awarded': 1 if to_int(row.get('link_bonus_awarded'), 0) else 0,
+        'sort_order': to_int(sort_order_raw, 0),
+        '_sort_order_missing': not bool(sort_order_raw),
+        'due_date': sanitize_due_date(row.get('due_date')),
+        'completed': 1 if to_int(row.get('completed'), 0) else 0,
+        'completed_at': (row.get('completed_at') or '').strip(),
+        'parent_id': sanitize_parent_id(row.get('parent_id')),
+        'recur': sanitize_recur(row.get('recur', 'none')),
+        'google_task_id': (row.get('google_task_id') or '').strip(),
+        'sync_pending': 1 if to_int(row.get('sync_pending'), 0) else 0
+    }
+
+def tasks_from_rows(rows):
+    tasks = []
+    for row in rows:
+        task = task_from_row(row)
+        if task:
             tasks.append(task)
 
     tasks_by_parent = {}
@@ -237,29 +349,286 @@ def read_tasks():
 
     return tasks
 
-def write_tasks(tasks):
-    def write_file(f):
-        w = csv.DictWriter(f, fieldnames=TASK_FIELDS)
-        w.writeheader()
-        for t in tasks:
-            w.writerow({
-                'id': t['id'],
-                'title': t['title'],
-                'tag': t['tag'],
-                'score': t['score'],
-                'base_score': t.get('base_score', t['score']),
-                'extension_count': t.get('extension_count', 0),
-                'link_bonus_awarded': t.get('link_bonus_awarded', 0),
-                'sort_order': t.get('sort_order', t['id'] * 10),
-                'due_date': t['due_date'],
-                'completed': t['completed'],
-                'completed_at': t['completed_at'],
-                'parent_id': t['parent_id'],
-                'recur': t['recur'],
-                'google_task_id': t.get('google_task_id', ''),
-                'sync_pending': t.get('sync_pending', 0)
-            })
-    SHARED_STORAGE.atomic_write_data_file(TASKS_CSV, write_file)
+def load_tasks_from_storage():
+    ensure_files()
+    return tasks_from_rows(TASK_STORAGE.load_task_rows())
+
+def read_tasks():
+    # パース済みのタスクをプロセス内で保持し、保存先のファイルが
+    # 変わった時だけ読み直す。
+    return TASK_STORE.snapshot()
+
+def task_to_row(t):
+    row = {
+        'id': t['id'],
+        'title': t['title'],
+        'tag': t['tag'],
+        'score': t['score'],
+        'base_score': t.get('base_score', t['score']),
+        'extension_count': t.get('extension_count', 0),
+        'link_bonus_awarded': t.get('link_bonus_awarded', 0),
+        'sort_order': t.get('sort_order', t['id'] * 10),
+        'due_date': t['due_date'],
+        'completed': t['completed'],
+        'completed_at': t['completed_at'],
+        'parent_id': t['parent_id'],
+        'recur': t['recur'],
+        'google_task_id': t.get('google_task_id', ''),
+        'sync_pending': t.get('sync_pending', 0)
+    }
+    # csv.DictWriterと同じ文字列にそろえ、ジャーナルとCSVで同じ値を持つ。
+    return {key: '' if value is None else str(value) for key, value in row.items()}
+
+def task_row_changes(rows):
+    previous = {
+        str(task['id']): task_to_row(task)
+        for task in TASK_STORE.peek()
+    }
+    current_ids = set()
+    upserts = []
+    for row in rows:
+        current_ids.add(row['id'])
+        if previous.get(row['id']) != row:
+            upserts.append(row)
+    deletes = [task_id for task_id in previous if task_id not in current_ids]
+    return upserts, deletes
+
+def score_ledger_entry(task, scores):
+    """
+    完了タスクの (完了日, タグ, 実効スコア) を返す。台帳に載らないタスクはNone。
+    scores はTaskStoreのスコア索引。
+    """
+    if task.get('completed') != 1 or not task.get('completed_at'):
+        return None
+    try:
+        day = parse_dt_iso(task['completed_at']).date().isoformat()
+    except (TypeError, ValueError):
+        return None
+    effective = (scores.get(task['id']) if scores is not None else None) or (0, 0, 0)
+    return (day, task.get('tag', ''), effective[2])
+
+def score_ledger_entries(by_id=None, task_ids=None, version=None):
+    """
+    完了タスクごとの台帳の値を返す。既定では保存済みの全タスクについて、
+    by_id と task_ids を渡せばそのタスクだけについて、版 version の
+    スコア索引から求める。
+    """
+    if by_id is None:
+        records = TASK_STORE.peek()
+        version = TASK_STORE.version
+    else:
+        records = [by_id[task_id] for task_id in task_ids if task_id in by_id]
+    entries = {}
+    with TASK_STORE.index_view('scores', version) as scores:
+        for record in records:
+            entry = score_ledger_entry(record, scores)
+            if entry is not None:
+                entries[record['id']] = entry
+    return entries
+
+def score_ledger():
+    """
+    保存済みのデータと一致するスコア台帳を返す。
+    アプリ外でファイルが変わっていれば作り直す。
+    """
+    with TASKS_LOCK:
+        ensure_files()
+        if not SCORE_LEDGER.loaded:
+            SCORE_LEDGER.load()
+        source = TASK_STORE.token(include_version=False)
+        if SCORE_LEDGER.source != source:
+            SCORE_LEDGER.rebuild(score_ledger_entries().values(), source)
+            schedule_score_ledger_save()
+        return SCORE_LEDGER
+
+def update_score_ledger(before, after):
+    removed = [entry for task_id, entry in before.items() if after.get(task_id) != entry]
+    added = [entry for task_id, entry in after.items() if before.get(task_id) != entry]
+    SCORE_LEDGER.apply(removed, added, TASK_STORE.token(include_version=False))
+    schedule_score_ledger_save()
+
+def save_score_ledger():
+    with TASKS_LOCK:
+        try:
+            SCORE_LEDGER.save()
+        except Exception:
+            # 保存できなくても、次に読むとき元データとの不一致から作り直せる
+            app.logger.exception('スコア台帳の保存に失敗した')
+
+def schedule_score_ledger_save(delay_sec=None):
+    """
+    台帳の保存をまとめる。最初の変更から delay_sec 秒後に、その間の変更を
+    1回で書き出す。負の値なら待たずにすぐ保存する。
+    """
+    global SCORE_LEDGER_SAVE_TIMER
+    if delay_sec is None:
+        delay_sec = SCORE_LEDGER_SAVE_DELAY_SEC
+    if delay_sec < 0:
+        save_score_ledger()
+        return None
+    with SCORE_LEDGER_SAVE_LOCK:
+        timer = SCORE_LEDGER_SAVE_TIMER
+        if timer is not None and timer.is_alive():
+            return timer
+        timer = threading.Timer(delay_sec, save_score_ledger)
+        timer.daemon = True
+        SCORE_LEDGER_SAVE_TIMER = timer
+        timer.start()
+    return timer
+
+def score_chain(by_id, task_id):
+    """
+    タスクと、その実効スコアが伝わる祖先を順に返す。
+    未完了のタスクは親へ点を渡さないので、最初の未完了の祖先で止まる。
+    """
+    chain = []
+    seen = set()
+    task = by_id.get(task_id)
+    while task is not None and task['id'] not in seen:
+        chain.append(task)
+        seen.add(task['id'])
+        if len(chain) > 1 and task['completed'] == 0:
+            break
+        task = by_id.get(to_int(task.get('parent_id'), 0))
+    return chain
+
+def score_chain_ids(old_by_id, new_by_id, changed_ids):
+    """書き込みの前後で実効スコアが動きうるタスクのIDを返す。"""
+    task_ids = set()
+    for by_id in (old_by_id, new_by_id):
+        for task_id in changed_ids:
+            task_ids.update(task['id'] for task in score_chain(by_id, task_id))
+    return task_ids
+
+def index_section_views(task, today):
+    """
+    タスクが索引ページの各部分に映す値を返す。映らない部分は含めない。
+    ツリーと完了履歴は多くの項目を描くので、タスクそのものを値にする。
+    """
+    if task is None:
+        return {}
+    if task['completed'] != 0:
+        return {'recent_done': task}
+    views = {
+        'tree': task,
+        'parent_options': (task['title'], task['due_date']),
+    }
+    # due_date は常に YYYY-MM-DD なので、文字列のまま日付順に比べられる
+    due = task['due_date']
+    if due < today.isoformat():
+        views['overdue'] = (task['title'], due, task['extension_count'], task['sort_order'])
+    elif due < (today + dt.timedelta(days=7)).isoformat():
+        views['calendar'] = (task['title'], due, task['sort_order'])
+    return views
+
+def touched_index_sections(old_by_id, new_by_id, changed_ids, today=None):
+    """
+    変わったタスクが索引ページのどの部分の表示を変えるかを返す。
+    部分ごとに、そこに映る値が書き込みの前後で違うものだけを数える。
+    実効スコアは完了した子から親へ伝わるので、最初の未完了の祖先まで親もたどる。
+    """
+    today = today or dt.date.today()
+    sections = set()
+    for task_id in changed_ids:
+        old = index_section_views(old_by_id.get(task_id), today)
+        new = index_section_views(new_by_id.get(task_id), today)
+        sections.update(
+            section for section in old.keys() | new.keys()
+            if old.get(section) != new.get(section)
+        )
+        for by_id in (old_by_id, new_by_id):
+            for parent in score_chain(by_id, task_id)[1:]:
+                sections.add('tree' if parent['completed'] == 0 else 'recent_done')
+    return sections
+
+def mark_index_fragments_dirty(before_version, version, old_by_id, new_by_id, changed_ids):
+    global INDEX_FRAGMENT_STORE_VERSION
+    with INDEX_FRAGMENT_LOCK:
+        if INDEX_FRAGMENT_STORE_VERSION == before_version:
+            sections = touched_index_sections(old_by_id, new_by_id, changed_ids)
+        else:
+            # 書き込み前の状態を描いたかどうか分からないので全部描き直す
+            sections = INDEX_FRAGMENT_SECTIONS
+        for section in sections:
+            INDEX_FRAGMENT_VERSIONS[section] += 1
+        INDEX_FRAGMENT_STORE_VERSION = version
+
+def index_fragment_versions(store_version):
+    """
+    読んだデータの版に対応する部分ごとの版を返す。
+    アプリ外での変更などで版が飛んでいれば、全部の部分を描き直させる。
+    """
+    global INDEX_FRAGMENT_STORE_VERSION
+    with INDEX_FRAGMENT_LOCK:
+        if INDEX_FRAGMENT_STORE_VERSION != store_version:
+            for section in INDEX_FRAGMENT_SECTIONS:
+                INDEX_FRAGMENT_VERSIONS[section] += 1
+            INDEX_FRAGMENT_STORE_VERSION = store_version
+        return dict(INDEX_FRAGMENT_VERSIONS)
+
+def index_fragment(name, version, build):
+    """
+    部分テンプレート index_<name>.html の描画結果を、部分の版と日付ごとに使い回す。
+    build() は描き直すときだけ呼ばれ、テンプレートに渡す値を返す。
+    """
+    key = (version, today_str())
+    with INDEX_FRAGMENT_LOCK:
+        cached = INDEX_FRAGMENT_CACHE.get(name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    html = Markup(render_template(f'index_{name}.html', **build()))
+    with INDEX_FRAGMENT_LOCK:
+        INDEX_FRAGMENT_CACHE[name] = (key, html)
+    return html
+
+def write_tasks(tasks, op=None):
+    score_ledger()
+    old_records = TASK_STORE.peek()
+    before_version = TASK_STORE.version
+
+    rows = [task_to_row(t) for t in tasks]
+    upserts, deletes = task_row_changes(rows)
+    # 書く文字列をそのまま読み直した結果を、書き込み後のキャッシュにする
+    new_records = tasks_from_rows(rows)
+    changed_ids = [int(row['id']) for row in upserts] + [int(task_id) for task_id in deletes]
+
+    # 実効スコアが動くのは、変わったタスクとその点が伝わる祖先だけ。
+    # その分の台帳の値を書き込みの前後で比べる。
+    old_by_id = {t['id']: t for t in old_records}
+    new_by_id = {t['id']: t for t in new_records}
+    ledger_ids = score_chain_ids(old_by_id, new_by_id, changed_ids)
+    ledger_before = score_ledger_entries(old_by_id, ledger_ids, before_version)
+
+    TASK_STORAGE.save_task_rows(
+        rows,
+        upserts,
+        deletes,
+        journal_op=op if op in JOURNALED_TASK_OPS else None
+    )
+
+    # 変わったタスクだけを伝え、スコア索引などを差分で更新させる。
+    version = TASK_STORE.replace(new_records, changed_ids=changed_ids)
+    if isinstance(tasks, TaskSnapshot):
+        tasks.version = version
+    mark_index_fragments_dirty(before_version, version, old_by_id, new_by_id, changed_ids)
+    update_score_ledger(ledger_before, score_ledger_entries(new_by_id, ledger_ids, version))
+    schedule_chart_prerender()
+
+TASK_STORE = TaskStore(
+    TASK_STORAGE.paths,
+    load_tasks_from_storage,
+    indexes={
+        'scores': ScoreIndex,
+        'completions': CompletionIndex,
+        'tree': lambda records: TreeIndex(records, sort_key=task_sort_key),
+        'active_tree': lambda records: TreeIndex(
+            records,
+            active_only=True,
+            sort_key=task_sort_key
+        ),
+    }
+)
+
 def next_task_id(tasks):
     return (max([t['id'] for t in tasks]) + 1) if tasks else 1
 
@@ -471,7 +840,23 @@ def annotate_effective_scores(tasks):
     """
     自分の点数に、完了した直接の子タスクの実効点を加える。
     子側の実効点にも完了済みの子が含まれるため、階層的に積み上がる。
+    保存済みの状態と同じタスク一覧なら、TaskStoreが差分更新している
+    スコア索引の値をそのまま使う。読み込み後に点数・完了・親を書き換えた
+    タスクがあれば索引と食い違うので、全体を計算し直す。
     """
+    found = None
+    with TASK_STORE.index_view('scores', getattr(tasks, 'version', None)) as scores:
+        if scores is not None and len(scores) == len(tasks):
+            found = [scores.lookup(task) for task in tasks]
+    if found is not None and None not in found:
+        memo = {}
+        for task, (own_score, child_score, total) in zip(tasks, found):
+            task['own_score'] = own_score
+            task['completed_children_score'] = child_score
+            task['effective_score'] = total
+            memo[task['id']] = total
+        return memo
+
     tasks_by_id = {task['id']: task for task in tasks}
     children_by_parent = {}
 
@@ -513,44 +898,46 @@ def annotate_effective_scores(tasks):
 def task_effective_score(task):
     return to_int(task.get('effective_score'), to_int(task.get('score'), 0))
 
-def collect_descendant_rows(root_task_id, tasks):
-    children_by_parent = {}
-    for task in tasks:
-        parent_id = to_int(task.get('parent_id'), 0)
-        if parent_id > 0:
-            children_by_parent.setdefault(parent_id, []).append(task)
-
-    for children in children_by_parent.values():
-        children.sort(key=task_sort_key)
+def task_tree(tasks, active_only=False):
+    """
+    親子関係の索引を返す。兄弟は task_sort_key の順に並ぶ。保存済みの状態と
+    同じタスク一覧なら、親子関係か並び順が変わるまでTaskStoreが保持している
+    索引を再利用する。
+    """
+    name = 'active_tree' if active_only else 'tree'
+    tree = TASK_STORE.index_values(name, getattr(tasks, 'version', None))
+    if tree is None or tree.size != len(tasks):
+        tree = TreeIndex(tasks, active_only=active_only, sort_key=task_sort_key)
+    return tree
 
+def collect_descendant_rows(root_task_id, tasks):
+    tree = task_tree(tasks)
     rows = []
 
     def walk(parent_id, depth, path):
-        for child in children_by_parent.get(parent_id, []):
+        children = [tasks[tree.position(child_id)] for child_id in tree.children(parent_id)]
+        for child in children:
             if child['id'] in path:
                 continue
             rows.append({'task': child, 'depth': depth})
-            walk(child['id'], depth + 1, path | {child['id']})
+            path.add(child['id'])
+            walk(child['id'], depth + 1, path)
+            path.discard(child['id'])
 
     walk(root_task_id, 0, {root_task_id})
     return rows
 
 def parent_candidates_for_task(tasks, task_id):
+    tree = task_tree(tasks)
     active = [task for task in tasks if task['completed'] == 0]
     active_ids = {str(task['id']) for task in active}
-    forbidden_ids = {
-        task_id,
-        *[
-            row['task']['id']
-            for row in collect_descendant_rows(task_id, tasks)
-        ]
-    }
     candidates = sorted(
-        [task for task in active if task['id'] not in forbidden_ids],
+        [task for task in active if not tree.is_descendant(task['id'], task_id)],
         key=task_sort_key
     )
 
-    task = next((item for item in tasks if item['id'] == task_id), None)
+    position = tree.position(task_id)
+    task = tasks[position] if position is not None else None
     current_parent_id = None
     if task:
         current_parent = task.get('parent_id', '')
@@ -567,53 +954,143 @@ def task_sync_signature(task):
         task.get('completed_at', '')
     )
 
-def score_total_last_14_days(tasks):
-    annotate_effective_scores(tasks)
+def completed_tasks_by_day(tasks, start, end):
+    """
+    start〜endに完了したタスクを日付ごとに集め、完了時刻順に並べて返す。
+    全タスクの走査は1回だけで済ませる。完了日時は、保存済みの状態と同じ
+    タスク一覧ならTaskStoreの完了日時索引で解釈済みの値を使う。
+    """
+    buckets = {}
+    with TASK_STORE.index_view('completions', getattr(tasks, 'version', None)) as completions:
+        for t in tasks:
+            if completions is not None:
+                done_at = completions.lookup(t)
+            else:
+                done_at = completed_datetime(t)
+            if done_at is None:
+                continue
+            day = done_at.date()
+            if start <= day <= end:
+                buckets.setdefault(day, []).append((done_at, t))
+
+    return {
+        day: [t for _, t in sorted(items, key=lambda item: item[0])]
+        for day, items in buckets.items()
+    }
+
+def last_14_days():
     today = dt.date.today()
-    start = today - dt.timedelta(days=13)
-    total = 0
+    return [today - dt.timedelta(days=i) for i in range(13, -1, -1)]  # 14日分(過去→今日)
 
-    for t in tasks:
-        if t.get('completed') != 1 or not t.get('completed_at'):
-            continue
-        try:
-            done = parse_dt_iso(t['completed_at']).date()
-        except Exception:
-            continue
-        if start <= done <= today:
-            total += task_effective_score(t)
+def daily_score_totals(tasks, days):
+    """
+    days の各日に完了したタスクの実効スコア合計と、日付ごとの完了タスクを返す。
+    グラフと画面上の14日合計は同じ集計を使う。
+    """
+    annotate_effective_scores(tasks)
+    buckets = completed_tasks_by_day(tasks, days[0], days[-1])
+    sums = [
+        sum(task_effective_score(t) for t in buckets.get(d, []))
+        for d in days
+    ]
+    return sums, buckets
+
+def score_total_last_14_days(tasks):
+    sums, _ = daily_score_totals(tasks, last_14_days())
+    return sum(sums)
 
-    return total
+def ledger_total_last_14_days():
+    """score_total_last_14_days と同じ合計を、タスクを読まずにスコア台帳から返す。"""
+    days = last_14_days()
+    with TASKS_LOCK:
+        series, _ = score_ledger().series(days[0], days[-1])
+    return sum(day['total'] for day in series)
 
 def get_chart_version():
-    try:
-        return int(os.path.getmtime(TASKS_CSV) * 1000)
-    except OSError:
-        return 0
+    with TASKS_LOCK:
+        ensure_files()
+        return TASK_STORE.token()
 
-def get_chart_png_bytes():
-    version = get_chart_version()
+def chart_cache_key(name):
+    # どのグラフも「今日」を基準に描くため、日付が変われば描き直す
+    return (name, get_chart_version(), today_str())
+
+def chart_etag(key):
+    return '-'.join(key)
+
+def get_chart_png_bytes(name='last_14'):
+    """
+    グラフのPNGを返す。キャッシュになければ描画して保存する。
+    戻り値は (キャッシュのキー, PNG) で、キーはETagに使う。
+    """
+    key = chart_cache_key(name)
 
     with CHART_CACHE_LOCK:
-        if CHART_CACHE['version'] == version and CHART_CACHE['png_bytes'] is not None:
-            return CHART_CACHE['png_bytes']
+        png_bytes = CHART_CACHE.get(key)
+        if png_bytes is not None:
+            CHART_CACHE.move_to_end(key)
+            return key, png_bytes
+        render_lock = CHART_RENDER_LOCKS.setdefault(name, threading.Lock())
+
+    # 裏で描き直している最中なら、それを待って結果を使う
+    with render_lock:
+        with TASKS_LOCK:
+            tasks = read_tasks()
+            # 読み込んだデータと同じ版のキーで保存する
+            key = chart_cache_key(name)
 
-    with TASKS_LOCK:
-        tasks = read_tasks()
+        with CHART_CACHE_LOCK:
+            png_bytes = CHART_CACHE.get(key)
+            if png_bytes is not None:
+                CHART_CACHE.move_to_end(key)
+                return key, png_bytes
 
-    chart_b64, _ = chart_last_14_days_png_b64(tasks)
-    png_bytes = base64.b64decode(chart_b64)
+        png_bytes = CHART_RENDERERS[name](tasks)
 
+        with CHART_CACHE_LOCK:
+            CHART_CACHE[key] = png_bytes
+            CHART_CACHE.move_to_end(key)
+            while len(CHART_CACHE) > CHART_CACHE_MAX_ENTRIES:
+                CHART_CACHE.popitem(last=False)
+
+    return key, png_bytes
+
+def prerender_charts():
+    """
+    このプロセスで一度でも表示されたグラフを、最新のデータで描いてキャッシュに入れる。
+    グラフを見ていない使い方（APIだけなど）ではmatplotlibを読み込まない。
+    """
     with CHART_CACHE_LOCK:
-        CHART_CACHE['version'] = version
-        CHART_CACHE['png_bytes'] = png_bytes
+        names = list(dict.fromkeys(key[0] for key in CHART_CACHE))
+    for name in names:
+        try:
+            get_chart_png_bytes(name)
+        except Exception:
+            app.logger.exception('グラフの事前描画に失敗した: %s', name)
 
-    return png_bytes
+def schedule_chart_prerender(delay_sec=None):
+    """
+    書き込みのたびに呼ばれ、続けて書き込まれている間は待ち直す。
+    最後の書き込みから delay_sec 秒後に1回だけ描き直す。
+    """
+    global CHART_PRERENDER_TIMER
+    if delay_sec is None:
+        delay_sec = CHART_PRERENDER_DELAY_SEC
+    if delay_sec < 0:
+        return None
+    with CHART_PRERENDER_LOCK:
+        if CHART_PRERENDER_TIMER is not None:
+            CHART_PRERENDER_TIMER.cancel()
+        timer = threading.Timer(delay_sec, prerender_charts)
+        timer.daemon = True
+        CHART_PRERENDER_TIMER = timer
+        timer.start()
+    return timer
 
 def enqueue_sync_job(job):
     if not GOOGLE_SYNC_ENABLED:
         return
-    SYNC_QUEUE.put(job)
+    SYNC_OUTBOX.put(job)
 
 def enqueue_task_sync(local_task_id):
     if not GOOGLE_SYNC_ENABLED:
@@ -623,12 +1100,14 @@ def enqueue_task_sync(local_task_id):
         'local_task_id': int(local_task_id)
     })
 
-def enqueue_google_delete(google_task_id):
-    if not GOOGLE_SYNC_ENABLED or not google_task_id:
+def enqueue_google_deletes(google_task_ids):
+    google_task_ids = [gid for gid in google_task_ids if gid]
+    if not GOOGLE_SYNC_ENABLED or not google_task_ids:
         return
+    # 部分木の削除でも1件のジョブにまとめ、同期ワーカーの準備を1回で済ませる
     enqueue_sync_job({
-        'action': 'delete_google_task',
-        'google_task_id': google_task_id
+        'action': 'delete_google_tasks',
+        'google_task_ids': google_task_ids
     })
 
 def request_google_pull(force=False):
@@ -667,6 +1146,13 @@ def start_sync_worker():
         if SYNC_WORKER_STARTED:
             return
 
+        # 前回終了時に残っていた依頼と、送信待ちのままのタスクを拾い直す
+        SYNC_OUTBOX.load()
+        with TASKS_LOCK:
+            pending_ids = [t['id'] for t in read_tasks() if t.get('sync_pending', 0)]
+        for local_task_id in pending_ids:
+            enqueue_task_sync(local_task_id)
+
         th = threading.Thread(target=sync_worker_loop, daemon=True)
         th.start()
         SYNC_WORKER_STARTED = True
@@ -727,16 +1213,26 @@ def create_google_task_for_local(local_task_id, snapshot):
 
     return google_id
 
-def mark_task_synced(local_task_id, snapshot, google_task_id):
-    expected_signature = task_sync_signature(snapshot)
+def mark_tasks_synced(entries):
+    """
+    (ローカルID, 送信時のスナップショット, GoogleタスクID) の一覧を同期済みにする。
+    何件あっても保存は1回で、見つかったローカルIDの集合を返す。
+    """
+    expected = {
+        local_task_id: (task_sync_signature(snapshot), google_task_id)
+        for local_task_id, snapshot, google_task_id in entries
+    }
+    found = set()
 
     with TASKS_LOCK:
         tasks = read_tasks()
         changed = False
 
         for t in tasks:
-            if t['id'] != local_task_id:
+            if t['id'] not in expected:
                 continue
+            found.add(t['id'])
+            expected_signature, google_task_id = expected[t['id']]
 
             if t.get('google_task_id') != google_task_id and google_task_id:
                 t['google_task_id'] = google_task_id
@@ -747,89 +1243,173 @@ def mark_task_synced(local_task_id, snapshot, google_task_id):
                     t['sync_pending'] = 0
                     changed = True
 
-            if changed:
-                write_tasks(tasks)
-
-            return True
-
-    return False
-
-def sync_local_task_to_google(local_task_id, allow_recreate=True):
-    snapshot = get_local_task_snapshot(local_task_id)
-    if not snapshot:
-        return True
-
-    google_id = snapshot.get('google_task_id', '')
-
-    if not google_id:
-        google_id = create_google_task_for_local(local_task_id, snapshot)
-        if not google_id:
-            return False
+        if changed:
+            write_tasks(tasks)
 
-        snapshot = get_local_task_snapshot(local_task_id)
-        if not snapshot:
-            return True
+    return found
 
+def google_task_body(snapshot):
+    # 内容と完了状態は1回のPATCHで送る
     body = {
         'title': snapshot['title'],
-        'notes': make_google_notes(snapshot)
+        'notes': make_google_notes(snapshot),
+        'status': 'completed' if snapshot.get('completed') == 1 else 'needsAction'
     }
 
     due = google_due_str(snapshot.get('due_date', ''))
     if due:
         body['due'] = due
+    return body
 
-    ok, error_status = google_patch_task_result(google_id, body)
+def get_local_task_snapshots(local_task_ids):
+    wanted = set(local_task_ids)
+    with TASKS_LOCK:
+        return {t['id']: dict(t) for t in read_tasks() if t['id'] in wanted}
 
-    if ok:
-        if snapshot.get('completed') == 1:
-            ok, error_status = google_patch_task_result(
-                google_id,
-                {'status': 'completed'}
-            )
+def sync_local_tasks_to_google(local_task_ids, allow_recreate=True):
+    """
+    複数のローカルタスクをGoogleへ送り、ローカルIDごとの成否を返す。
+    未作成のタスクだけ個別に作成し、更新はまとめてHTTPバッチで送る。
+    """
+    local_task_ids = list(dict.fromkeys(local_task_ids))
+    results = {local_task_id: True for local_task_id in local_task_ids}
+    snapshots = get_local_task_snapshots(local_task_ids)
+
+    created = False
+    for local_task_id, snapshot in snapshots.items():
+        if snapshot.get('google_task_id'):
+            continue
+        if create_google_task_for_local(local_task_id, snapshot):
+            created = True
         else:
-            ok, error_status = google_patch_task_result(
-                google_id,
-                {'status': 'needsAction'}
-            )
+            results[local_task_id] = False
+    if created:
+        snapshots = get_local_task_snapshots(local_task_ids)
+
+    pending = [
+        (local_task_id, snapshot, snapshot['google_task_id'])
+        for local_task_id, snapshot in snapshots.items()
+        if snapshot.get('google_task_id') and results[local_task_id]
+    ]
+    patch_results = google_patch_tasks([
+        (google_id, google_task_body(snapshot))
+        for _, snapshot, google_id in pending
+    ])
+
+    synced = []
+    recreate_ids = []
+    for local_task_id, snapshot, google_id in pending:
+        ok, error_status = patch_results.get(google_id, (False, None))
+        if ok:
+            synced.append((local_task_id, snapshot, google_id))
+            continue
+        results[local_task_id] = False
+        if allow_recreate and error_status == 404:
+            clear_google_task_id_if_matches(local_task_id, google_id)
+            recreate_ids.append(local_task_id)
 
-    if ok:
-        mark_task_synced(local_task_id, snapshot, google_id)
-        return True
+    if synced:
+        mark_tasks_synced(synced)
+    if recreate_ids:
+        results.update(sync_local_tasks_to_google(recreate_ids, allow_recreate=False))
 
-    if allow_recreate and error_status == 404:
-        clear_google_task_id_if_matches(local_task_id, google_id)
-        return sync_local_task_to_google(local_task_id, allow_recreate=False)
+    return results
 
-    return False
+def sync_local_task_to_google(local_task_id, allow_recreate=True):
+    return sync_local_tasks_to_google([local_task_id], allow_recreate)[local_task_id]
 
 def process_sync_job(job):
-    action = job.get('action')
+    process_sync_jobs([job])
 
-    if action == 'sync_task':
-        local_task_id = to_int(job.get('local_task_id'), 0)
-        if local_task_id > 0:
-            sync_local_task_to_google(local_task_id)
-        return
+def process_sync_jobs(jobs):
+    """
+    たまったジョブを種類ごとにまとめて処理し、失敗したジョブのキーを返す。
+    同じタスクの同期は1回にし、削除はすべて1つのバッチへ入れ、取り込みは最後に1回だけ行う。
+    """
+    local_task_ids = []
+    google_task_ids = []
+    pull_requested = False
+
+    for job in jobs:
+        action = job.get('action')
+
+        if action == 'sync_task':
+            local_task_id = to_int(job.get('local_task_id'), 0)
+            if local_task_id > 0:
+                local_task_ids.append(local_task_id)
+        elif action == 'delete_google_tasks':
+            google_task_ids.extend(
+                str(gid).strip()
+                for gid in job.get('google_task_ids') or []
+                if str(gid or '').strip()
+            )
+        elif action == 'pull':
+            pull_requested = True
 
-    if action == 'delete_google_task':
-        google_task_id = (job.get('google_task_id') or '').strip()
-        if google_task_id:
-            google_delete_task(google_task_id)
-        return
+    failed_keys = set()
+
+    if local_task_ids:
+        try:
+            results = sync_local_tasks_to_google(local_task_ids)
+        except Exception:
+            app.logger.exception('タスクの同期に失敗した: %s', local_task_ids)
+            results = {}
+        failed_keys.update(
+            f'sync:{local_task_id}'
+            for local_task_id in local_task_ids
+            if not results.get(local_task_id, False)
+        )
+
+    if google_task_ids:
+        try:
+            results = google_delete_tasks(google_task_ids)
+        except Exception:
+            app.logger.exception('Googleタスクの削除に失敗した: %s', google_task_ids)
+            results = {}
+        failed_keys.update(
+            f'delete:{google_task_id}'
+            for google_task_id in google_task_ids
+            if not results.get(google_task_id, False)
+        )
 
-    if action == 'pull':
+    # 取り込みは失敗しても定期的な取り込みで追いつくので、やり直さない
+    if pull_requested:
         try:
             sync_google_to_local()
         finally:
             mark_google_pull_done()
-        return
+
+    return failed_keys
+
+def run_sync_jobs(jobs):
+    """
+    take() で受け取ったジョブを処理する。成功したジョブだけアウトボックスから消し、
+    失敗したジョブは間をおいて次の回にやり直す。
+    """
+    try:
+        failed_keys = process_sync_jobs(jobs)
+    except Exception:
+        app.logger.exception('同期ジョブの処理に失敗した: %s', jobs)
+        failed_keys = {key for job in jobs for key, _ in job_keys(job)}
+
+    succeeded = []
+    failed = []
+    for job in jobs:
+        if any(key in failed_keys for key, _ in job_keys(job)):
+            failed.append(job)
+        else:
+            succeeded.append(job)
+    SYNC_OUTBOX.done(succeeded)
+    if failed:
+        SYNC_OUTBOX.retry(failed)
 
 def sync_worker_loop():
     while True:
-        try:
-            job = SYNC_QUEUE.get(timeout=GOOGLE_PULL_MIN_INTERVAL_SEC)
-        except queue.Empty:
+        jobs = SYNC_OUTBOX.take(
+            timeout=GOOGLE_PULL_MIN_INTERVAL_SEC,
+            limit=GOOGLE_SYNC_MAX_JOBS_PER_ROUND
+        )
+        if not jobs:
             try:
                 sync_google_to_local()
             except Exception:
@@ -838,350 +1418,283 @@ def sync_worker_loop():
                 mark_google_pull_done()
             continue
 
-        try:
-            process_sync_job(job)
-        except Exception:
-            app.logger.exception('同期ジョブの処理に失敗した: %s', job)
-        finally:
-            SYNC_QUEUE.task_done()
+        run_sync_jobs(jobs)
 
 # ---------- スコア集計＆折れ線描画 ----------
-def chart_last_14_days_png_b64(tasks):
-    annotate_effective_scores(tasks)
-    today = dt.date.today()
-    days = [today - dt.timedelta(days=i) for i in range(13, -1, -1)]  # 14日分(過去→今日)
-
-    # --- 14日分の合計スコア ---
-    sums = []
-    for d in days:
-        s = 0
-        for t in tasks:
-            if t['completed'] == 1 and t['completed_at']:
-                done = parse_dt_iso(t['completed_at']).date()
-                if done == d:
-                    s += task_effective_score(t)
-        sums.append(s)
-    total = sum(sums)
-
-    # --- 昨日・今日の個別タスク ---
-    target_days = [today - dt.timedelta(days=1), today]  # [昨日, 今日]
-    day_tasks = {d: [] for d in target_days}
+# matplotlibは起動時間の大半を占め、pyplotはスレッドセーフでもないため、
+# 描画は子プロセスに任せる。子プロセスを使えないときはこのプロセス内で1枚ずつ描く。
+CHART_POOL = ChartRenderPool(
+    CHART_RENDER_WORKERS,
+    timeout=CHART_RENDER_TIMEOUT_SEC,
+    logger=app.logger
+)
 
-    for t in tasks:
-        if t['completed'] == 1 and t['completed_at']:
-            done = parse_dt_iso(t['completed_at']).date()
-            if done in day_tasks:
-                day_tasks[done].append(t)
-
-    # 完了時刻順に並べる
-    for d in target_days:
-        day_tasks[d].sort(
-            key=lambda x: parse_dt_iso(x['completed_at']) if x['completed_at'] else dt.datetime.min
-        )
+def warm_charts():
+    try:
+        CHART_POOL.warm()
+    except Exception:
+        app.logger.exception('グラフ描画モジュールの読み込みに失敗した')
 
-    # --- Figure 作成 ---
-    fig = plt.figure(figsize=(9.0, 3.4), dpi=120)
-    gs = fig.add_gridspec(1, 2, width_ratios=[2, 1])
-
-    # 左: 14日折れ線
-    ax1 = fig.add_subplot(gs[0, 0])
-    ax1.plot(range(len(days)), sums, marker='o')
-    ax1.set_title('過去14日のスコア')
-    ax1.set_xlabel('日付')
-    ax1.set_ylabel('点')
-    ax1.set_xticks(range(len(days)))
-    ax1.set_xticklabels([d.strftime('%m/%d') for d in days], rotation=45)
-    ax1.grid(True, linestyle='--', linewidth=0.5)
-
-    # 右: 縦積み棒
-    ax2 = fig.add_subplot(gs[0, 1])
-
-    x_pos = [0, 1]  # 0=昨日, 1=今日
-    bar_width = 0.6
-    max_stack = 0
-
-    for i, d in enumerate(target_days):
-        bottom = 0
-        for t in day_tasks[d]:
-            sc = task_effective_score(t)
-            if sc <= 0:
-                continue
+def start_chart_warmup(delay_sec=CHART_WARMUP_DELAY_SEC):
+    # 最初の画面表示と競合しないよう、少し待ってから裏で描画用プロセスを起こしておく
+    if delay_sec < 0:
+        return None
+    timer = threading.Timer(delay_sec, warm_charts)
+    timer.daemon = True
+    timer.start()
+    return timer
 
-            # 棒
-            ax2.bar(i, sc, width=bar_width, bottom=bottom)
-
-            # ★ 今日だけラベルを右に表示する
-            if d == today:
-                title = t['title']
-                if len(title) > 15:
-                    title = title[:14] + "…"
-
-                label_y = bottom + sc / 2
-                label_x = i + bar_width/2 + 0.15
-
-                ax2.text(
-                    label_x,
-                    label_y,
-                    title,
-                    va='center',
-                    ha='left',
-                    fontsize=8
-                )
+def chart_task_item(task):
+    return {'id': task['id'], 'title': task['title'], 'score': task_effective_score(task)}
 
-            bottom += sc
+def chart_last_14_days_data(tasks):
+    """
+    過去14日グラフの元データ。PNG描画と /api/charts/last14 で共用する。
+    """
+    days = last_14_days()
+    today = days[-1]
 
-        max_stack = max(max_stack, bottom)
+    # --- 14日分の合計スコア ---
+    sums, day_tasks = daily_score_totals(tasks, days)
 
-    ax2.set_xticks(x_pos)
-    ax2.set_xticklabels([d.strftime('%m/%d') for d in target_days], rotation=45)
-    ax2.set_ylabel('点（積み上げ）')
-    ax2.set_title('昨日と今日')
+    # --- 昨日・今日の個別タスク（完了時刻順） ---
+    target_days = [today - dt.timedelta(days=1), today]  # [昨日, 今日]
+    return {
+        'today': today.isoformat(),
+        'days': [d.isoformat() for d in days],
+        'sums': sums,
+        'total': sum(sums),
+        'stacks': [
+            {
+                'date': d.isoformat(),
+                'tasks': [chart_task_item(t) for t in day_tasks.get(d, [])]
+            }
+            for d in target_days
+        ]
+    }
 
-    if max_stack > 0:
-        ax2.set_ylim(0, max_stack * 1.15)
+def chart_today_progress_data(tasks):
+    """
+    今日の進捗グラフの元データ（完了時刻順）。PNG描画と /api/charts/today で共用する。
+    """
+    annotate_effective_scores(tasks)
+    today = dt.date.today()
+    done_today = completed_tasks_by_day(tasks, today, today).get(today, [])
+    items = [chart_task_item(t) for t in done_today]
+    return {
+        'date': today.isoformat(),
+        'total': sum(max(item['score'], 0) for item in items),
+        'tasks': items
+    }
 
-    # ラベル分の余白
-    ax2.set_xlim(-0.5, 1.4)
+def chart_last_14_days_png_bytes(tasks):
+    data = chart_last_14_days_data(tasks)
+    days = [parse_date(d) for d in data['days']]
+    target_days = [parse_date(stack['date']) for stack in data['stacks']]
+    day_scores = {
+        d: [(item['title'], item['score']) for item in stack['tasks']]
+        for d, stack in zip(target_days, data['stacks'])
+    }
+    return CHART_POOL.render(
+        'render_last_14_days', days, data['sums'], target_days, day_scores, days[-1]
+    )
 
-    fig.tight_layout(rect=[0, 0, 0.92, 1])  # 右側の余白を大きめに
+def chart_today_progress_png_bytes(tasks):
+    items = [(item['title'], item['score']) for item in chart_today_progress_data(tasks)['tasks']]
+    return CHART_POOL.render('render_today_progress', items)
 
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png')
-    plt.close(fig)
-    b64 = base64.b64encode(buf.getvalue()).decode('ascii')
-    return b64, total
+CHART_RENDERERS = {
+    'last_14': chart_last_14_days_png_bytes,
+    'today_progress': chart_today_progress_png_bytes
+}
 
-def chart_today_progress_png_b64(tasks):
-    annotate_effective_scores(tasks)
-    def char_width(ch):
-        return 2 if unicodedata.east_asian_width(ch) in ('F', 'W', 'A') else 1
-
-    def wrap_label(text, max_width=24, max_lines=2):
-        text = str(text)
-        lines = []
-        line = ''
-        width = 0
-
-        for ch in text:
-            w = char_width(ch)
-            if width + w > max_width and line:
-                lines.append(line)
-                line = ch
-                width = w
-            else:
-                line += ch
-                width += w
+CHART_DATA_BUILDERS = {
+    'last_14': chart_last_14_days_data,
+    'today_progress': chart_today_progress_data
+}
 
-            if len(lines) >= max_lines:
-                break
+def chart_mode():
+    # ?charts=svg / ?charts=png で、その表示だけ切り替えられる
+    mode = (request.args.get('charts') or CHART_MODE).strip().lower()
+    return mode if mode in CHART_MODES else 'png'
 
-        if line and len(lines) < max_lines:
-            lines.append(line)
+def record_sync_metric(name, amount=1):
+    with SYNC_METRICS_LOCK:
+        SYNC_METRICS[name] = SYNC_METRICS.get(name, 0) + amount
 
-        consumed = ''.join(lines)
-        if len(consumed) < len(text):
-            lines[-1] = lines[-1].rstrip('…') + '…'
 
-        return '\n'.join(lines)
+def sync_metrics_snapshot():
+    with SYNC_METRICS_LOCK:
+        metrics = dict(SYNC_METRICS)
+    # 再利用できた分だけ、トークン読込・クライアント構築・タスクリスト一覧の往復を省けている
+    metrics['setup_round_trips_saved'] = (
+        metrics['service_reuses'] + metrics['tasklist_reuses']
+    )
+    return metrics
 
-    today = dt.date.today()
 
-    done_today = []
-    for t in tasks:
-        if t.get('completed') != 1 or not t.get('completed_at'):
-            continue
-        try:
-            done = parse_dt_iso(t['completed_at']).date()
-        except Exception:
-            continue
-        if done == today:
-            done_today.append(t)
+def invalidate_google_client(tasklist_only=False):
+    with GOOGLE_CLIENT_LOCK:
+        GOOGLE_CLIENT_CACHE['tasklist_id'] = None
+        if not tasklist_only:
+            GOOGLE_CLIENT_CACHE['creds'] = None
+            GOOGLE_CLIENT_CACHE['generation'] += 1
+    record_sync_metric('client_invalidations')
 
-    done_today.sort(
-        key=lambda x: parse_dt_iso(x['completed_at']) if x['completed_at'] else dt.datetime.min
-    )
 
-    n = len(done_today)
+def google_error_status(e, tasklist_scoped=False):
+    """
+    Google APIの例外からHTTPステータスを取り出す。
+    401なら認証情報ごとキャッシュを捨てる。404はタスクリスト単位の呼び出し
+    （tasklist_scoped）のときだけタスクリストIDを捨てる。個々のタスクの404は
+    Google側で消えたタスクを指しているだけで、タスクリストは有効なまま。
+    """
+    status = getattr(getattr(e, 'resp', None), 'status', None)
+    if status == 401:
+        invalidate_google_client()
+    elif status == 404 and tasklist_scoped:
+        invalidate_google_client(tasklist_only=True)
+    return status
 
-    fig_h = max(1.6, 0.65 * max(n, 1) + 0.2)
-    fig = plt.figure(figsize=(11.0, fig_h), dpi=130)
-    ax = fig.add_subplot(111)
 
-    if n == 0:
-        ax.text(
-            0.5,
-            0.5,
-            '今日はまだ完了タスクがありません',
-            ha='center',
-            va='center',
-            fontsize=18
+def load_google_credentials():
+    """
+    保存済みの認証情報を返す。期限切れなら更新して保存し直す。
+    ブラウザでの再認証が必要なときはNoneを返す。GOOGLE_CLIENT_LOCK を持って呼ぶ。
+    """
+    from google.auth.transport.requests import Request as GoogleRequest
+    from google.oauth2.credentials import Credentials
+    from google.auth.exceptions import RefreshError
+
+    creds = GOOGLE_CLIENT_CACHE['creds']
+    if creds is None and os.path.exists(GOOGLE_TOKEN_JSON):
+        creds = Credentials.from_authorized_user_file(
+            GOOGLE_TOKEN_JSON,
+            GOOGLE_SCOPES
         )
-        ax.set_axis_off()
-    else:
-        colors = [
-            '#4f83f1',
-            '#f45b69',
-            '#f2c94c',
-            '#2fb344',
-            '#9b5de5',
-            '#00a6a6',
-            '#f2994a',
-            '#6c757d'
-        ]
 
-        text_colors = [
-            '#2457c5',
-            '#c5303f',
-            '#9a6b00',
-            '#1f7a32',
-            '#6f35c2',
-            '#007575',
-            '#b75f00',
-            '#444444'
-        ]
+    if creds and creds.valid:
+        return creds
 
-        scores = []
-        for t in done_today:
-            scores.append(max(task_effective_score(t), 0))
-
-        max_total = sum(scores)
-        if max_total <= 0:
-            max_total = 1
-
-        for row in range(n):
-            left = 0
-
-            for j in range(row + 1):
-                sc = scores[j]
-                if sc <= 0:
-                    continue
-
-                ax.barh(
-                    row,
-                    sc,
-                    left=left,
-                    height=0.78,
-                    color=colors[j % len(colors)],
-                    edgecolor='white',
-                    linewidth=0.8
-                )
-                left += sc
-
-            title = wrap_label(done_today[row]['title'], max_width=24, max_lines=2)
-
-            ax.text(
-                left + max_total * 0.03,
-                row,
-                title,
-                ha='left',
-                va='center',
-                fontsize=16,
-                fontweight='bold',
-                linespacing=1.15,
-                color=text_colors[row % len(text_colors)]
-            )
-        ax.text(
-            max_total * 1.45,
-            0,
-            f'合計 {max_total} 点',
-            ha='left',
-            va='center',
-            fontsize=28,
-            fontweight='bold'
-        )
-        ax.set_xlim(0, max_total * 2.15)
-        ax.set_ylim(-0.55, n - 0.45)
+    # 期限切れ（または期限直前）のときだけ更新し、新しいトークンを保存する
+    try:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(GoogleRequest())
+            record_sync_metric('credential_refreshes')
+        else:
+            raise RefreshError("no valid creds")
 
-        ax.set_yticks([])
-        ax.tick_params(axis='x', labelsize=13, pad=1)
+    except RefreshError:
+        if os.path.exists(GOOGLE_TOKEN_JSON):
+            os.remove(GOOGLE_TOKEN_JSON)
+        GOOGLE_CLIENT_CACHE['creds'] = None
+        return None
 
-        ax.grid(True, axis='x', linestyle='--', linewidth=0.6, alpha=0.65)
+    with open(GOOGLE_TOKEN_JSON, 'w', encoding='utf-8') as f:
+        f.write(creds.to_json())
+    return creds
 
-        for spine in ['top', 'right', 'left']:
-            ax.spines[spine].set_visible(False)
 
-        ax.spines['bottom'].set_alpha(0.4)
+def authorize_google_interactively():
+    from google_auth_oauthlib.flow import InstalledAppFlow
 
-    fig.subplots_adjust(
-        left=0.03,
-        right=0.99,
-        top=0.99,
-        bottom=0.15
+    flow = InstalledAppFlow.from_client_secrets_file(
+        GOOGLE_CREDENTIALS_JSON,
+        GOOGLE_SCOPES
     )
+    creds = flow.run_local_server(port=0)
+    with open(GOOGLE_TOKEN_JSON, 'w', encoding='utf-8') as f:
+        f.write(creds.to_json())
+    return creds
 
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png')
-    plt.close(fig)
 
-    return base64.b64encode(buf.getvalue()).decode('ascii')
+def adopt_google_credentials(creds):
+    """GOOGLE_CLIENT_LOCK を持って呼び、認証情報の世代を返す。"""
+    # 同じ認証情報を更新しただけなら、構築済みのクライアントをそのまま使える
+    if GOOGLE_CLIENT_CACHE['creds'] is not creds:
+        GOOGLE_CLIENT_CACHE['creds'] = creds
+        GOOGLE_CLIENT_CACHE['generation'] += 1
+    return GOOGLE_CLIENT_CACHE['generation']
+
+
+def google_credentials():
+    """
+    認証情報とその世代を返す。ブラウザでの再認証は GOOGLE_CLIENT_LOCK の外で
+    待つので、その間も他の同期スレッドは止まらない。
+    """
+    with GOOGLE_CLIENT_LOCK:
+        creds = load_google_credentials()
+        if creds is not None:
+            return creds, adopt_google_credentials(creds)
+
+    with GOOGLE_AUTH_LOCK:
+        # 先に認証を終えたスレッドがあれば、その結果を使う
+        with GOOGLE_CLIENT_LOCK:
+            creds = load_google_credentials()
+        if creds is None:
+            creds = authorize_google_interactively()
+        with GOOGLE_CLIENT_LOCK:
+            return creds, adopt_google_credentials(creds)
+
 
 def get_google_service():
     if not GOOGLE_SYNC_ENABLED:
         return None
 
     try:
-        from google.auth.transport.requests import Request as GoogleRequest
-        from google.oauth2.credentials import Credentials
-        from google_auth_oauthlib.flow import InstalledAppFlow
         from googleapiclient.discovery import build
-        from google.auth.exceptions import RefreshError  # ← ★ここに移動させる
+
+        creds, generation = google_credentials()
+
+        service = getattr(GOOGLE_CLIENT_LOCAL, 'service', None)
+        if service is not None and GOOGLE_CLIENT_LOCAL.generation == generation:
+            record_sync_metric('service_reuses')
+            return service
+
+        service = build('tasks', 'v1', credentials=creds)
+        GOOGLE_CLIENT_LOCAL.service = service
+        GOOGLE_CLIENT_LOCAL.generation = generation
+        record_sync_metric('service_builds')
+        return service
     except ImportError as e:
         app.logger.warning('Google Tasks ライブラリの読み込みに失敗した: %s', e)
         return None
-
-    try:
-        creds = None
-
-        if os.path.exists(GOOGLE_TOKEN_JSON):
-            creds = Credentials.from_authorized_user_file(
-                GOOGLE_TOKEN_JSON,
-                GOOGLE_SCOPES
-            )
-
-        if not creds or not creds.valid:
-            try:
-                if creds and creds.expired and creds.refresh_token:
-                    creds.refresh(GoogleRequest())
-                else:
-                    raise RefreshError("no valid creds")
-        
-            except RefreshError:
-                if os.path.exists(GOOGLE_TOKEN_JSON):
-                    os.remove(GOOGLE_TOKEN_JSON)
-        
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    GOOGLE_CREDENTIALS_JSON,
-                    GOOGLE_SCOPES
-                )
-                creds = flow.run_local_server(port=0)
-        
-            with open(GOOGLE_TOKEN_JSON, 'w', encoding='utf-8') as f:
-                f.write(creds.to_json())
-
-        return build('tasks', 'v1', credentials=creds)
-    except Exception:
-        app.logger.exception('Google Tasksサービスの初期化に失敗した')
-        return None
+    except Exception:
+        app.logger.exception('Google Tasksサービスの初期化に失敗した')
+        return None
 
 
 def get_google_tasklist_id(service):
     if not service:
         return None
 
+    with GOOGLE_CLIENT_LOCK:
+        tasklist_id = GOOGLE_CLIENT_CACHE['tasklist_id']
+    if tasklist_id:
+        record_sync_metric('tasklist_reuses')
+        return tasklist_id
+
     try:
+        record_sync_metric('tasklist_lookups')
         res = service.tasklists().list(maxResults=100).execute()
         for item in res.get('items', []):
             if item.get('title') == GOOGLE_TASKLIST_TITLE:
-                return item['id']
-
-        res = service.tasklists().insert(
-            body={'title': GOOGLE_TASKLIST_TITLE}
-        ).execute()
-        return res['id']
-    except Exception:
+                tasklist_id = item['id']
+                break
+        else:
+            res = service.tasklists().insert(
+                body={'title': GOOGLE_TASKLIST_TITLE}
+            ).execute()
+            tasklist_id = res['id']
+    except Exception as e:
+        google_error_status(e, tasklist_scoped=True)
         app.logger.exception('Googleタスクリストの取得に失敗した')
         return None
 
+    with GOOGLE_CLIENT_LOCK:
+        GOOGLE_CLIENT_CACHE['tasklist_id'] = tasklist_id
+    return tasklist_id
+
 
 def google_due_str(date_str):
     if not date_str:
@@ -1230,31 +1743,97 @@ def google_insert_task(local_task):
             body=body
         ).execute()
         return res.get('id', '')
-    except Exception:
+    except Exception as e:
+        # 作成先のタスクリストが見つからない404なので、タスクリストIDを取り直す
+        google_error_status(e, tasklist_scoped=True)
         app.logger.exception('Googleタスクの作成に失敗した')
         return ''
 
 
-def google_patch_task_result(task_id, body):
-    if not task_id:
-        return False, None
+def google_execute_requests(service, requests, label):
+    """
+    (キー, リクエスト) の一覧を実行し、キーごとに (成功したか, HTTPステータス) を返す。
+    2件以上あればHTTPバッチにまとめ、1回の通信で最大GOOGLE_BATCH_MAX_REQUESTS件を送る。
+    """
+    results = {}
+
+    if len(requests) == 1:
+        key, http_request = requests[0]
+        try:
+            http_request.execute()
+            results[key] = (True, None)
+        except Exception as e:
+            status = google_error_status(e)
+            app.logger.exception('%sに失敗した: %s', label, key)
+            results[key] = (False, status)
+        return results
+
+    for start in range(0, len(requests), GOOGLE_BATCH_MAX_REQUESTS):
+        chunk = requests[start:start + GOOGLE_BATCH_MAX_REQUESTS]
+        keys = {str(i): key for i, (key, _) in enumerate(chunk)}
+
+        def on_response(request_id, response, exception):
+            key = keys[request_id]
+            if exception is None:
+                results[key] = (True, None)
+                return
+            status = google_error_status(exception)
+            app.logger.warning('%sに失敗した: %s (%s)', label, key, exception)
+            results[key] = (False, status)
+
+        batch = service.new_batch_http_request(callback=on_response)
+        for request_id, (_, http_request) in enumerate(chunk):
+            batch.add(http_request, request_id=str(request_id))
+
+        try:
+            batch.execute()
+        except Exception as e:
+            status = google_error_status(e)
+            app.logger.exception('%sのバッチ送信に失敗した', label)
+            for key in keys.values():
+                results.setdefault(key, (False, status))
+
+        record_sync_metric('batch_calls')
+        record_sync_metric('batched_requests', len(chunk))
+
+    return results
+
+
+def google_patch_tasks(patches):
+    """
+    (GoogleタスクID, 変更内容) の一覧をまとめて送る。
+    同じタスクへの変更は1つのPATCHに合成する。
+    """
+    bodies = {}
+    for task_id, body in patches:
+        if task_id:
+            bodies.setdefault(task_id, {}).update(body)
+    if not bodies:
+        return {}
 
     service = get_google_service()
     tasklist_id = get_google_tasklist_id(service)
     if not service or not tasklist_id:
-        return False, None
+        return {task_id: (False, None) for task_id in bodies}
 
-    try:
-        service.tasks().patch(
-            tasklist=tasklist_id,
-            task=task_id,
-            body=body
-        ).execute()
-        return True, None
-    except Exception as e:
-        status = getattr(getattr(e, 'resp', None), 'status', None)
-        app.logger.exception('Googleタスクの更新に失敗した: %s', task_id)
-        return False, status
+    requests = [
+        (
+            task_id,
+            service.tasks().patch(
+                tasklist=tasklist_id,
+                task=task_id,
+                body=body
+            )
+        )
+        for task_id, body in bodies.items()
+    ]
+    return google_execute_requests(service, requests, 'Googleタスクの更新')
+
+
+def google_patch_task_result(task_id, body):
+    if not task_id:
+        return False, None
+    return google_patch_tasks([(task_id, body)])[task_id]
 
 
 def google_patch_task(task_id, body):
@@ -1281,7 +1860,69 @@ def google_update_task_due(task_id, due_date):
 def google_sync_available():
     return GOOGLE_SYNC_ENABLED and os.path.exists(GOOGLE_CREDENTIALS_JSON)
 
-def sync_google_to_local():
+def load_google_sync_state():
+    if not os.path.exists(GOOGLE_SYNC_STATE_JSON):
+        return {}
+
+    with open(GOOGLE_SYNC_STATE_JSON, 'r', encoding='utf-8') as f:
+        try:
+            state = json.load(f)
+        except json.JSONDecodeError:
+            return {}
+
+    return state if isinstance(state, dict) else {}
+
+def save_google_sync_state(state):
+    text = json.dumps(state, ensure_ascii=False, indent=2)
+    SHARED_STORAGE.atomic_write_data_file(
+        GOOGLE_SYNC_STATE_JSON,
+        lambda f: f.write(text),
+        create_backup=False
+    )
+
+def google_sync_needs_full_pull(state, tasklist_id, force_full=False):
+    if force_full:
+        return True
+    if state.get('tasklist_id') != tasklist_id or not state.get('updated_min'):
+        return True
+    last_full = state.get('last_full_sync_at')
+    if not isinstance(last_full, (int, float)):
+        return True
+    return time.time() - last_full >= GOOGLE_FULL_SYNC_INTERVAL_SEC
+
+def latest_google_updated(google_tasks, current=''):
+    """
+    取得したタスクのupdated（Google側の時刻）のうち最新のものを返す。
+    手元の時計とのずれに左右されないよう、次回のupdatedMinにはこの値を使う。
+    """
+    latest_at = None
+    latest = current or ''
+    if latest:
+        try:
+            latest_at = dt.datetime.fromisoformat(latest.replace('Z', '+00:00'))
+        except ValueError:
+            latest, latest_at = '', None
+
+    for gt in google_tasks:
+        updated = gt.get('updated') or ''
+        try:
+            updated_at = dt.datetime.fromisoformat(updated.replace('Z', '+00:00'))
+        except ValueError:
+            continue
+        if latest_at is None or updated_at > latest_at:
+            latest, latest_at = updated, updated_at
+
+    return latest
+
+def google_ids_at_cursor(google_tasks, cursor, previous_ids=()):
+    """
+    updated がカーソルと同じで、取り込み済みのタスクのIDを返す。
+    updatedMin はその時刻ちょうども含むので、次回はこれらを除いて取り込む。
+    """
+    ids = {gt['id'] for gt in google_tasks if gt.get('id') and gt.get('updated') == cursor}
+    return sorted(ids.union(previous_ids))
+
+def sync_google_to_local(force_full=False):
     if not GOOGLE_SYNC_ENABLED:
         return
 
@@ -1290,28 +1931,51 @@ def sync_google_to_local():
     if not service or not tasklist_id:
         return
 
+    sync_state = load_google_sync_state()
+    full_pull = google_sync_needs_full_pull(sync_state, tasklist_id, force_full)
+
     google_tasks = []
     page_token = None
+    list_params = {
+        'tasklist': tasklist_id,
+        'showCompleted': True,
+        'showHidden': True,
+        'showDeleted': True,
+        'maxResults': 100
+    }
+    if not full_pull:
+        # 前回の同期以降に更新（削除を含む）されたタスクだけを取得する
+        list_params['updatedMin'] = sync_state['updated_min']
 
     try:
         while True:
             res = service.tasks().list(
-                tasklist=tasklist_id,
-                showCompleted=True,
-                showHidden=True,
-                showDeleted=True,
-                maxResults=100,
-                pageToken=page_token
+                pageToken=page_token,
+                **list_params
             ).execute()
 
             google_tasks.extend(res.get('items', []))
             page_token = res.get('nextPageToken')
             if not page_token:
                 break
-    except Exception:
+    except Exception as e:
+        google_error_status(e, tasklist_scoped=True)
         app.logger.exception('Googleタスクの同期に失敗した')
         return
 
+    if not full_pull:
+        # 前回の最新時刻ちょうどのタスクは、前回取り込んだものなら返ってきても読み飛ばす
+        merged_ids = set(sync_state.get('updated_min_ids') or ())
+        google_tasks = [
+            gt for gt in google_tasks
+            if gt.get('updated') != sync_state['updated_min'] or gt.get('id') not in merged_ids
+        ]
+
+    record_sync_metric('full_pulls' if full_pull else 'incremental_pulls')
+    record_sync_metric('pulled_tasks', len(google_tasks))
+    if not full_pull and not google_tasks:
+        return
+
     notes_to_patch = []
 
     with TASKS_LOCK:
@@ -1442,694 +2106,99 @@ def sync_google_to_local():
         if changed:
             write_tasks(tasks)
 
-    for google_id, notes in notes_to_patch:
-        google_patch_task_notes(google_id, notes)
+    # ローカルへの反映が済んでからカーソルを進める
+    previous_cursor = ''
+    previous_ids = ()
+    if sync_state.get('tasklist_id') == tasklist_id:
+        previous_cursor = sync_state.get('updated_min', '')
+        if not full_pull:
+            previous_ids = sync_state.get('updated_min_ids') or ()
+    new_state = dict(sync_state)
+    new_state['tasklist_id'] = tasklist_id
+    new_state['updated_min'] = latest_google_updated(google_tasks, previous_cursor)
+    new_state['updated_min_ids'] = google_ids_at_cursor(
+        google_tasks,
+        new_state['updated_min'],
+        previous_ids if new_state['updated_min'] == previous_cursor else ()
+    )
+    if full_pull:
+        new_state['last_full_sync_at'] = time.time()
+    if new_state != sync_state:
+        save_google_sync_state(new_state)
+
+    if notes_to_patch:
+        google_patch_tasks([
+            (google_id, {'notes': notes})
+            for google_id, notes in notes_to_patch
+        ])
 
 def google_delete_task(task_id):
     if not task_id:
         return False
+    return google_delete_tasks([task_id])[task_id]
+
+def google_delete_tasks(task_ids):
+    """
+    複数のGoogleタスクを削除し、IDごとに消えたかどうかを返す。
+    すでにGoogle側にないタスク（404・410）も消えたものとして扱う。
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    if not task_ids:
+        return {}
 
     service = get_google_service()
     tasklist_id = get_google_tasklist_id(service)
     if not service or not tasklist_id:
-        return False
+        return {task_id: False for task_id in task_ids}
+
+    requests = [
+        (
+            task_id,
+            service.tasks().delete(
+                tasklist=tasklist_id,
+                task=task_id
+            )
+        )
+        for task_id in task_ids
+    ]
+    results = google_execute_requests(service, requests, 'Googleタスクの削除')
+    return {
+        task_id: ok or status in (404, 410)
+        for task_id, (ok, status) in (
+            (task_id, results.get(task_id, (False, None))) for task_id in task_ids
+        )
+    }
 
-    try:
-        service.tasks().delete(
-            tasklist=tasklist_id,
-            task=task_id
-        ).execute()
-        return True
-    except Exception:
-        app.logger.exception('Googleタスクの削除に失敗した: %s', task_id)
-        return False
 # ---------- HTML（グラフは最下部に配置） ----------
 INDEX_HTML = r"""
 <!doctype html>
 <meta charset="utf-8">
 <meta name="viewport" content="width=device-width, initial-scale=1">
 <title>TODO</title>
-<style>
-:root {
-  color-scheme: light;
-  --bg: #f4f6fb;
-  --surface: #ffffff;
-  --surface-soft: #f8fafc;
-  --text: #172033;
-  --muted: #667085;
-  --line: #e4e7ec;
-  --primary: #405cf5;
-  --primary-dark: #2f46d3;
-  --danger: #c93636;
-  --danger-soft: #fff1f1;
-  --shadow: 0 10px 28px rgba(23, 32, 51, .07);
-}
-* { box-sizing: border-box; }
-body {
-  font-family: system-ui, -apple-system, "Segoe UI", Roboto, "Noto Sans JP", "Hiragino Kaku Gothic ProN", Meiryo, sans-serif;
-  margin: 0;
-  padding: 28px;
-  color: var(--text);
-  background: var(--bg);
-}
-.page-shell { width: min(1440px, 100%); margin: 0 auto; }
-section { margin-bottom: 20px; }
-h1 { margin: 2px 0 6px; font-size: clamp(1.65rem, 2.8vw, 2.35rem); letter-spacing: -.035em; }
-h2 { margin: 0; font-size: 1.08rem; }
-h3 { margin: 0 0 12px; font-size: .98rem; }
-small, .muted { color: var(--muted); }
-a { color: var(--primary-dark); }
-.topbar {
-  display: flex;
-  justify-content: space-between;
-  gap: 20px;
-  align-items: flex-start;
-  margin-bottom: 18px;
-}
-.eyebrow {
-  margin: 0;
-  color: var(--primary);
-  font-size: .72rem;
-  font-weight: 800;
-  letter-spacing: .15em;
-}
-.subtitle { margin: 0; color: var(--muted); }
-.nav-actions { display: flex; gap: 8px; flex-wrap: wrap; }
-.nav-link {
-  display: inline-flex;
-  align-items: center;
-  min-height: 38px;
-  padding: 8px 12px;
-  border: 1px solid var(--line);
-  border-radius: 10px;
-  color: var(--text);
-  background: var(--surface);
-  text-decoration: none;
-  font-size: .9rem;
-  font-weight: 650;
-}
-.nav-link:hover { border-color: #c8cfdb; background: var(--surface-soft); }
-.summary-grid {
-  display: grid;
-  grid-template-columns: repeat(4, minmax(0, 1fr));
-  gap: 12px;
-  margin-bottom: 20px;
-}
-.summary-card {
-  padding: 14px 16px;
-  border: 1px solid var(--line);
-  border-radius: 14px;
-  background: var(--surface);
-  box-shadow: 0 5px 16px rgba(23, 32, 51, .04);
-}
-.summary-label { display: block; color: var(--muted); font-size: .8rem; }
-.summary-value { display: block; margin-top: 2px; font-size: 1.5rem; line-height: 1.1; }
-.summary-card.is-alert .summary-value { color: var(--danger); }
-.section-head {
-  display: flex;
-  align-items: center;
-  justify-content: space-between;
-  gap: 12px;
-  flex-wrap: wrap;
-  margin-bottom: 14px;
-}
-.section-head p { margin: 0; color: var(--muted); font-size: .86rem; }
-input, select, button { font: inherit; }
-input[type=text], input[type=search], input[type=date], select {
-  min-height: 40px;
-  padding: 8px 10px;
-  border: 1px solid #cfd5df;
-  border-radius: 9px;
-  color: var(--text);
-  background: var(--surface);
-}
-input:focus, select:focus, button:focus-visible, a:focus-visible {
-  outline: 3px solid rgba(64, 92, 245, .18);
-  outline-offset: 1px;
-  border-color: var(--primary);
-}
-button, input[type=submit] {
-  min-height: 38px;
-  padding: 7px 12px;
-  border: 1px solid #cfd5df;
-  border-radius: 9px;
-  color: var(--text);
-  background: var(--surface);
-  cursor: pointer;
-  font-weight: 650;
-}
-button:hover, input[type=submit]:hover { background: var(--surface-soft); }
-.btn-primary {
-  border-color: var(--primary);
-  color: #fff;
-  background: var(--primary);
-}
-.btn-primary:hover { background: var(--primary-dark); }
-.task-add-submit,
-.task-add-submit:hover {
-  border-color: #000 !important;
-  color: #fff !important;
-  background: #000 !important;
-  font-weight: 850;
-}
-.btn-danger {
-  min-width: 38px;
-  padding: 6px 9px;
-  border-color: #f2c5c5;
-  color: var(--danger);
-  background: var(--danger-soft);
-}
-.btn-complete {
-  min-width: 38px;
-  padding: 6px 9px;
-  border-color: #b8dec7;
-  color: #147a3d;
-  background: #eefaf2;
-}
-ul.tree, ul.tree ul {
-  list-style: none;
-  margin: 0;
-  padding-left: 16px;
-  border-left: 1px solid #d9deea;
-}
-ul.tree { padding-left: 0; border-left: 0; }
-li.task { margin: 4px 0; }
-li.task[hidden] { display: none; }
-li.task-date-gap {
-  height: 12px;
-}
-.task-row{
-  position: relative;
-  display: flex;
-  align-items: center;
-  gap: 7px;
-  min-height: 48px;
-  padding: 6px 8px;
-  border: 1px solid transparent;
-  border-radius: 10px;
-  cursor: pointer;
-}
-
-.task-row:active { cursor: pointer; }
-.task-row:hover {
-  border-color: var(--line);
-  background: var(--surface-soft);
-}
-.task-title{
-  flex: 1 1 260px;
-  min-width: 0;
-  overflow: hidden;
-  text-overflow: ellipsis;
-  white-space: nowrap;
-  color: inherit;
-  text-decoration: none;
-}
-.task-title:hover { color: var(--primary-dark); text-decoration: underline; }
-.drag-handle {
-  flex: 0 0 auto;
-  display: inline-flex;
-  gap: 3px;
-  place-items: center;
-  align-items: center;
-  justify-content: center;
-  min-width: 54px;
-  min-height: 38px;
-  padding: 0 7px;
-  border: 1px solid #172033;
-  border-radius: 8px;
-  color: #fff;
-  background: #172033;
-  cursor: grab;
-  user-select: none;
-  font-size: .78rem;
-  font-weight: 850;
-  line-height: 1;
-  white-space: nowrap;
-  touch-action: none;
-}
-.drag-handle:hover { color: #fff; background: #2f3a50; }
-.drag-handle:active { cursor: grabbing; }
-.order-drag-handle {
-  margin-left: auto;
-  color: #172033;
-  border-color: #7a8497;
-  background: #fff;
-}
-.order-drag-handle:hover { color: #172033; background: #eef1f6; }
-li.task.dragging > .task-row { opacity: .35; border-style: dashed; }
-.task-order-gap {
-  position: relative;
-  height: 0;
-  margin: 0;
-  padding: 0;
-  overflow: visible;
-}
-#task-tree.is-order-dragging > .task-order-gap::before {
-  content: "";
-  position: absolute;
-  z-index: 3;
-  top: -4px;
-  right: 0;
-  left: 0;
-  height: 8px;
-  background: transparent;
-  pointer-events: auto;
-}
-.task-order-gap::after {
-  content: "";
-  position: absolute;
-  inset: 50% 0 auto;
-  height: 1px;
-  background: transparent;
-  transform: translateY(-50%);
-}
-.task-order-gap.is-order-target::after {
-  height: 3px;
-  background: var(--primary);
-}
-li.task.drop-as-parent > .task-row {
-  border-color: var(--primary);
-  background: #eef1ff;
-  box-shadow: inset 0 0 0 1px var(--primary);
-}
-li.task.drop-as-parent > .task-row::after {
-  content: attr(data-drop-label);
-  position: absolute;
-  left: 50%;
-  top: 50%;
-  z-index: 2;
-  padding: 2px 7px;
-  color: #fff;
-  background: #172033;
-  font-size: .78rem;
-  font-weight: 850;
-  white-space: nowrap;
-  pointer-events: none;
-  transform: translate(-50%, -50%);
-}
-.detach-parent-drop {
-  display: none;
-  position: fixed;
-  left: 50%;
-  bottom: 16px;
-  z-index: 20;
-  min-width: 260px;
-  padding: 7px 14px;
-  border: 2px dashed var(--danger);
-  color: var(--danger);
-  background: #fff;
-  font-weight: 850;
-  text-align: center;
-  transform: translateX(-50%);
-}
-.detach-parent-drop.is-visible { display: block; }
-.detach-parent-drop.is-active {
-  color: #fff;
-  background: var(--danger);
-}
-.task-row .badge{
-  flex: 0 0 auto;
-  white-space: nowrap;
-}
-a.btn-edit{
-  flex: 0 0 auto;
-  display: inline-grid;
-  place-items: center;
-  min-width: 38px;
-  min-height: 38px;
-  padding: 5px;
-  border: 1px solid #cfd5df;
-  border-radius: 9px;
-  text-decoration: none;
-  color: var(--text);
-  background: var(--surface);
-}
-a.btn-edit:hover{ background: var(--surface-soft); }
-
-.badge {
-  display: inline-block;
-  padding: 3px 7px;
-  border-radius: 999px;
-  font-size: .85em;
-  border: 1px solid var(--line);
-  background: var(--surface-soft);
-  color: var(--text);
-}
-.badge-tag {
-  background: #f0f2f7;
-  border-color: #e0e4ec;
-  color: #566074;
-}
-.badge-overdue {
-  background: var(--danger-soft);
-  color: var(--danger);
-  border-color: #f2c5c5;
-}
-.badge-score-low  { background:#e0f3ff; border-color:#b3e0ff; }   /* 〜49 */
-.badge-score-mid  { background:#fff4c4; border-color:#ffe08a; }   /* 50〜79 */
-.badge-score-high { background:#ffd7d7; border-color:#ffb3b3; }   /* 80〜99 */
-.badge-score-max {
-  background: linear-gradient(135deg, #ffd700, #ffea8a);
-  color: #503000;
-  font-weight: bold;
-  border: 1px solid #c9a200;
-}
-.badge-score-bonus {
-  background: linear-gradient(135deg, #ebe2ff, #d9f4ff);
-  color: #4a278f;
-  font-weight: bold;
-  border-color: #bca9ed;
-}
-.badge-link-bonus {
-  background: #f3edff;
-  color: #6336a8;
-  border-color: #d5c3f4;
-}
-.row { display: flex; gap: 20px; flex-wrap: wrap; }
-.card {
-  border: 1px solid var(--line);
-  border-radius: 16px;
-  padding: 18px;
-  background: var(--surface);
-  box-shadow: var(--shadow);
-}
-.table-wrap { max-width: 100%; overflow-x: auto; }
-table { width: 100%; border-collapse: collapse; }
-td, th { padding: 9px 8px; border-bottom: 1px solid #edf0f4; text-align: left; }
-th { color: var(--muted); font-size: .8rem; font-weight: 700; }
-.form-inline { display: flex; align-items: center; gap: 8px; flex-wrap: wrap; }
-.field-grid {
-  display: grid;
-  grid-template-columns: minmax(0, 1fr) minmax(150px, .55fr);
-  gap: 12px;
-}
-.field { display: grid; gap: 6px; }
-.field > label { color: #475467; font-size: .82rem; font-weight: 700; }
-.field-wide { grid-column: 1 / -1; }
-.score-choices { display: flex; gap: 6px; flex-wrap: wrap; }
-.score-choices label {
-  display: inline-flex;
-  align-items: center;
-  gap: 4px;
-  padding: 5px 8px;
-  border: 1px solid var(--line);
-  border-radius: 8px;
-  background: var(--surface-soft);
-  cursor: pointer;
-  font-size: .86rem;
-}
-.quick-score-buttons { display: flex; gap: 0; flex-wrap: wrap; }
-.quick-score-button {
-  min-width: 48px;
-  color: var(--text);
-  background: var(--surface);
-}
-.quick-score-button[aria-pressed="true"] {
-  color: #fff;
-  background: #172033;
-  border-color: #172033;
-  font-weight: 850;
-}
-.advanced-options {
-  margin-top: 12px;
-  padding: 10px 12px;
-  border: 1px solid var(--line);
-  border-radius: 10px;
-  background: var(--surface-soft);
-}
-.advanced-options summary { cursor: pointer; color: #475467; font-size: .86rem; font-weight: 700; }
-.advanced-grid {
-  display: grid;
-  grid-template-columns: 1fr 1fr;
-  gap: 10px;
-  margin-top: 10px;
-}
-.form-actions { display: flex; align-items: center; gap: 10px; margin-top: 14px; flex-wrap: wrap; }
-.form-note { color: var(--muted); font-size: .78rem; }
-.filters {
-  display: grid;
-  grid-template-columns: minmax(220px, 1fr) minmax(140px, .42fr) minmax(140px, .42fr) auto;
-  gap: 8px;
-  margin-bottom: 12px;
-}
-.filters input, .filters select { width: 100%; }
-.empty-state {
-  margin: 12px 0 0;
-  padding: 18px;
-  border: 1px dashed #cfd5df;
-  border-radius: 10px;
-  color: var(--muted);
-  text-align: center;
-  background: var(--surface-soft);
-}
-.visually-hidden {
-  position: absolute;
-  width: 1px;
-  height: 1px;
-  padding: 0;
-  margin: -1px;
-  overflow: hidden;
-  clip: rect(0, 0, 0, 0);
-  white-space: nowrap;
-  border: 0;
-}
-.overdue-list { display: grid; gap: 2px; }
-.overdue-item {
-  display: grid;
-  grid-template-columns: minmax(200px, 1fr) auto auto auto auto;
-  gap: 6px;
-  align-items: center;
-  padding: 3px 6px;
-  border-radius: 6px;
-  background: #fffafa;
-}
-.overdue-item input {
-  min-height: 34px;
-  padding: 4px 8px;
-}
-
-.task-register-layout {
-  display: flex;
-  gap: 16px;
-  align-items: flex-start;
-  margin-bottom: 16px;
-}
-
-.task-register-layout > section {
-  margin-bottom: 0;
-}
-
-.task-register-card {
-  flex: 0 0 480px;
-}
-
-.task-chart-card {
-  flex: 1 1 720px;
-  min-height: 0;
-  padding: 4px 8px;
-  display: flex;
-  align-items: flex-start;
-  justify-content: center;
-}
-
-.task-chart-card img {
-  width: 100%;
-  max-width: 980px;
-  height: auto;
-  display: block;
-}
-
-@media (max-width: 980px) {
-  body { padding: 18px; }
-  .summary-grid { grid-template-columns: repeat(2, minmax(0, 1fr)); }
-  .task-register-layout {
-    flex-direction: column;
-  }
-  .task-register-card {
-    flex: auto;
-    width: 100%;
-  }
-  .task-chart-card {
-    width: 100%;
-  }
-  .filters { grid-template-columns: 1fr 1fr; }
-}
-@media (max-width: 640px) {
-  body { padding: 12px; }
-  .topbar { flex-direction: column; }
-  .summary-grid { gap: 8px; }
-  .summary-card { padding: 12px; }
-  .field-grid, .advanced-grid, .filters { grid-template-columns: 1fr; }
-  .card { padding: 14px; border-radius: 13px; }
-  .section-head { display: block; }
-  .section-head p { margin-top: 6px; overflow-wrap: anywhere; }
-  .task-row { flex-wrap: wrap; }
-  .task-title { flex-basis: calc(100% - 100px); }
-  .task-row .badge { font-size: .76rem; }
-  .overdue-item { grid-template-columns: 1fr; }
-  .overdue-item strong { grid-column: auto; }
-  .overdue-item input, .overdue-item button { width: 100%; }
-  .overdue-item .badge { justify-self: start; }
-}
-
-/* 余白ゼロ基準の高密度表示 */
-body { padding: clamp(12px, 1.5vw, 24px); }
-.page-shell { width: 100%; margin: 0; }
-section, h1, h2, h3, p { margin: 0; }
-h1, h2, h3, p, span, strong, a, label { line-height: 1.15; }
-.summary-grid {
-  grid-template-columns: repeat(4, minmax(0, 1fr));
-  gap: 0;
-  margin: 0;
-}
-.summary-card {
-  display: flex;
-  align-items: baseline;
-  gap: 0;
-  padding: 3px 10px;
-  border-radius: 0;
-  box-shadow: none;
-}
-.summary-label { display: inline; font-size: .72rem; }
-.summary-value { display: inline; margin: 0; font-size: 1.05rem; line-height: 1; }
-.section-head { gap: 0; margin: 0; }
-.section-head p { margin: 0; }
-.nav-actions, .row, .form-inline, .score-choices, .form-actions { gap: 0; }
-.nav-link {
-  min-height: 26px;
-  padding: 3px 10px;
-  border-radius: 0;
-}
-.card {
-  padding: 3px 10px;
-  border-radius: 0;
-  box-shadow: none;
-}
-input[type=text], input[type=search], input[type=date], select,
-button, input[type=submit] {
-  min-height: 26px;
-  padding: 3px 10px;
-  border-radius: 0;
-}
-.btn-danger, .btn-complete {
-  min-width: 26px;
-  padding: 3px 6px;
-}
-ul.tree, ul.tree ul {
-  margin: 0;
-  padding-left: 40px;
-}
-ul.tree { padding-left: 0; }
-li.task { margin: 0; }
-li.task-date-gap { height: 0; }
-.task-row {
-  gap: 0;
-  min-height: 26px;
-  padding: 3px 10px;
-  border-radius: 0;
-}
-.drag-handle {
-  width: auto;
-  min-width: 48px;
-  min-height: 26px;
-  padding: 0 5px;
-  border-radius: 0;
-  font-size: .72rem;
-}
-a.btn-edit {
-  min-width: 26px;
-  min-height: 26px;
-  padding: 3px 6px;
-  border-radius: 0;
-}
-.badge {
-  padding: 1px 4px;
-  border-radius: 0;
-  line-height: 1.15;
-}
-.row { gap: 0; }
-td, th { padding: 3px 10px; }
-.field-grid, .advanced-grid { gap: 0; }
-.field { gap: 0; }
-.score-choices label { gap: 0; padding: 3px 10px; border-radius: 0; }
-.advanced-options {
-  margin: 0;
-  padding: 3px 10px;
-  border-radius: 0;
-}
-.advanced-grid, .form-actions { margin: 0; }
-.empty-state {
-  margin: 0;
-  padding: 3px 10px;
-  border-radius: 0;
-}
-.overdue-list { gap: 0; }
-.overdue-item {
-  gap: 0;
-  padding: 3px 10px;
-  border-radius: 0;
-}
-.overdue-item input { min-height: 26px; padding: 3px 10px; }
-.task-register-layout { gap: 0; margin: 0; }
-.task-register-layout > section { margin: 0; }
-.task-chart-card { padding: 3px 10px; }
-.summary-card, .nav-link, .card,
-input[type=text], input[type=search], input[type=date], select,
-button, input[type=submit], .task-row, a.btn-edit,
-td, th, .score-choices label, .advanced-options,
-.empty-state, .overdue-item, .task-chart-card {
-  padding-block: 3px;
-}
-.score-total-14d {
-  color: #fff;
-  background: #172033;
-  font-size: 1.35rem;
-  font-weight: 900;
-  line-height: 1;
-}
-</style>
+<link rel="stylesheet" href="{{ asset_url('index.css') }}">
 
 <body>
 <main class="page-shell">
 <section class="summary-grid" aria-label="タスク概要">
   <div class="summary-card">
     <span class="summary-label">未完了</span>
-    <strong class="summary-value">{{ task_summary.open }}</strong>
+    <strong class="summary-value" data-summary="open">{{ task_summary.open }}</strong>
   </div>
   <div class="summary-card">
     <span class="summary-label">今日が期限</span>
-    <strong class="summary-value">{{ task_summary.today }}</strong>
+    <strong class="summary-value" data-summary="today">{{ task_summary.today }}</strong>
   </div>
-  <div class="summary-card {% if task_summary.overdue %}is-alert{% endif %}">
+  <div class="summary-card {% if task_summary.overdue %}is-alert{% endif %}" id="overdue-summary">
     <span class="summary-label">期限超過</span>
-    <strong class="summary-value">{{ task_summary.overdue }}</strong>
+    <strong class="summary-value" data-summary="overdue">{{ task_summary.overdue }}</strong>
   </div>
   <div class="summary-card">
     <span class="summary-label">過去14日スコア</span>
-    <strong class="summary-value">{{ total_14d }}</strong>
+    <strong class="summary-value" data-summary="total_14d">{{ total_14d }}</strong>
   </div>
 </section>
 
-{% if overdue %}
-<section class="card">
-  <div class="section-head">
-    <h2>期限超過</h2>
-    <p>延長するたび +30、+60、+90…と加点が増えます</p>
-  </div>
-  <div class="overdue-list">
-  {% for t in overdue %}
-  <form class="overdue-item" method="post" action="{{ url_for('reschedule', task_id=t['id']) }}">
-    <strong>{{ t['title'] }}</strong>
-    <span class="badge badge-overdue">期限: {{ t['due_date'] }}</span>
-    <span class="badge">次の延長: +{{ 30 * (t['extension_count'] + 1) }}点</span>
-    <label class="visually-hidden" for="overdue-due-{{ t['id'] }}">新しい期日</label>
-    <input id="overdue-due-{{ t['id'] }}" type="date" name="new_due_date" value="{{ today }}">
-    <input class="btn-primary" type="submit" value="再設定">
-  </form>
-  {% endfor %}
-  </div>
-</section>
-{% endif %}
+<div class="fragment-slot" id="overdue-fragment">{{ fragments.overdue }}</div>
 
 <div class="task-register-layout">
 
@@ -2188,9 +2257,7 @@ td, th, .score-choices label, .advanced-options,
             <label for="new-parent">親タスク</label>
             <select id="new-parent" name="parent_id">
               <option value="">なし</option>
-              {% for p in selectable_parents %}
-                <option value="{{ p['id'] }}">{{ p['title'] }}</option>
-              {% endfor %}
+              {{ fragments.parent_options }}
             </select>
           </div>
         </div>
@@ -2204,10 +2271,15 @@ td, th, .score-choices label, .advanced-options,
   </section>
 
     <section class="card task-chart-card">
+      {% if chart_mode == 'svg' %}
+      <div class="chart-svg" role="img" aria-label="今日の進捗"
+           data-chart="today" data-src="{{ url_for('api_chart_today') }}?v={{ chart_version }}"></div>
+      {% else %}
       <img
         alt="today progress chart"
-        src="{{ url_for('chart_today_progress_png') }}?v={{ chart_version }}"
+        src="{{ url_for('chart_today_progress_png') }}?v={{ chart_version }}" data-chart-image
       >
+      {% endif %}
     </section>
 
 </div>
@@ -2215,7 +2287,7 @@ td, th, .score-choices label, .advanced-options,
 <section class="card">
   <div class="section-head">
     <h2>未完了タスク</h2>
-    <p>{{ task_summary.open }}件</p>
+    <p><span data-summary="open">{{ task_summary.open }}</span>件</p>
   </div>
   <p id="reorder-status" class="visually-hidden" aria-live="polite"></p>
   <div id="detach-parent-drop" class="detach-parent-drop" aria-hidden="true">
@@ -2224,27 +2296,108 @@ td, th, .score-choices label, .advanced-options,
   <div class="row">
     <!-- 左：ツリー -->
     <div style="flex:2; min-width: 260px;">
-      <ul class="tree" id="task-tree" data-parent-id="">
-        {% macro render_children(pid) %}
-          {% for t in children_by_parent.get(pid, []) %}
-          {% if pid == '' %}
-          <li
-            class="task-order-gap"
-            data-before-task-id="{{ t['id'] }}"
-            data-before-due-date="{{ t['due_date'] }}"
-            {% if not loop.first %}
-            data-after-task-id="{{ loop.previtem['id'] }}"
-            data-after-due-date="{{ loop.previtem['due_date'] }}"
-            {% endif %}
-            aria-hidden="true"
-          ></li>
-          {% endif %}
+      <ul class="tree" id="task-tree" data-parent-id="" data-reorder-url="{{ url_for('reorder_tasks') }}">
+        {{ fragments.tree }}
+      </ul>
+      <p class="empty-state" id="task-tree-empty" {% if task_summary.open %}hidden{% endif %}>未完了タスクはありません。気持ちよく空っぽです。</p>
+    </div>
+
+    <!-- 右：1週間カレンダー -->
+    <div style="flex:1; min-width: 220px;">
+      <h3>これから7日間</h3>
+      <div class="table-wrap">
+      <table>
+        <thead>
+          <tr>
+            <th>日付</th>
+            <th>タスク</th>
+          </tr>
+        </thead>
+        <tbody id="calendar-fragment">
+          {{ fragments.calendar }}
+        </tbody>
+      </table>
+      </div>
+    </div>
+  </div>
+</section>
+
+
+<section class="card">
+  <div class="section-head">
+    <h2>過去14日のスコア推移</h2>
+    <p class="score-total-14d">合計 <strong data-summary="total_14d">{{ total_14d }}</strong> 点</p>
+  </div>
+  {% if chart_mode == 'svg' %}
+  <div class="chart-svg" role="img" aria-label="過去14日のスコア推移"
+       data-chart="last14" data-src="{{ url_for('api_chart_last_14') }}?v={{ chart_version }}"></div>
+  {% else %}
+  <div><img style="max-width:100%; height:auto;" loading="lazy" alt="過去14日のスコア推移" src="{{ url_for('chart_last_14_png') }}?v={{ chart_version }}" data-chart-image></div>
+  {% endif %}
+</section>
+
+
+{% if google_sync_available %}
+<section class="card">
+  <form method="post" action="{{ url_for('refresh_google') }}">
+    <button type="submit">Googleから更新</button>
+  </form>
+</section>
+{% endif %}
+
+<section class="card">
+  <div class="section-head">
+    <h2>最近完了</h2>
+    <p>直近20件</p>
+  </div>
+  <div class="fragment-slot" id="recent-done-fragment">{{ fragments.recent_done }}</div>
+</section>
+
+<script src="{{ asset_url('index.js') }}"></script>
+{% if chart_mode == 'svg' %}
+<script src="{{ asset_url('charts.js') }}"></script>
+{% endif %}
+</main>
+</body>
+"""
+
+# 索引ページのうち、データが変わったときだけ描き直す部分（index_fragment）
+INDEX_OVERDUE_HTML = r"""
+{% if overdue %}
+<section class="card">
+  <div class="section-head">
+    <h2>期限超過</h2>
+    <p>延長するたび +30、+60、+90…と加点が増えます</p>
+  </div>
+  <div class="overdue-list">
+  {% for t in overdue %}
+  <form class="overdue-item" method="post" action="{{ url_for('reschedule', task_id=t['id']) }}" data-patch>
+    <strong>{{ t['title'] }}</strong>
+    <span class="badge badge-overdue">期限: {{ t['due_date'] }}</span>
+    <span class="badge">次の延長: +{{ 30 * (t['extension_count'] + 1) }}点</span>
+    <label class="visually-hidden" for="overdue-due-{{ t['id'] }}">新しい期日</label>
+    <input id="overdue-due-{{ t['id'] }}" type="date" name="new_due_date" value="{{ today }}">
+    <input class="btn-primary" type="submit" value="再設定">
+  </form>
+  {% endfor %}
+  </div>
+</section>
+{% endif %}
+"""
+INDEX_PARENT_OPTIONS_HTML = r"""
+              {% for p in selectable_parents %}
+                <option value="{{ p['id'] }}" data-due-date="{{ p['due_date'] }}">{{ p['title'] }}</option>
+              {% endfor %}
+"""
+INDEX_TASK_MACROS_HTML = r"""
+        {% macro render_task(t, pid) %}
          <li
            class="task"
            data-task-id="{{ t['id'] }}"
            data-parent-id="{{ t['parent_id'] }}"
            data-parent-url="{{ url_for('set_task_parent', task_id=t['id']) }}"
            data-detail-url="{{ url_for('task_detail', task_id=t['id']) }}"
+            data-sort-order="{{ t['sort_order'] }}"
             data-title="{{ t['title'] }}"
             data-tag="{{ t['tag'] }}"
             data-due-date="{{ t['due_date'] }}"
@@ -2253,12 +2406,12 @@ td, th, .score-choices label, .advanced-options,
            <div class="task-row">
              <span class="drag-handle parent-drag-handle" draggable="true" title="ドラッグして別タスクの子にする" aria-label="{{ t['title'] }}をドラッグして別タスクの子にする">↳ 親子</span>
 
-            <form style="display:inline;" method="post" action="{{ url_for('complete', task_id=t['id']) }}">
+            <form style="display:inline;" method="post" action="{{ url_for('complete', task_id=t['id']) }}" data-patch>
               <button class="btn-complete" title="完了" aria-label="{{ t['title'] }}を完了">✔</button>
             </form>
         
             <form style="display:inline;" method="post"
-                  action="{{ url_for('delete', task_id=t['id']) }}"
+                  action="{{ url_for('delete', task_id=t['id']) }}" data-patch
                   onsubmit="return confirm('このタスクと子タスクを削除します。よろしいですか？');">
               <button class="btn-danger" title="削除" aria-label="{{ t['title'] }}を削除">✖</button>
             </form>
@@ -2275,23 +2428,17 @@ td, th, .score-choices label, .advanced-options,
                 else ('badge-score-mid' if shown_score >= 50
                 else 'badge-score-low')))
             %}
-            <span class="badge {{ score_class }}">点: {{ shown_score }}</span>
+            <span class="badge {{ score_class }}" data-field="score">点: {{ shown_score }}</span>
 
-            {% if t['completed_children_score'] %}
-              <span class="badge badge-link-bonus">完了した子 +{{ t['completed_children_score'] }}</span>
-            {% endif %}
+            <span class="badge badge-link-bonus" data-field="children-score" {% if not t['completed_children_score'] %}hidden{% endif %}>完了した子 +{{ t['completed_children_score'] }}</span>
 
             {% if t['extension_count'] %}
               <span class="badge">延長: {{ t['extension_count'] }}回</span>
             {% endif %}
 
-            {% if t['link_count'] %}
-              <span class="badge">紐付け: {{ t['link_count'] }}本</span>
-            {% endif %}
+            <span class="badge" data-field="link-count" {% if not t['link_count'] %}hidden{% endif %}>紐付け: {{ t['link_count'] }}本</span>
 
-            {% if t['link_bonus_awarded'] %}
-              <span class="badge badge-link-bonus">4紐付け +1000</span>
-            {% endif %}
+            <span class="badge badge-link-bonus" data-field="link-bonus" {% if not t['link_bonus_awarded'] %}hidden{% endif %}>4紐付け +1000</span>
         
             <span class="badge {% if t['is_overdue'] %}badge-overdue{% endif %}">
               期日: {{ t['due_date'] }}
@@ -2310,6 +2457,22 @@ td, th, .score-choices label, .advanced-options,
             {{ render_children(t['id_str']) }}
           </ul>
         </li>
+        {% endmacro %}
+        {% macro render_children(pid) %}
+          {% for t in children_by_parent.get(pid, []) %}
+          {% if pid == '' %}
+          <li
+            class="task-order-gap"
+            data-before-task-id="{{ t['id'] }}"
+            data-before-due-date="{{ t['due_date'] }}"
+            {% if not loop.first %}
+            data-after-task-id="{{ loop.previtem['id'] }}"
+            data-after-due-date="{{ loop.previtem['due_date'] }}"
+            {% endif %}
+            aria-hidden="true"
+          ></li>
+          {% endif %}
+          {{ render_task(t, pid) }}
           {% if pid == '' and loop.last %}
           <li
             class="task-order-gap"
@@ -2320,25 +2483,17 @@ td, th, .score-choices label, .advanced-options,
           {% endif %}
           {% endfor %}
         {% endmacro %}
-        {{ render_children('') }}
-      </ul>
-      {% if not task_summary.open %}
-        <p class="empty-state">未完了タスクはありません。気持ちよく空っぽです。</p>
-      {% endif %}
-    </div>
-
-    <!-- 右：1週間カレンダー -->
-    <div style="flex:1; min-width: 220px;">
-      <h3>これから7日間</h3>
-      <div class="table-wrap">
-      <table>
-        <thead>
-          <tr>
-            <th>日付</th>
-            <th>タスク</th>
-          </tr>
-        </thead>
-        <tbody>
+"""
+INDEX_TREE_HTML = r"""
+        {% import 'index_task_macros.html' as macros with context %}
+        {{ macros.render_children('') }}
+"""
+# 部分更新のJSONで返す、ツリーの1行（子孫を含む）
+INDEX_TASK_ROW_HTML = r"""
+{% import 'index_task_macros.html' as macros with context %}
+{{ macros.render_task(t, pid) }}
+"""
+INDEX_CALENDAR_HTML = r"""
           {% for d in week_calendar %}
           <tr>
             <td>{{ d.date.strftime('%m/%d') }}（{{ d.weekday }}）</td>
@@ -2354,37 +2509,9 @@ td, th, .score-choices label, .advanced-options,
               {% endif %}
             </td>
           </tr>
-          {% endfor %}
-        </tbody>
-      </table>
-      </div>
-    </div>
-  </div>
-</section>
-
-
-<section class="card">
-  <div class="section-head">
-    <h2>過去14日のスコア推移</h2>
-    <p class="score-total-14d">合計 <strong>{{ total_14d }}</strong> 点</p>
-  </div>
-  <div><img style="max-width:100%; height:auto;" loading="lazy" alt="過去14日のスコア推移" src="{{ url_for('chart_last_14_png') }}?v={{ chart_version }}"></div>
-</section>
-
-
-{% if google_sync_available %}
-<section class="card">
-  <form method="post" action="{{ url_for('refresh_google') }}">
-    <button type="submit">Googleから更新</button>
-  </form>
-</section>
-{% endif %}
-
-<section class="card">
-  <div class="section-head">
-    <h2>最近完了</h2>
-    <p>直近20件</p>
-  </div>
+          {% endfor %}
+"""
+INDEX_RECENT_DONE_HTML = r"""
   {% if recent_done %}
   <div class="table-wrap">
   <table>
@@ -2419,7 +2546,7 @@ td, th, .score-choices label, .advanced-options,
         </td>
 
         <td>
-          <form method="post" action="{{ url_for('undo', task_id=t['id']) }}">
+          <form method="post" action="{{ url_for('undo', task_id=t['id']) }}" data-patch>
             <button title="完了を元に戻す">戻す</button>
           </form>
         </td>
@@ -2431,456 +2558,13 @@ td, th, .score-choices label, .advanced-options,
   {% else %}
     <p class="empty-state">完了したタスクはまだありません。</p>
   {% endif %}
-</section>
-
-<script>
-(() => {
-  const addForm = document.getElementById('task-add-form');
-  const scoreValue = document.getElementById('quick-score-value');
-  const scoreButtons = Array.from(document.querySelectorAll('.quick-score-button'));
-
-  function selectQuickScore(button) {
-    if (!scoreValue) return;
-    scoreValue.value = button.dataset.score;
-    scoreButtons.forEach((item) => {
-      item.setAttribute('aria-pressed', item === button ? 'true' : 'false');
-    });
-  }
-
-  scoreButtons.forEach((button) => {
-    button.addEventListener('click', () => selectQuickScore(button));
-    button.addEventListener('keydown', (event) => {
-      if (event.key !== 'Enter' || !addForm) return;
-      event.preventDefault();
-      selectQuickScore(button);
-      addForm.requestSubmit();
-    });
-  });
-
-  const tree = document.getElementById('task-tree');
-  const reorderStatus = document.getElementById('reorder-status');
-  const detachParentDrop = document.getElementById('detach-parent-drop');
-  if (!tree) return;
-
-  let draggedTask = null;
-  let draggedList = null;
-  let dragIntent = null;
-  let dropMode = null;
-  let orderReference = null;
-  let parentTarget = null;
-  let suppressRowClickUntil = 0;
-  let pointerStart = null;
-  const dragClickThreshold = 4;
-  const dragClickSuppressMs = 350;
-
-  function clearDropMarkers() {
-    tree.querySelectorAll('.is-order-target').forEach((node) => {
-      node.classList.remove('is-order-target');
-    });
-    tree.querySelectorAll('.drop-as-parent').forEach((node) => {
-      node.classList.remove('drop-as-parent');
-      const row = node.querySelector(':scope > .task-row');
-      if (row) row.removeAttribute('data-drop-label');
-    });
-    detachParentDrop?.classList.remove('is-active');
-  }
-
-  function clearDropIntent() {
-    dropMode = null;
-    orderReference = null;
-    parentTarget = null;
-  }
-
-  async function persistOrder(list, dueDate) {
-    const orderedIds = Array.from(list.children)
-      .filter((node) => (
-        node.matches('li.task')
-        && node.dataset.dueDate === dueDate
-      ))
-      .map((node) => Number(node.dataset.taskId));
-    const response = await fetch('{{ url_for("reorder_tasks") }}', {
-      method: 'POST',
-      headers: {'Content-Type': 'application/json'},
-      body: JSON.stringify({
-        parent_id: '',
-        due_date: dueDate,
-        ordered_ids: orderedIds
-      })
-    });
-    if (!response.ok) throw new Error('並び順を保存できませんでした');
-  }
-
-  async function persistParent(task, parentId) {
-    const response = await fetch(task.dataset.parentUrl, {
-      method: 'POST',
-      headers: {'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8'},
-      body: new URLSearchParams({parent_id: parentId})
-    });
-    if (!response.ok) {
-      const message = (await response.text()).trim();
-      throw new Error(message || '親子関係を保存できませんでした');
-    }
-  }
-
-  function orderReferenceForGap(gap) {
-    const dueDate = draggedTask?.dataset.dueDate;
-    if (!dueDate || draggedList !== tree) return null;
-
-    if (
-      gap.dataset.beforeDueDate === dueDate
-      && gap.dataset.beforeTaskId
-    ) {
-      return {position: 'before', taskId: gap.dataset.beforeTaskId};
-    }
-    if (
-      gap.dataset.afterDueDate === dueDate
-      && gap.dataset.afterTaskId
-    ) {
-      return {position: 'after', taskId: gap.dataset.afterTaskId};
-    }
-    return null;
-  }
-
-  function moveTaskToOrderReference(task, reference) {
-    const referenceTask = Array.from(tree.children).find((node) => (
-      node.matches('li.task')
-      && node.dataset.taskId === reference.taskId
-    ));
-    if (!referenceTask) return false;
-
-    if (reference.position === 'before') {
-      tree.insertBefore(task, referenceTask);
-    } else {
-      tree.insertBefore(task, referenceTask.nextElementSibling);
-    }
-    return true;
-  }
-
-  function finishDrag() {
-    clearDropMarkers();
-    clearDropIntent();
-    tree.classList.remove('is-dragging', 'is-order-dragging');
-    detachParentDrop?.classList.remove('is-visible', 'is-active');
-    detachParentDrop?.setAttribute('aria-hidden', 'true');
-    if (draggedTask) draggedTask.classList.remove('dragging');
-    draggedTask = null;
-    draggedList = null;
-    dragIntent = null;
-  }
-
-  function finishPointerTracking() {
-    pointerStart = null;
-  }
-
-  tree.addEventListener('pointerdown', (event) => {
-    const row = event.target.closest('.task-row');
-    if (
-      !row
-      || event.button !== 0
-      || event.target.closest('button, input, select, form')
-    ) {
-      pointerStart = null;
-      return;
-    }
-    pointerStart = {
-      x: event.clientX,
-      y: event.clientY
-    };
-  });
-
-  window.addEventListener('pointermove', (event) => {
-    if (!pointerStart) return;
-    const moved = Math.hypot(
-      event.clientX - pointerStart.x,
-      event.clientY - pointerStart.y
-    );
-    if (moved >= dragClickThreshold) {
-      suppressRowClickUntil = performance.now() + dragClickSuppressMs;
-    }
-  });
-
-  window.addEventListener('pointerup', finishPointerTracking);
-  window.addEventListener('pointercancel', finishPointerTracking);
-
-  tree.addEventListener('dragstart', (event) => {
-    const parentHandle = event.target.closest('.parent-drag-handle');
-    const orderHandle = event.target.closest('.order-drag-handle');
-    const handle = parentHandle || orderHandle;
-    if (!handle) {
-      event.preventDefault();
-      return;
-    }
-    const row = handle.closest('.task-row');
-    if (!row) return;
-    draggedTask = row.closest('li.task');
-    draggedList = draggedTask.parentElement;
-    dragIntent = orderHandle ? 'order' : 'parent';
-    if (dragIntent === 'order' && draggedList !== tree) {
-      event.preventDefault();
-      finishDrag();
-      return;
-    }
-    draggedTask.classList.add('dragging');
-    tree.classList.add('is-dragging');
-    if (dragIntent === 'order') tree.classList.add('is-order-dragging');
-    if (dragIntent === 'parent' && draggedTask.dataset.parentId && detachParentDrop) {
-      detachParentDrop.classList.add('is-visible');
-      detachParentDrop.setAttribute('aria-hidden', 'false');
-    }
-    event.dataTransfer.effectAllowed = 'move';
-    event.dataTransfer.setData('text/plain', draggedTask.dataset.taskId);
-  });
-
-  tree.addEventListener('dragover', (event) => {
-    if (!draggedTask) return;
-
-    if (dragIntent === 'order') {
-      const gap = event.target.closest('.task-order-gap');
-      if (!gap) {
-        clearDropMarkers();
-        clearDropIntent();
-        return;
-      }
-      const reference = orderReferenceForGap(gap);
-      if (!reference) return;
-      event.preventDefault();
-      clearDropMarkers();
-      clearDropIntent();
-      dropMode = 'order';
-      orderReference = reference;
-      gap.classList.add('is-order-target');
-      event.dataTransfer.dropEffect = 'move';
-      return;
-    }
-
-    if (dragIntent !== 'parent') return;
-
-    const row = event.target.closest('.task-row');
-    const target = row?.closest('li.task');
-    if (
-      !row
-      || !target
-      || target === draggedTask
-      || draggedTask.contains(target)
-    ) {
-      clearDropMarkers();
-      clearDropIntent();
-      return;
-    }
-
-    event.preventDefault();
-    clearDropMarkers();
-    clearDropIntent();
-    dropMode = 'parent';
-    parentTarget = target;
-    target.classList.add('drop-as-parent');
-    row.dataset.dropLabel = `${target.dataset.title} の子にする`;
-    event.dataTransfer.dropEffect = 'move';
-  });
-
-  tree.addEventListener('drop', async (event) => {
-    if (!draggedTask) return;
-    const sourceTask = draggedTask;
-    const sourceList = draggedList;
-    const selectedMode = dropMode;
-    const selectedOrderReference = orderReference;
-    const selectedParentTarget = parentTarget;
-    event.preventDefault();
-    clearDropMarkers();
-    try {
-      if (selectedMode === 'order' && selectedOrderReference) {
-        if (!moveTaskToOrderReference(sourceTask, selectedOrderReference)) {
-          throw new Error('並び替え先を見つけられませんでした');
-        }
-        await persistOrder(sourceList, sourceTask.dataset.dueDate);
-        reorderStatus.textContent = '並び順を保存しました';
-      } else if (selectedMode === 'parent' && selectedParentTarget) {
-        await persistParent(sourceTask, selectedParentTarget.dataset.taskId);
-        reorderStatus.textContent = `${selectedParentTarget.dataset.title}の子にしました`;
-      } else {
-        return;
-      }
-      window.location.reload();
-    } catch (error) {
-      reorderStatus.textContent = error.message;
-      window.location.reload();
-    }
-  });
-
-  detachParentDrop?.addEventListener('dragover', (event) => {
-    if (dragIntent !== 'parent' || !draggedTask || !draggedTask.dataset.parentId) return;
-    event.preventDefault();
-    clearDropMarkers();
-    clearDropIntent();
-    dropMode = 'detach';
-    detachParentDrop.classList.add('is-active');
-    event.dataTransfer.dropEffect = 'move';
-  });
-
-  detachParentDrop?.addEventListener('drop', async (event) => {
-    if (dragIntent !== 'parent' || !draggedTask || !draggedTask.dataset.parentId) return;
-    const sourceTask = draggedTask;
-    event.preventDefault();
-    event.stopPropagation();
-    clearDropMarkers();
-    try {
-      await persistParent(sourceTask, '');
-      reorderStatus.textContent = '親から外しました';
-      window.location.reload();
-    } catch (error) {
-      reorderStatus.textContent = error.message;
-      window.location.reload();
-    }
-  });
-
-  tree.addEventListener('dragend', () => {
-    suppressRowClickUntil = performance.now() + dragClickSuppressMs;
-    finishDrag();
-  });
-
-  tree.addEventListener('click', (event) => {
-    if (performance.now() < suppressRowClickUntil) {
-      event.preventDefault();
-      event.stopPropagation();
-      suppressRowClickUntil = 0;
-      return;
-    }
-    const row = event.target.closest('.task-row');
-    if (!row || event.target.closest('a, button, input, select, form, .drag-handle')) return;
-    const task = row.closest('li.task');
-    if (task?.dataset.detailUrl) window.location.assign(task.dataset.detailUrl);
-  });
-})();
-</script>
-</main>
-</body>
 """
-
 TASK_DETAIL_HTML = r"""
 <!doctype html>
 <meta charset="utf-8">
 <meta name="viewport" content="width=device-width, initial-scale=1">
 <title>{{ task['title'] }} - TODO</title>
-<style>
-:root {
-  --bg:#f4f6fb; --surface:#fff; --surface-soft:#f8fafc; --text:#172033;
-  --muted:#667085; --line:#e4e7ec; --primary:#405cf5; --primary-dark:#2f46d3;
-  --success:#147a3d; --danger:#c93636;
-}
-* { box-sizing:border-box; }
-body {
-  margin:0; padding:28px;
-  font-family:system-ui,-apple-system,"Segoe UI",Roboto,"Noto Sans JP",Meiryo,sans-serif;
-  color:var(--text); background:var(--bg);
-}
-main { width:min(1040px,100%); margin:0 auto; }
-.topbar { display:flex; justify-content:space-between; gap:16px; align-items:flex-start; margin-bottom:18px; }
-h1 { margin:3px 0 6px; font-size:clamp(1.55rem,3vw,2.2rem); letter-spacing:-.03em; }
-h2 { margin:0; font-size:1.08rem; }
-.eyebrow { margin:0; color:var(--primary); font-size:.72rem; font-weight:800; letter-spacing:.14em; }
-.subtitle { margin:0; color:var(--muted); }
-.back-link {
-  display:inline-flex; min-height:42px; align-items:center; padding:8px 12px;
-  border:1px solid var(--line); border-radius:10px; color:var(--text); background:#fff; text-decoration:none; font-weight:700;
-}
-.card {
-  margin-bottom:18px; padding:20px; border:1px solid var(--line); border-radius:16px;
-  background:var(--surface); box-shadow:0 10px 28px rgba(23,32,51,.07);
-}
-.section-head { display:flex; justify-content:space-between; gap:12px; align-items:center; flex-wrap:wrap; margin-bottom:14px; }
-.section-head p { margin:0; color:var(--muted); font-size:.86rem; }
-.badge {
-  display:inline-block; padding:4px 8px; border:1px solid var(--line);
-  border-radius:999px; color:#566074; background:#f0f2f7; font-size:.82rem;
-}
-.badge-done { color:var(--success); border-color:#b8dec7; background:#eefaf2; }
-.badge-open { color:#9a6500; border-color:#f2d49b; background:#fff8e6; }
-.badge-bonus { color:#6336a8; border-color:#d5c3f4; background:#f3edff; }
-.meta-row { display:flex; gap:7px; flex-wrap:wrap; margin-top:14px; }
-.score-grid { display:grid; grid-template-columns:repeat(3,minmax(0,1fr)); gap:10px; margin-top:16px; }
-.score-box { padding:14px; border:1px solid var(--line); border-radius:12px; background:var(--surface-soft); }
-.score-box span { display:block; color:var(--muted); font-size:.78rem; }
-.score-box strong { display:block; margin-top:3px; font-size:1.5rem; }
-.score-box.total { color:#fff; border-color:var(--primary); background:linear-gradient(135deg,var(--primary),#7082ff); }
-.score-box.total span { color:#e9edff; }
-.field-grid { display:grid; grid-template-columns:minmax(0,1fr) 170px 170px; gap:10px; }
-.field { display:grid; gap:6px; }
-.field-wide { grid-column:1 / -1; }
-.actions { display:flex; align-items:center; gap:8px; }
-label { color:#475467; font-size:.82rem; font-weight:700; }
-input,select,button { min-height:41px; padding:8px 10px; border:1px solid #cfd5df; border-radius:9px; font:inherit; }
-input,select { width:100%; color:var(--text); background:#fff; }
-button { cursor:pointer; color:var(--text); background:#fff; font-weight:700; }
-.score-choices { display:flex; gap:7px; flex-wrap:wrap; }
-.score-choices label {
-  display:inline-flex; align-items:center; gap:4px; padding:6px 9px;
-  border:1px solid var(--line); border-radius:8px; background:var(--surface-soft); cursor:pointer;
-}
-.score-choices input { width:auto; min-height:auto; }
-.btn-primary { color:#fff; border-color:var(--primary); background:var(--primary); }
-.btn-primary:hover { background:var(--primary-dark); }
-.task-add-submit,
-.task-add-submit:hover {
-  color:#fff !important; border-color:#000 !important;
-  background:#000 !important; font-weight:850;
-}
-.btn-complete { color:var(--success); border-color:#b8dec7; background:#eefaf2; }
-.child-list { display:grid; gap:8px; }
-.child-row {
-  display:flex; align-items:center; gap:8px; min-height:52px; padding:8px 10px;
-  border:1px solid var(--line); border-radius:11px; background:var(--surface-soft);
-}
-.child-row.is-done { opacity:.72; }
-.child-row.is-done .child-title { text-decoration:line-through; }
-.tree-guide { flex:0 0 auto; color:#a0a7b4; white-space:pre; }
-.child-title { flex:1 1 240px; min-width:0; color:var(--text); font-weight:750; text-decoration:none; }
-.child-title:hover { color:var(--primary-dark); text-decoration:underline; }
-.child-actions { display:flex; gap:6px; margin-left:auto; }
-.child-actions form { margin:0; }
-.empty { padding:20px; border:1px dashed #cfd5df; border-radius:11px; color:var(--muted); text-align:center; background:var(--surface-soft); }
-.completed-time { color:var(--muted); font-size:.78rem; }
-@media(max-width:760px) {
-  body{padding:14px;} .topbar{flex-direction:column;} .score-grid{grid-template-columns:1fr;}
-  .field-grid{grid-template-columns:1fr;} .field-wide{grid-column:auto;}
-  .section-head{display:block;} .section-head p{margin-top:6px; overflow-wrap:anywhere;}
-  .child-row{flex-wrap:wrap;} .child-title{flex-basis:calc(100% - 60px);}
-  .child-actions{width:100%; justify-content:flex-end;}
-}
-body { padding:clamp(12px,1.5vw,24px); }
-main { width:100%; margin:0; }
-h1, h2, p { margin:0; line-height:1.15; }
-.topbar { gap:0; margin:0; }
-.back-link { min-height:26px; padding:3px 10px; border-radius:0; }
-.card { margin:0; padding:3px 10px; border-radius:0; box-shadow:none; }
-.section-head { gap:0; margin:0; }
-.badge { padding:1px 4px; border-radius:0; line-height:1.15; }
-.meta-row { gap:0; margin:0; }
-.score-grid { gap:0; margin:0; }
-.score-box { padding:3px 10px; border-radius:0; }
-.score-box strong { margin:0; font-size:1.1rem; }
-.field-grid { gap:0; }
-.field { gap:0; }
-input, select, button { min-height:26px; padding:3px 10px; border-radius:0; }
-.score-choices { gap:0; }
-.score-choices label { gap:0; padding:3px 10px; border-radius:0; }
-.parent-link-form { display:flex; align-items:center; gap:0; }
-.parent-link-form select { flex:1 1 auto; }
-.parent-link-form button { white-space:nowrap; }
-.child-list { gap:0; }
-.child-row {
-  gap:0;
-  min-height:26px;
-  margin-left:calc(var(--depth, 1) * 20px);
-  padding:3px 10px;
-  border-radius:0;
-}
-.child-actions { gap:0; }
-.empty { padding:3px 10px; border-radius:0; }
-.back-link, .card, .score-box, input, select, button,
-.score-choices label, .child-row, .empty {
-  padding-block:1px;
-}
-</style>
+<link rel="stylesheet" href="{{ asset_url('task_detail.css') }}">
 
 <body>
 <main>
@@ -3071,56 +2755,7 @@ TAGS_HTML = r"""
 <meta charset="utf-8">
 <meta name="viewport" content="width=device-width, initial-scale=1">
 <title>タグ管理</title>
-<style>
-:root {
-  --bg:#f4f6fb; --surface:#fff; --text:#172033; --muted:#667085;
-  --line:#e4e7ec; --primary:#405cf5; --danger:#c93636;
-}
-* { box-sizing:border-box; }
-body {
-  margin:0; padding:28px;
-  font-family:system-ui,-apple-system,"Segoe UI",Roboto,"Noto Sans JP",Meiryo,sans-serif;
-  color:var(--text); background:var(--bg);
-}
-main { width:min(760px,100%); margin:0 auto; }
-.topbar { display:flex; justify-content:space-between; gap:16px; align-items:center; margin-bottom:18px; }
-h1 { margin:0; font-size:1.8rem; }
-.subtitle { margin:5px 0 0; color:var(--muted); }
-.card {
-  margin-bottom:16px; padding:18px; border:1px solid var(--line); border-radius:16px;
-  background:var(--surface); box-shadow:0 10px 28px rgba(23,32,51,.07);
-}
-h2 { margin:0 0 12px; font-size:1.05rem; }
-input,button { min-height:40px; padding:8px 11px; border:1px solid #cfd5df; border-radius:9px; font:inherit; }
-input[type=text] { width:min(360px,100%); }
-button { cursor:pointer; background:#fff; font-weight:650; }
-.btn-primary { color:#fff; border-color:var(--primary); background:var(--primary); }
-.btn-danger { color:var(--danger); border-color:#f2c5c5; background:#fff1f1; }
-.back-link {
-  display:inline-flex; min-height:40px; align-items:center; padding:8px 12px;
-  border:1px solid var(--line); border-radius:9px; color:var(--text); background:#fff; text-decoration:none;
-}
-.tag-list { display:grid; gap:8px; }
-.tag-item {
-  display:flex; align-items:center; justify-content:space-between; gap:12px;
-  min-height:48px; padding:8px 10px; border:1px solid var(--line); border-radius:10px; background:#f8fafc;
-}
-.badge { display:inline-block; padding:4px 9px; border-radius:999px; background:#eef1f6; color:#566074; }
-.protected { color:var(--muted); font-size:.82rem; }
-form { margin:0; }
-@media(max-width:640px) { body{padding:14px;} .topbar{align-items:flex-start;} }
-body { padding:clamp(12px,1.5vw,24px); }
-main { width:100%; margin:0; }
-h1, h2, p { margin:0; line-height:1.15; }
-.topbar { gap:0; margin:0; }
-.card { margin:0; padding:3px 10px; border-radius:0; box-shadow:none; }
-input, button { min-height:26px; padding:3px 10px; border-radius:0; }
-.back-link { min-height:26px; padding:3px 10px; border-radius:0; }
-.tag-list { gap:0; }
-.tag-item { gap:0; min-height:26px; padding:3px 10px; border-radius:0; }
-.badge { padding:1px 4px; border-radius:0; }
-.card, input, button, .back-link, .tag-item { padding-block:1px; }
-</style>
+<link rel="stylesheet" href="{{ asset_url('tags.css') }}">
 
 <body>
 <main>
@@ -3166,65 +2801,7 @@ EDIT_HTML = r"""
 <meta charset="utf-8">
 <meta name="viewport" content="width=device-width, initial-scale=1">
 <title>タスク編集</title>
-<style>
-:root {
-  --bg:#f4f6fb; --surface:#fff; --text:#172033; --muted:#667085;
-  --line:#e4e7ec; --primary:#405cf5; --primary-dark:#2f46d3;
-}
-* { box-sizing:border-box; }
-body {
-  margin:0; padding:28px;
-  font-family:system-ui,-apple-system,"Segoe UI",Roboto,"Noto Sans JP",Meiryo,sans-serif;
-  color:var(--text); background:var(--bg);
-}
-main { width:min(900px,100%); margin:0 auto; }
-.topbar { display:flex; justify-content:space-between; gap:16px; align-items:center; margin-bottom:18px; }
-h1 { margin:0; font-size:1.8rem; }
-.subtitle { margin:5px 0 0; color:var(--muted); }
-.card {
-  padding:20px; border:1px solid var(--line); border-radius:16px;
-  background:var(--surface); box-shadow:0 10px 28px rgba(23,32,51,.07);
-}
-.field-grid { display:grid; grid-template-columns:1fr 1fr; gap:14px; }
-.field { display:grid; gap:6px; }
-.field-wide { grid-column:1 / -1; }
-label { color:#475467; font-size:.84rem; font-weight:700; }
-input,select,button {
-  min-height:42px; padding:8px 11px; border:1px solid #cfd5df; border-radius:9px;
-  color:var(--text); background:#fff; font:inherit;
-}
-input:focus,select:focus,button:focus-visible,a:focus-visible {
-  outline:3px solid rgba(64,92,245,.18); outline-offset:1px; border-color:var(--primary);
-}
-.actions { display:flex; gap:10px; align-items:center; margin-top:18px; }
-button { cursor:pointer; font-weight:700; }
-.btn-primary { color:#fff; border-color:var(--primary); background:var(--primary); }
-.btn-primary:hover { background:var(--primary-dark); }
-.back-link {
-  display:inline-flex; min-height:42px; align-items:center; padding:8px 12px;
-  border:1px solid var(--line); border-radius:9px; color:var(--text); background:#fff; text-decoration:none;
-}
-.cancel-link { color:var(--muted); font-size:.9rem; }
-.score-breakdown {
-  padding:10px 12px; border:1px solid var(--line); border-radius:10px;
-  color:var(--muted); background:#f8fafc; font-size:.88rem;
-}
-@media(max-width:640px) {
-  body{padding:14px;} .topbar{align-items:flex-start;} .field-grid{grid-template-columns:1fr;} .field-wide{grid-column:auto;}
-}
-body { padding:clamp(12px,1.5vw,24px); }
-main { width:100%; margin:0; }
-h1, p { margin:0; line-height:1.15; }
-.topbar { gap:0; margin:0; }
-.card { padding:3px 10px; border-radius:0; box-shadow:none; }
-.field-grid { gap:0; }
-.field { gap:0; }
-input, select, button { min-height:26px; padding:3px 10px; border-radius:0; }
-.actions { gap:0; margin:0; }
-.back-link { min-height:26px; padding:3px 10px; border-radius:0; }
-.score-breakdown { padding:3px 10px; border-radius:0; }
-.card, input, select, button, .back-link, .score-breakdown { padding-block:1px; }
-</style>
+<link rel="stylesheet" href="{{ asset_url('edit.css') }}">
 
 <body>
 <main>
@@ -3303,6 +2880,90 @@ input, select, button { min-height:26px; padding:3px 10px; border-radius:0; }
 </main>
 </body>
 """
+
+# テンプレートは名前で登録し、最初に一度だけコンパイルしてJinjaのキャッシュから使い回す。
+# 拡張子 .html により、render_template_string と同じく自動エスケープが効く
+TEMPLATES = {
+    'index.html': INDEX_HTML,
+    'index_overdue.html': INDEX_OVERDUE_HTML,
+    'index_parent_options.html': INDEX_PARENT_OPTIONS_HTML,
+    'index_task_macros.html': INDEX_TASK_MACROS_HTML,
+    'index_tree.html': INDEX_TREE_HTML,
+    'index_task_row.html': INDEX_TASK_ROW_HTML,
+    'index_calendar.html': INDEX_CALENDAR_HTML,
+    'index_recent_done.html': INDEX_RECENT_DONE_HTML,
+    'task_detail.html': TASK_DETAIL_HTML,
+    'tags.html': TAGS_HTML,
+    'edit.html': EDIT_HTML,
+}
+app.jinja_loader = DictLoader(TEMPLATES)
+
+def load_static_assets(static_dir=STATIC_DIR):
+    """
+    static/ のファイルを読み込み、{元の名前: ハッシュ付きの名前} と
+    {ハッシュ付きの名前: (内容, MIMEタイプ)} を返す。
+    """
+    names = {}
+    files = {}
+    if not os.path.isdir(static_dir):
+        return names, files
+    for name in sorted(os.listdir(static_dir)):
+        path = os.path.join(static_dir, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        hashed_name = f'{stem}.{hashlib.sha1(data).hexdigest()[:10]}{ext}'
+        names[name] = hashed_name
+        files[hashed_name] = (data, mimetypes.guess_type(name)[0] or 'application/octet-stream')
+    return names, files
+
+STATIC_ASSET_NAMES, STATIC_ASSETS = load_static_assets()
+
+def asset_url(name):
+    return url_for('static_asset', filename=STATIC_ASSET_NAMES[name])
+
+app.jinja_env.globals['asset_url'] = asset_url
+
+def compile_templates():
+    for name in TEMPLATES:
+        app.jinja_env.get_template(name)
+
+compile_templates()
+
+def page_build_token():
+    # アプリ本体（テンプレートを含む）か静的ファイルが変われば、同じデータでもETagを変える
+    with open(__file__, 'rb') as f:
+        source = f.read()
+    return hashlib.sha1(source + repr(sorted(STATIC_ASSET_NAMES.items())).encode('utf-8')).hexdigest()[:8]
+
+PAGE_BUILD_TOKEN = page_build_token()
+
+def page_etag(*parts):
+    """
+    保存先ファイルの状態、日付、アプリの版から、ページやAPIの弱いETagを作る。
+    タスクは読み込まないので、変わっていなければ読み込み前に304を返せる。
+    """
+    key = (
+        TASK_STORE.token(include_version=False),
+        file_signature(TAGS_CSV),
+        today_str(),
+        PAGE_BUILD_TOKEN,
+    ) + parts
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+
+def not_modified_response(etag):
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return page_etag_response(Response(status=304), etag)
+
+def page_etag_response(resp, etag):
+    resp = app.make_response(resp)
+    resp.set_etag(etag, weak=True)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
 # ---------- ルーティング ----------
 def task_for_api(task):
     return {
@@ -3383,8 +3044,8 @@ def create_local_task(title, tag='マイタスク', score=30, due_date=None,
         }
         tasks.append(new_task)
         bonus_task_ids = apply_link_bonuses(tasks)
-        annotate_effective_scores(tasks)
         write_tasks(tasks)
+        annotate_effective_scores(tasks)
 
     for sync_task_id in {tid, *bonus_task_ids}:
         enqueue_task_sync(sync_task_id)
@@ -3442,11 +3103,11 @@ def complete_local_task(task_id):
                 tasks.append(next_task)
                 bonus_task_ids = apply_link_bonuses(tasks)
 
+            write_tasks(tasks, op='complete')
             annotate_effective_scores(tasks)
             completed_task = dict(task)
             if next_task:
                 next_task = dict(next_task)
-            write_tasks(tasks)
             break
 
     if completed_task:
@@ -3470,9 +3131,9 @@ def reopen_local_task(task_id):
             task['completed'] = 0
             task['completed_at'] = ''
             task['sync_pending'] = 1 if GOOGLE_SYNC_ENABLED else 0
+            write_tasks(tasks, op='reopen')
             annotate_effective_scores(tasks)
             reopened_task = dict(task)
-            write_tasks(tasks)
             break
 
     if reopened_task:
@@ -3480,6 +3141,40 @@ def reopen_local_task(task_id):
     return reopened_task
 
 
+def delete_local_tasks(task_ids):
+    """
+    指定したタスクとその子孫をまとめて削除し、削除したIDを返す。
+    子孫は親子関係の索引から辿り、保存とGoogle側の削除依頼は1回で済ませる。
+    """
+    with TASKS_LOCK:
+        tasks = read_tasks()
+        tree = task_tree(tasks)
+
+        to_delete = set()
+        pending = [task_id for task_id in task_ids if task_id in tree]
+        while pending:
+            current_id = pending.pop()
+            if current_id in to_delete:
+                continue
+            to_delete.add(current_id)
+            pending.extend(tree.children(current_id))
+
+        if not to_delete:
+            return []
+
+        delete_google_ids = [
+            t.get('google_task_id', '')
+            for t in tasks
+            if t['id'] in to_delete and t.get('google_task_id')
+        ]
+
+        tasks = [t for t in tasks if t['id'] not in to_delete]
+        write_tasks(tasks, op='delete')
+
+    enqueue_google_deletes(delete_google_ids)
+    return sorted(to_delete)
+
+
 @app.before_request
 def ensure_background_sync():
     if SHARED_DATA_MODE:
@@ -3495,6 +3190,47 @@ def ensure_background_sync():
     start_sync_worker()
 
 
+def gzip_body(data):
+    # mtime=0 にして、同じ内容なら同じバイト列になるようにする
+    if request.endpoint != 'static_asset':
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    filename = request.view_args['filename']
+    with STATIC_GZIP_CACHE_LOCK:
+        compressed = STATIC_GZIP_CACHE.get(filename)
+    if compressed is None:
+        compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+        with STATIC_GZIP_CACHE_LOCK:
+            STATIC_GZIP_CACHE[filename] = compressed
+    return compressed
+
+
+@app.after_request
+def compress_response(resp):
+    if resp.mimetype not in GZIP_MIMETYPES:
+        return resp
+    resp.vary.add('Accept-Encoding')
+    if (
+        request.method == 'HEAD'
+        or resp.status_code != 200
+        or resp.direct_passthrough
+        or resp.is_streamed
+        or 'Content-Encoding' in resp.headers
+        or request.accept_encodings['gzip'] <= 0
+    ):
+        return resp
+    data = resp.get_data()
+    if len(data) < GZIP_MIN_SIZE:
+        return resp
+
+    resp.set_data(gzip_body(data))
+    resp.headers['Content-Encoding'] = 'gzip'
+    # 圧縮前と同じ強いETagは使えないため、同じ内容を表す弱いETagにする
+    etag, weak = resp.get_etag()
+    if etag and not weak:
+        resp.set_etag(etag, weak=True)
+    return resp
+
+
 @app.errorhandler(SharedDataConflictError)
 def shared_data_conflict(error):
     if request.path == '/api/codex' or request.path.startswith('/api/codex/'):
@@ -3509,7 +3245,9 @@ def codex_api_health():
         'service': 'tasklist',
         'version': 1,
         'shared_data': SHARED_DATA_MODE,
-        'device_id': SHARED_STORAGE.device_id if SHARED_DATA_MODE else ''
+        'device_id': SHARED_STORAGE.device_id if SHARED_DATA_MODE else '',
+        'google_sync': GOOGLE_SYNC_ENABLED,
+        'sync_metrics': sync_metrics_snapshot()
     })
 
 
@@ -3519,12 +3257,17 @@ def codex_api_tasks():
     if status not in ('open', 'completed', 'all'):
         return jsonify({'ok': False, 'error': 'status must be open, completed, or all'}), 400
 
+    etag = page_etag('codex_tasks', status)
+    cached = not_modified_response(etag)
+    if cached is not None:
+        return cached
+
     with TASKS_LOCK:
         tasks = read_tasks()
         bonus_task_ids = apply_link_bonuses(tasks)
-        annotate_effective_scores(tasks)
         if bonus_task_ids:
             write_tasks(tasks)
+        annotate_effective_scores(tasks)
     for bonus_task_id in bonus_task_ids:
         enqueue_task_sync(bonus_task_id)
 
@@ -3534,7 +3277,10 @@ def codex_api_tasks():
         tasks = [task for task in tasks if task['completed'] != 0]
 
     tasks.sort(key=task_sort_key)
-    return jsonify({'ok': True, 'count': len(tasks), 'tasks': [task_for_api(task) for task in tasks]})
+    return page_etag_response(
+        jsonify({'ok': True, 'count': len(tasks), 'tasks': [task_for_api(task) for task in tasks]}),
+        etag
+    )
 
 
 @app.route('/api/codex/tasks', methods=['POST'])
@@ -3575,6 +3321,46 @@ def codex_api_reopen_task(task_id):
     return jsonify({'ok': True, 'task': task_for_api(task)})
 
 
+@app.route('/api/codex/tasks/delete', methods=['POST'])
+def codex_api_delete_tasks():
+    payload = request.get_json(silent=True) or {}
+    raw_ids = payload.get('ids')
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return jsonify({'ok': False, 'error': 'ids must be a non-empty list'}), 400
+
+    try:
+        task_ids = [int(task_id) for task_id in raw_ids]
+    except (TypeError, ValueError):
+        return jsonify({'ok': False, 'error': 'ids must contain integers'}), 400
+
+    deleted_ids = delete_local_tasks(task_ids)
+    if not deleted_ids:
+        return jsonify({'ok': False, 'error': 'Task not found.'}), 404
+    return jsonify({'ok': True, 'count': len(deleted_ids), 'deleted_ids': deleted_ids})
+
+
+@app.route('/api/analytics/scores')
+def analytics_scores():
+    days = to_int(request.args.get('days', '30'), 0)
+    if days not in ANALYTICS_RANGES:
+        choices = ', '.join(str(value) for value in ANALYTICS_RANGES)
+        return jsonify({'ok': False, 'error': f'days must be one of {choices}'}), 400
+
+    end = dt.date.today()
+    start = end - dt.timedelta(days=days - 1)
+    with TASKS_LOCK:
+        series, tag_totals = score_ledger().series(start, end)
+    return jsonify({
+        'ok': True,
+        'days': days,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'total': sum(day['total'] for day in series),
+        'tags': tag_totals,
+        'series': series
+    })
+
+
 @app.route('/reorder', methods=['POST'])
 def reorder_tasks():
     payload = request.get_json(silent=True) or {}
@@ -3624,19 +3410,24 @@ def reorder_tasks():
         for index, task_id in enumerate(ordered_ids, start=1):
             tasks_by_id[task_id]['sort_order'] = index * 10
 
-        write_tasks(tasks)
+        write_tasks(tasks, op='reorder')
 
     return jsonify({'ok': True, 'due_date': due_date, 'ordered_ids': ordered_ids})
 
 
 @app.route('/task/<int:task_id>')
 def task_detail(task_id):
+    etag = page_etag('task_detail', task_id)
+    cached = not_modified_response(etag)
+    if cached is not None:
+        return cached
+
     with TASKS_LOCK:
         tasks = read_tasks()
         bonus_task_ids = apply_link_bonuses(tasks)
-        annotate_effective_scores(tasks)
         if bonus_task_ids:
             write_tasks(tasks)
+        annotate_effective_scores(tasks)
 
     for bonus_task_id in bonus_task_ids:
         enqueue_task_sync(bonus_task_id)
@@ -3654,8 +3445,8 @@ def task_detail(task_id):
         task_id
     )
 
-    return render_template_string(
-        TASK_DETAIL_HTML,
+    return page_etag_response(render_template(
+        'task_detail.html',
         task=task,
         descendant_rows=descendant_rows,
         completed_descendant_count=completed_descendant_count,
@@ -3663,7 +3454,7 @@ def task_detail(task_id):
         current_parent_id=current_parent_id,
         tags=read_tags(),
         today=today_str(),
-    )
+    ), etag)
 
 
 @app.route('/task/<int:task_id>/parent', methods=['POST'])
@@ -3704,7 +3495,6 @@ def set_task_parent(task_id):
 
         if updated:
             bonus_task_ids = apply_link_bonuses(tasks)
-            annotate_effective_scores(tasks)
             write_tasks(tasks)
 
     if updated:
@@ -3740,37 +3530,32 @@ def add_child(task_id):
 
     return redirect(url_for('task_detail', task_id=task_id))
 
-@app.route('/')
-def index():
-    request_google_pull()
-
-    with TASKS_LOCK:
-        tasks = read_tasks()
-        bonus_task_ids = apply_link_bonuses(tasks)
-        annotate_effective_scores(tasks)
-        if bonus_task_ids:
-            write_tasks(tasks)
-    for bonus_task_id in bonus_task_ids:
-        enqueue_task_sync(bonus_task_id)
-    tags = read_tags()
-
-    today = dt.date.today()
+def index_open_tasks(tasks, today):
+    """未完了タスクに索引ページ用の値を付け、並び順に並べて返す。"""
     active = []
     for t in tasks:
         if t['completed'] == 0:
             t['is_overdue'] = parse_date(t['due_date']) < today
             t['id_str'] = str(t['id'])
             active.append(t)
-
     active.sort(key=task_sort_key)
+    return active
 
-    overdue = [t for t in active if t['is_overdue']]
-    task_summary = {
-        'open': len(active),
-        'today': sum(1 for t in active if t['due_date'] == today_str()),
-        'overdue': len(overdue),
-    }
-
+def index_task_summary(tasks, today):
+    """未完了・今日が期日・期日切れの件数。due_date は YYYY-MM-DD なので文字列で比べる。"""
+    summary = {'open': 0, 'today': 0, 'overdue': 0}
+    today_iso = today.isoformat()
+    for t in tasks:
+        if t['completed'] != 0:
+            continue
+        summary['open'] += 1
+        if t['due_date'] == today_iso:
+            summary['today'] += 1
+        elif t['due_date'] < today_iso:
+            summary['overdue'] += 1
+    return summary
+
+def index_tree_context(active, today):
     active_ids = {str(t['id']) for t in active}
 
     children_by_parent = {}
@@ -3781,23 +3566,9 @@ def index():
 
     for children in children_by_parent.values():
         children.sort(key=task_sort_key)
+    return {'children_by_parent': children_by_parent, 'today': today.isoformat()}
 
-    selectable_parents = sorted(
-        active,
-        key=lambda x: (parse_date(x['due_date']), -x['id'])
-    )
-
-    for t in active:
-        forbidden = {t['id']}
-        stack = [t['id_str']]
-        while stack:
-            pid = stack.pop()
-            for ch in children_by_parent.get(pid, []):
-                if ch['id'] not in forbidden:
-                    forbidden.add(ch['id'])
-                    stack.append(ch['id_str'])
-        t['forbidden_parent_ids'] = forbidden
-
+def index_week_calendar(active, today):
     week_calendar = []
     for offset in range(7):
         d = today + dt.timedelta(days=offset)
@@ -3808,48 +3579,289 @@ def index():
             'weekday': '月火水木金土日'[d.weekday()],
             'tasks': day_tasks,
         })
+    return week_calendar
+
+def index_recent_done(tasks):
+    done = (t for t in tasks if t['completed'] == 1 and t['completed_at'])
+    return heapq.nlargest(20, done, key=lambda x: parse_dt_iso(x['completed_at']))
+
+def index_selectable_parents(active):
+    return sorted(active, key=lambda x: (parse_date(x['due_date']), -x['id']))
+
+def index_fragments(names, versions, tasks, active, today):
+    """
+    索引ページの部分のうち names のHTMLを返す。
+    データが変わっていない部分は、組み立ても描画もせずにキャッシュを返す。
+    """
+    builders = {
+        'overdue': lambda: {
+            'overdue': [t for t in active if t['is_overdue']],
+            'today': today.isoformat(),
+        },
+        'parent_options': lambda: {'selectable_parents': index_selectable_parents(active)},
+        'tree': lambda: index_tree_context(active, today),
+        'calendar': lambda: {'week_calendar': index_week_calendar(active, today)},
+        'recent_done': lambda: {'recent_done': index_recent_done(tasks)},
+    }
+    return {
+        name: index_fragment(name, versions[name], builders[name])
+        for name in names
+    }
 
-    total_14d = score_total_last_14_days(tasks)
+@app.route('/')
+def index():
+    request_google_pull()
+
+    # 描いた後に書き込みがあっても古いページを使わせないよう、読む前の状態でETagを決める
+    etag = page_etag('index', chart_mode(), google_sync_available())
+    cached = not_modified_response(etag)
+    if cached is not None:
+        return cached
+
+    with TASKS_LOCK:
+        tasks = read_tasks()
+        bonus_task_ids = apply_link_bonuses(tasks)
+        if bonus_task_ids:
+            write_tasks(tasks)
+        annotate_effective_scores(tasks)
+        fragment_versions = index_fragment_versions(tasks.version)
+    for bonus_task_id in bonus_task_ids:
+        enqueue_task_sync(bonus_task_id)
+    tags = read_tags()
 
-    done = [t for t in tasks if t['completed'] == 1 and t['completed_at']]
-    done.sort(key=lambda x: parse_dt_iso(x['completed_at']), reverse=True)
-    recent_done = done[:20]
+    today = dt.date.today()
+    active = index_open_tasks(tasks, today)
+    fragments = index_fragments(
+        INDEX_FRAGMENT_SECTIONS, fragment_versions, tasks, active, today
+    )
 
-    return render_template_string(
-        INDEX_HTML,
+    return page_etag_response(render_template(
+        'index.html',
         tags=tags,
-        overdue=overdue,
-        children_by_parent=children_by_parent,
-        selectable_parents=selectable_parents,
+        fragments=fragments,
         today=today_str(),
         chart_version=get_chart_version(),
-        total_14d=total_14d,
-        task_summary=task_summary,
-        recent_done=recent_done,
-        week_calendar=week_calendar,
+        chart_mode=chart_mode(),
+        total_14d=score_total_last_14_days(tasks),
+        task_summary=index_task_summary(active, today),
         google_sync_available=google_sync_available(),
+    ), etag)
+
+def wants_json():
+    # 索引ページのJSは Accept: application/json で送る。フォームの通常送信は今まで通りリダイレクト
+    return request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+def active_ancestor_ids(active_tree, task_id):
+    ancestors = []
+    parent_id = active_tree.parent(task_id)
+    while parent_id is not None and parent_id not in ancestors and parent_id != task_id:
+        ancestors.append(parent_id)
+        parent_id = active_tree.parent(parent_id)
+    return ancestors
+
+def task_change(changed_ids, versions, affected_ids=()):
+    """
+    書き込んだ直後に TASKS_LOCK の中で呼び、索引ページを読み直さずに
+    書き換えるための変更分を集める。versions は書き込む前の
+    index_fragment_versions() で、版が上がった部分だけを描き直す。
+
+    タスクは読み直さず、TaskStore が持っている書き込み済みのレコードと
+    親子・スコアの索引を使い、描く行とスコアを返すタスクの分だけ値を付けたコピーを作る。
+    affected_ids には、削除や付け替えの前の親など、変更後のデータからたどれないタスクを渡す。
+    """
+    records = TASK_STORE.peek()
+    version = TASK_STORE.version
+    tree = TASK_STORE.index_values('tree', version)
+    active_tree = TASK_STORE.index_values('active_tree', version)
+    fragment_versions = index_fragment_versions(version)
+    touched = [
+        name for name in ('overdue', 'calendar', 'recent_done')
+        if fragment_versions[name] != versions[name]
+    ]
+    today = dt.date.today()
+    by_id = {}
+
+    def record(task_id):
+        position = tree.position(task_id)
+        if position is not None and records[position]['id'] == task_id:
+            return records[position]
+        if not by_id:
+            by_id.update((t['id'], t) for t in records)
+        return by_id[task_id]
+
+    # 未完了になった・変わったタスクと、完了したタスクの下にあった未完了の子を置き直す。
+    # 置き直す祖先の行に含まれる子孫は、その行と一緒に描く
+    placed = set()
+    for task_id in changed_ids:
+        if task_id in active_tree:
+            placed.add(task_id)
+        elif task_id in tree:
+            placed.update(i for i in tree.children(task_id) if i in active_tree)
+    row_ids = sorted(
+        (
+            task_id for task_id in placed
+            if not any(ancestor in placed for ancestor in active_ancestor_ids(active_tree, task_id))
+        ),
+        key=lambda i: task_sort_key(record(i))
     )
 
+    # 完了した子の点は最初の未完了の祖先まで積み上がる
+    score_ids = []
+    for task_id in [*(tree.parent(i) for i in changed_ids), *affected_ids]:
+        while task_id in tree and task_id not in score_ids:
+            score_ids.append(task_id)
+            if record(task_id)['completed'] == 0:
+                break
+            task_id = tree.parent(task_id)
 
+    with TASK_STORE.index_view('scores', version) as scores:
+        def annotated(task_id):
+            task = dict(record(task_id))
+            task['own_score'], task['completed_children_score'], task['effective_score'] = (
+                scores.get(task_id)
+            )
+            task['link_count'] = len(tree.children(task_id)) + (tree.parent(task_id) is not None)
+            task['is_overdue'] = parse_date(task['due_date']) < today
+            task['id_str'] = str(task_id)
+            return task
+
+        rows = [
+            [annotated(i) for i in [task_id, *active_tree.subtree_ids(task_id)]]
+            for task_id in row_ids
+        ]
+        score_tasks = [annotated(task_id) for task_id in score_ids]
+        recent_done = [
+            annotated(t['id']) for t in index_recent_done(records)
+        ] if 'recent_done' in touched else []
 
-@app.route('/chart_last_14.png')
-def chart_last_14_png():
-    png_bytes = get_chart_png_bytes()
-    resp = Response(png_bytes, mimetype='image/png')
-    resp.headers['Cache-Control'] = 'no-store, max-age=0'
+    if 'overdue' in touched or 'calendar' in touched:
+        active = index_open_tasks([dict(t) for t in records if t['completed'] == 0], today)
+    else:
+        active = []
+    parent_options = None
+    if fragment_versions['parent_options'] != versions['parent_options']:
+        # 親の候補は全部描き直さず、変わったタスクの分だけ入れ替えさせる
+        parent_options = {
+            'removed_ids': list(changed_ids),
+            'options': [
+                {'id': t['id'], 'title': t['title'], 'due_date': t['due_date']}
+                for t in index_selectable_parents(
+                    [record(i) for i in dict.fromkeys(changed_ids) if i in active_tree]
+                )
+            ],
+        }
+
+    return {
+        'removed_ids': [i for i in changed_ids if i not in active_tree],
+        'rows': [
+            (tasks[0], str(active_tree.parent(tasks[0]['id']) or ''), tasks)
+            for tasks in rows
+        ],
+        'scores': score_tasks,
+        'touched': touched,
+        'fragment_versions': fragment_versions,
+        'recent_done': recent_done,
+        'active': active,
+        'parent_options': parent_options,
+        'summary': index_task_summary(records, today),
+        'total_14d': ledger_total_last_14_days(),
+        'chart_version': get_chart_version(),
+        'today': today,
+    }
+
+def task_change_response(change):
+    """
+    task_change() で集めた変更分をJSONで返す。描画はロックの外で行う。
+
+    rows は置き直す未完了タスクの行（子孫ごと描いたHTML）と入れ先の親、
+    removed_ids はツリーから消えたタスク、scores は実効スコアが動いた祖先の値、
+    parent_options は親の候補から外すIDと入れ直す候補。
+    ツリー以外の小さな部分は、表示が変わったものだけ描いたHTMLを返す。
+    """
+    today = change['today']
+    rows = []
+    for task, pid, tasks in change['rows']:
+        rows.append({
+            'id': task['id'],
+            'parent_id': pid,
+            'html': render_template(
+                'index_task_row.html', t=task, pid=pid, **index_tree_context(tasks, today)
+            ),
+        })
+    scores = {
+        task['id']: {
+            'effective_score': task['effective_score'],
+            'completed_children_score': task['completed_children_score'],
+            'link_count': task['link_count'],
+            'link_bonus_awarded': bool(task.get('link_bonus_awarded', 0)),
+        }
+        for task in change['scores']
+    }
+    return jsonify({
+        'ok': True,
+        'removed_ids': change['removed_ids'],
+        'rows': rows,
+        'scores': scores,
+        'parent_options': change['parent_options'],
+        'fragments': index_fragments(
+            change['touched'], change['fragment_versions'],
+            change['recent_done'], change['active'], today
+        ),
+        'summary': change['summary'],
+        'total_14d': change['total_14d'],
+        'chart_version': change['chart_version'],
+    })
+
+def chart_png_response(name):
+    # ブラウザには保存させつつ毎回ETagで確認させ、変わっていなければ304を返す
+    etag = chart_etag(chart_cache_key(name))
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        key, png_bytes = get_chart_png_bytes(name)
+        etag = chart_etag(key)
+        resp = Response(png_bytes, mimetype='image/png')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
     return resp
 
-@app.route('/chart_today_progress.png')
-def chart_today_progress_png():
+@app.route('/assets/<filename>')
+def static_asset(filename):
+    asset = STATIC_ASSETS.get(filename)
+    if asset is None:
+        return Response('Not Found', status=404, mimetype='text/plain')
+    data, mimetype = asset
+    resp = Response(data, mimetype=mimetype)
+    resp.headers['Cache-Control'] = ASSET_CACHE_CONTROL
+    return resp
+
+def chart_json_response(name):
+    # PNGと同じデータの版をETagにし、変わっていなければ集計せずに304を返す
+    # gzipで送ることがあるので、200でも304でも同じ弱いETagを付ける
+    etag = 'data-' + chart_etag(chart_cache_key(name))
+    cached = not_modified_response(etag)
+    if cached is not None:
+        return cached
     with TASKS_LOCK:
         tasks = read_tasks()
+        etag = 'data-' + chart_etag(chart_cache_key(name))
+    return page_etag_response(jsonify({'ok': True, **CHART_DATA_BUILDERS[name](tasks)}), etag)
 
-    chart_b64 = chart_today_progress_png_b64(tasks)
-    png_bytes = base64.b64decode(chart_b64)
+@app.route('/api/charts/last14')
+def api_chart_last_14():
+    return chart_json_response('last_14')
 
-    resp = Response(png_bytes, mimetype='image/png')
-    resp.headers['Cache-Control'] = 'no-store, max-age=0'
-    return resp
+@app.route('/api/charts/today')
+def api_chart_today():
+    return chart_json_response('today_progress')
+
+@app.route('/chart_last_14.png')
+def chart_last_14_png():
+    return chart_png_response('last_14')
+
+@app.route('/chart_today_progress.png')
+def chart_today_progress_png():
+    return chart_png_response('today_progress')
 
 @app.route('/add', methods=['POST'])
 def add():
@@ -3871,22 +3883,33 @@ def add():
 def refresh_google():
     if google_sync_available():
         try:
-            sync_google_to_local()
+            sync_google_to_local(force_full=True)
         except Exception:
             app.logger.exception('手動Google同期に失敗した')
     return redirect(url_for('index'))
 
 @app.route('/complete/<int:task_id>', methods=['POST'])
 def complete(task_id):
-    complete_local_task(task_id)
-    return redirect(requested_return_url(url_for('index')))
+    if not wants_json():
+        complete_local_task(task_id)
+        return redirect(requested_return_url(url_for('index')))
+
+    with TASKS_LOCK:
+        versions = index_fragment_versions(TASK_STORE.version)
+        completed_task, next_task = complete_local_task(task_id)
+        if not completed_task:
+            return jsonify({'ok': False, 'error': 'Open task not found'}), 404
+        change = task_change([task_id] + ([next_task['id']] if next_task else []), versions)
+    return task_change_response(change)
 
 @app.route('/reschedule/<int:task_id>', methods=['POST'])
 def reschedule(task_id):
     new_due = sanitize_due_date(request.form.get('new_due_date', today_str()))
     rescheduled = False
+    change = None
 
     with TASKS_LOCK:
+        versions = index_fragment_versions(TASK_STORE.version)
         tasks = read_tasks()
 
         for t in tasks:
@@ -3906,53 +3929,58 @@ def reschedule(task_id):
                 break
 
         if rescheduled:
-            write_tasks(tasks)
+            write_tasks(tasks, op='reschedule')
+            if wants_json():
+                change = task_change([task_id], versions)
 
     if rescheduled:
         enqueue_task_sync(task_id)
+    if wants_json():
+        if not rescheduled:
+            return jsonify({'ok': False, 'error': 'Open task not found'}), 404
+        return task_change_response(change)
     return redirect(url_for('index'))
 
 
 # --- 追加: タスク削除（自分＋子孫を再帰的に削除） ---
 @app.route('/delete/<int:task_id>', methods=['POST'])
 def delete(task_id):
-    with TASKS_LOCK:
-        tasks = read_tasks()
-
-        to_delete = set([task_id])
-        changed = True
-        while changed:
-            changed = False
-            for t in tasks:
-                pid = t.get('parent_id', '')
-                if pid and str(pid).isdigit() and int(pid) in to_delete and t['id'] not in to_delete:
-                    to_delete.add(t['id'])
-                    changed = True
-
-        delete_google_ids = [
-            t.get('google_task_id', '')
-            for t in tasks
-            if t['id'] in to_delete and t.get('google_task_id')
-        ]
-
-        tasks = [t for t in tasks if t['id'] not in to_delete]
-        write_tasks(tasks)
-
-    for gid in delete_google_ids:
-        enqueue_google_delete(gid)
+    if not wants_json():
+        delete_local_tasks([task_id])
+        return redirect(url_for('index'))
 
-    return redirect(url_for('index'))
+    with TASKS_LOCK:
+        versions = index_fragment_versions(TASK_STORE.version)
+        # 完了済みのタスクを消したときは、元の親の実効スコアも変わる
+        parent_id = next(
+            (to_int(t['parent_id'], 0) for t in TASK_STORE.peek() if t['id'] == task_id),
+            0
+        )
+        deleted_ids = delete_local_tasks([task_id])
+        if not deleted_ids:
+            return jsonify({'ok': False, 'error': 'Task not found'}), 404
+        change = task_change(deleted_ids, versions, affected_ids=[parent_id])
+    return task_change_response(change)
 
 # --- 追加: 完了取り消し（未完了に戻す） ---
 @app.route('/undo/<int:task_id>', methods=['POST'])
 def undo(task_id):
-    reopen_local_task(task_id)
-    return redirect(requested_return_url(url_for('index')))
+    if not wants_json():
+        reopen_local_task(task_id)
+        return redirect(requested_return_url(url_for('index')))
+
+    with TASKS_LOCK:
+        versions = index_fragment_versions(TASK_STORE.version)
+        reopened_task = reopen_local_task(task_id)
+        if not reopened_task:
+            return jsonify({'ok': False, 'error': 'Task not found'}), 404
+        change = task_change([task_id], versions)
+    return task_change_response(change)
 
 @app.route('/tags')
 def tags_page():
     tags = read_tags()
-    return render_template_string(TAGS_HTML, tags=tags)
+    return render_template('tags.html', tags=tags)
 
 @app.route('/tags/add', methods=['POST'])
 def add_tag():
@@ -3994,34 +4022,22 @@ def update_meta(task_id):
 
     updated = False
     bonus_task_ids = []
+    old_parent_id = ''
+    change = None
 
     with TASKS_LOCK:
+        versions = index_fragment_versions(TASK_STORE.version)
         if new_tag not in read_tags():
             new_tag = 'マイタスク'
         tasks = read_tasks()
 
-        active = [t for t in tasks if t['completed'] == 0]
-        active_ids = {str(t['id']) for t in active}
-
-        children_by_parent = {}
-        for t in active:
-            pid = t['parent_id'] if t['parent_id'] in active_ids else ''
-            children_by_parent.setdefault(pid, []).append(t)
-
-        forbidden = {task_id}
-        stack = [str(task_id)]
-        while stack:
-            pid = stack.pop()
-            for ch in children_by_parent.get(pid, []):
-                cid = ch['id']
-                if cid not in forbidden:
-                    forbidden.add(cid)
-                    stack.append(str(cid))
-
-        if not (new_parent_id and new_parent_id.isdigit() and new_parent_id in active_ids):
-            new_parent_id = ''
-        elif int(new_parent_id) in forbidden:
+        tree = task_tree(tasks, active_only=True)
+
+        new_parent = int(new_parent_id) if new_parent_id.isdigit() else 0
+        if new_parent not in tree or tree.is_descendant(new_parent, task_id):
             new_parent_id = ''
+        else:
+            new_parent_id = str(new_parent)
 
         for t in tasks:
             if t['id'] == task_id and t['completed'] == 0:
@@ -4033,6 +4049,7 @@ def update_meta(task_id):
                         t['due_date'],
                         exclude_task_id=task_id
                     )
+                old_parent_id = t['parent_id']
                 t['parent_id'] = new_parent_id
                 t['sync_pending'] = 1 if GOOGLE_SYNC_ENABLED else 0
                 updated = True
@@ -4041,12 +4058,22 @@ def update_meta(task_id):
         if updated:
             bonus_task_ids = apply_link_bonuses(tasks)
             write_tasks(tasks)
+            if wants_json():
+                change = task_change(
+                    [task_id, *bonus_task_ids],
+                    versions,
+                    affected_ids=[to_int(old_parent_id, 0)]
+                )
 
     if updated:
         enqueue_task_sync(task_id)
     for bonus_task_id in bonus_task_ids:
         enqueue_task_sync(bonus_task_id)
 
+    if wants_json():
+        if not updated:
+            return jsonify({'ok': False, 'error': 'Open task not found'}), 404
+        return task_change_response(change)
     return redirect(url_for('index'))
 
 @app.route('/edit/<int:task_id>', methods=['GET', 'POST'])
@@ -4069,26 +4096,10 @@ def edit_task(task_id):
 
     active = [t for t in tasks if int(t.get('completed', 0)) == 0]
     active_ids = {str(t['id']) for t in active}
-
-    children_by_parent = {}
-    for t in active:
-        pid = t.get('parent_id', '')
-        if pid not in active_ids:
-            pid = ''
-        children_by_parent.setdefault(pid, []).append(t)
-
-    forbidden = {task_id}
-    stack = [str(task_id)]
-    while stack:
-        pid = stack.pop()
-        for ch in children_by_parent.get(pid, []):
-            cid = ch['id']
-            if cid not in forbidden:
-                forbidden.add(cid)
-                stack.append(str(cid))
+    tree = task_tree(tasks, active_only=True)
 
     parent_candidates = sorted(
-        [t for t in active if t['id'] not in forbidden],
+        [t for t in active if not tree.is_descendant(t['id'], task_id)],
         key=lambda x: (parse_date(x['due_date']), -x['id'])
     )
 
@@ -4114,7 +4125,7 @@ def edit_task(task_id):
         )
 
         new_parent_id = (request.form.get('parent_id') or '').strip()
-        if not (new_parent_id and new_parent_id.isdigit() and new_parent_id in active_ids and int(new_parent_id) not in forbidden):
+        if not (new_parent_id and new_parent_id.isdigit() and new_parent_id in active_ids and not tree.is_descendant(int(new_parent_id), task_id)):
             new_parent_id = ''
 
         new_due_date = sanitize_due_date(
@@ -4147,7 +4158,6 @@ def edit_task(task_id):
                     current['sync_pending'] = 1 if GOOGLE_SYNC_ENABLED else 0
                     break
             bonus_task_ids = apply_link_bonuses(tasks)
-            annotate_effective_scores(tasks)
             write_tasks(tasks)
 
         enqueue_task_sync(task_id)
@@ -4160,4 +4170,5 @@ def edit_task(task_id):
 
 if __name__ == '__main__':
     ensure_files()
+    start_chart_warmup()
     app.run(debug=False, use_reloader=False)
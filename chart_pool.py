@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""Chart rendering in a small pool of worker processes.
+
+pyplot keeps global state and holds the GIL for the whole draw, so charts are
+drawn in spawned interpreters that import ``charts`` (and matplotlib with the
+Japanese font) once and then stay warm. Render calls send plain values such
+as dates, titles and scores, and receive PNG bytes. This module itself never
+imports matplotlib, so the web process stays light.
+
+When the pool cannot be started, or its workers keep dying, rendering falls
+back to the calling process, one chart at a time.
+"""
+
+import importlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+CHARTS_MODULE = 'charts'
+
+
+def warm():
+    importlib.import_module(CHARTS_MODULE)
+    return True
+
+
+def render(function_name, args):
+    """Call ``charts.<function_name>(*args)``. Runs inside a worker."""
+    charts = importlib.import_module(CHARTS_MODULE)
+    return getattr(charts, function_name)(*args)
+
+
+class ChartRenderPool:
+    """Lazily started process pool with an in-process fallback.
+
+    ``workers`` of 0 or less never starts a pool. A pool whose worker died is
+    replaced on the next render, up to ``max_restarts`` times, after which
+    the pool stays off.
+    """
+
+    def __init__(self, workers=1, timeout=30.0, max_restarts=2, logger=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_restarts = max_restarts
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._local_lock = threading.Lock()
+        self._executor = None
+        self._restarts = 0
+        self._disabled = workers <= 0
+
+    @property
+    def enabled(self):
+        return not self._disabled
+
+    def _get_executor(self):
+        with self._lock:
+            if self._disabled:
+                return None
+            if self._executor is None:
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=warm
+                    )
+                except (OSError, ValueError, NotImplementedError):
+                    self.logger.exception('chart worker pool could not start')
+                    self._disabled = True
+            return self._executor
+
+    def _drop(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._restarts += 1
+                if self._restarts > self.max_restarts:
+                    self._disabled = True
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def warm(self):
+        """Start the workers in the background so the first chart is fast."""
+        executor = self._get_executor()
+        if executor is None:
+            with self._local_lock:
+                warm()
+            return
+        for _ in range(self.workers):
+            executor.submit(warm)
+
+    def render_local(self, function_name, *args):
+        with self._local_lock:
+            return render(function_name, args)
+
+    def render(self, function_name, *args):
+        executor = self._get_executor()
+        if executor is None:
+            return self.render_local(function_name, *args)
+        try:
+            future = executor.submit(render, function_name, args)
+        except RuntimeError:
+            # The pool broke or was shut down by another thread meanwhile.
+            self._drop(executor)
+            return self.render_local(function_name, *args)
+        try:
+            return future.result(self.timeout)
+        except BrokenProcessPool:
+            self.logger.exception('chart worker died; drawing in this process')
+            self._drop(executor)
+        except FutureTimeoutError:
+            self.logger.warning(
+                'chart worker did not answer in %.0f s; drawing in this process',
+                self.timeout
+            )
+        return self.render_local(function_name, *args)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
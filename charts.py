@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""Matplotlib drawing for the index page charts.
+
+The plotting stack takes a noticeable share of start-up time, so app.py
+imports this module only when a chart is first drawn. Functions receive
+plain precomputed values (dates, titles, scores) and return PNG bytes; they
+never touch tasks or import the app.
+"""
+
+import io
+import unicodedata
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import japanize_matplotlib  # noqa: F401  (registers the Japanese font)
+import numpy as np
+from matplotlib.collections import PolyCollection
+
+
+TODAY_COLORS = [
+    '#4f83f1',
+    '#f45b69',
+    '#f2c94c',
+    '#2fb344',
+    '#9b5de5',
+    '#00a6a6',
+    '#f2994a',
+    '#6c757d'
+]
+
+# Rows beyond this are folded into one summary row so that drawing time and
+# image size stay bounded on busy days.
+TODAY_MAX_ROWS = 12
+TODAY_SUMMARY_COLOR = '#adb5bd'
+TODAY_SUMMARY_TEXT_COLOR = '#6c757d'
+
+TODAY_TEXT_COLORS = [
+    '#2457c5',
+    '#c5303f',
+    '#9a6b00',
+    '#1f7a32',
+    '#6f35c2',
+    '#007575',
+    '#b75f00',
+    '#444444'
+]
+
+
+def char_width(ch):
+    return 2 if unicodedata.east_asian_width(ch) in ('F', 'W', 'A') else 1
+
+
+def wrap_label(text, max_width=24, max_lines=2):
+    text = str(text)
+    lines = []
+    line = ''
+    width = 0
+
+    for ch in text:
+        w = char_width(ch)
+        if width + w > max_width and line:
+            lines.append(line)
+            line = ch
+            width = w
+        else:
+            line += ch
+            width += w
+
+        if len(lines) >= max_lines:
+            break
+
+    if line and len(lines) < max_lines:
+        lines.append(line)
+
+    consumed = ''.join(lines)
+    if len(consumed) < len(text):
+        lines[-1] = lines[-1].rstrip('…') + '…'
+
+    return '\n'.join(lines)
+
+
+def figure_png_bytes(fig, **savefig_kwargs):
+    """Return the figure as PNG bytes.
+
+    The bytes are served and cached as they are. ``getvalue`` is the only
+    copy: a memoryview of the buffer can be neither pickled back from a
+    worker process nor written by a WSGI server.
+    """
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', **savefig_kwargs)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def render_last_14_days(days, sums, target_days, day_scores, today):
+    """Line chart of daily totals next to stacked bars for yesterday and today.
+
+    ``sums`` holds one total per entry of ``days``. ``day_scores`` maps each
+    of ``target_days`` to ``(title, score)`` pairs in completion order.
+    """
+    fig = plt.figure(figsize=(9.0, 3.4), dpi=120)
+    gs = fig.add_gridspec(1, 2, width_ratios=[2, 1])
+
+    # 左: 14日折れ線
+    ax1 = fig.add_subplot(gs[0, 0])
+    ax1.plot(range(len(days)), sums, marker='o')
+    ax1.set_title('過去14日のスコア')
+    ax1.set_xlabel('日付')
+    ax1.set_ylabel('点')
+    ax1.set_xticks(range(len(days)))
+    ax1.set_xticklabels([d.strftime('%m/%d') for d in days], rotation=45)
+    ax1.grid(True, linestyle='--', linewidth=0.5)
+
+    # 右: 縦積み棒
+    ax2 = fig.add_subplot(gs[0, 1])
+
+    x_pos = list(range(len(target_days)))  # 0=昨日, 1=今日
+    bar_width = 0.6
+    max_stack = 0
+
+    for i, d in enumerate(target_days):
+        bottom = 0
+        for title, sc in day_scores.get(d, []):
+            if sc <= 0:
+                continue
+
+            # 棒
+            ax2.bar(i, sc, width=bar_width, bottom=bottom)
+
+            # ★ 今日だけラベルを右に表示する
+            if d == today:
+                if len(title) > 15:
+                    title = title[:14] + "…"
+
+                label_y = bottom + sc / 2
+                label_x = i + bar_width/2 + 0.15
+
+                ax2.text(
+                    label_x,
+                    label_y,
+                    title,
+                    va='center',
+                    ha='left',
+                    fontsize=8
+                )
+
+            bottom += sc
+
+        max_stack = max(max_stack, bottom)
+
+    ax2.set_xticks(x_pos)
+    ax2.set_xticklabels([d.strftime('%m/%d') for d in target_days], rotation=45)
+    ax2.set_ylabel('点（積み上げ）')
+    ax2.set_title('昨日と今日')
+
+    if max_stack > 0:
+        ax2.set_ylim(0, max_stack * 1.15)
+
+    # ラベル分の余白
+    ax2.set_xlim(-0.5, 1.4)
+
+    fig.tight_layout(rect=[0, 0, 0.92, 1])  # 右側の余白を大きめに
+
+    return figure_png_bytes(fig)
+
+
+def today_progress_rows(items, max_rows=TODAY_MAX_ROWS):
+    """Fold the oldest items into one summary row when there are too many.
+
+    Returns ``(rows, scores, cumulative)``. Each row is ``(label, color,
+    text_color)``; ``scores`` and ``cumulative`` are arrays with one entry
+    per row. The last cumulative value is always the day's total.
+    """
+    scores = [max(score, 0) for _, score in items]
+    rows = [
+        (
+            title,
+            TODAY_COLORS[j % len(TODAY_COLORS)],
+            TODAY_TEXT_COLORS[j % len(TODAY_TEXT_COLORS)],
+        )
+        for j, (title, _) in enumerate(items)
+    ]
+
+    if len(items) > max_rows:
+        hidden = len(items) - (max_rows - 1)
+        rows = [(f'ほか {hidden} 件', TODAY_SUMMARY_COLOR, TODAY_SUMMARY_TEXT_COLOR)] + rows[hidden:]
+        scores = [sum(scores[:hidden])] + scores[hidden:]
+
+    scores = np.asarray(scores, dtype=float)
+    return rows, scores, np.cumsum(scores)
+
+
+def cumulative_bar_polygons(scores, cumulative, height):
+    """Rectangles for every segment ``j <= row`` of every cumulative row.
+
+    Row ``r`` repeats the segments of rows ``0..r``, so the rectangles are
+    built for all ``(row, j)`` pairs at once and drawn as one collection.
+    """
+    rows, cols = np.tril_indices(len(scores))
+    keep = scores[cols] > 0
+    rows, cols = rows[keep], cols[keep]
+
+    left = cumulative[cols] - scores[cols]
+    right = cumulative[cols]
+    bottom = rows - height / 2
+    top = rows + height / 2
+
+    polygons = np.empty((len(rows), 4, 2))
+    polygons[:, 0] = np.column_stack([left, bottom])
+    polygons[:, 1] = np.column_stack([right, bottom])
+    polygons[:, 2] = np.column_stack([right, top])
+    polygons[:, 3] = np.column_stack([left, top])
+    return polygons, cols
+
+
+def render_today_progress(items, max_rows=TODAY_MAX_ROWS):
+    """Cumulative horizontal bars for ``(title, score)`` pairs done today."""
+    rows, scores, cumulative = today_progress_rows(items, max_rows)
+    n = len(rows)
+
+    fig_h = max(1.6, 0.65 * max(n, 1) + 0.2)
+    fig = plt.figure(figsize=(11.0, fig_h), dpi=130)
+    ax = fig.add_subplot(111)
+
+    if n == 0:
+        ax.text(
+            0.5,
+            0.5,
+            '今日はまだ完了タスクがありません',
+            ha='center',
+            va='center',
+            fontsize=18
+        )
+        ax.set_axis_off()
+    else:
+        max_total = int(cumulative[-1])
+        if max_total <= 0:
+            max_total = 1
+
+        polygons, cols = cumulative_bar_polygons(scores, cumulative, height=0.78)
+        ax.add_collection(PolyCollection(
+            polygons,
+            facecolors=[rows[j][1] for j in cols],
+            edgecolors='white',
+            linewidths=0.8
+        ))
+
+        for row, (label, _, text_color) in enumerate(rows):
+            title = wrap_label(label, max_width=24, max_lines=2)
+
+            ax.text(
+                cumulative[row] + max_total * 0.03,
+                row,
+                title,
+                ha='left',
+                va='center',
+                fontsize=16,
+                fontweight='bold',
+                linespacing=1.15,
+                color=text_color
+            )
+        ax.text(
+            max_total * 1.45,
+            0,
+            f'合計 {max_total} 点',
+            ha='left',
+            va='center',
+            fontsize=28,
+            fontweight='bold'
+        )
+        ax.set_xlim(0, max_total * 2.15)
+        ax.set_ylim(-0.55, n - 0.45)
+
+        ax.set_yticks([])
+        ax.tick_params(axis='x', labelsize=13, pad=1)
+
+        ax.grid(True, axis='x', linestyle='--', linewidth=0.6, alpha=0.65)
+
+        for spine in ['top', 'right', 'left']:
+            ax.spines[spine].set_visible(False)
+
+        ax.spines['bottom'].set_alpha(0.4)
+
+    fig.subplots_adjust(
+        left=0.03,
+        right=0.99,
+        top=0.99,
+        bottom=0.15
+    )
+
+    return figure_png_bytes(fig)
@@ -76,6 +76,9 @@ def build_parser() -> argparse.ArgumentParser:
     reopen_parser = commands.add_parser("reopen", help="Reopen a task by ID.")
     reopen_parser.add_argument("task_id", type=int)
 
+    delete_parser = commands.add_parser("delete", help="Delete tasks and their subtasks by ID.")
+    delete_parser.add_argument("task_ids", type=int, nargs="+")
+
     return parser
 
 
@@ -101,6 +104,9 @@ def run_command(args: argparse.Namespace) -> dict:
     if args.command == "reopen":
         return api_request("POST", f"tasks/{args.task_id}/reopen", {})
 
+    if args.command == "delete":
+        return api_request("POST", "tasks/delete", {"ids": args.task_ids})
+
     raise TasklistClientError(f"Unsupported command: {args.command}")
 
 
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Daily totals of completed-task scores by date and tag, saved as JSON."""
+
+import datetime as dt
+import json
+import time
+
+
+class ScoreLedger:
+    """Score totals keyed by completion date and tag.
+
+    Writes pass in the contributions that disappeared and appeared, so a
+    range query only walks the requested days. ``source`` names the task
+    data the totals were computed from; the app rebuilds the ledger when it
+    no longer matches, for example after tasks.csv was replaced by hand.
+
+    Changes stay in memory until ``save``, so the app can write many task
+    changes to disk at once. Losing unsaved changes is harmless: the saved
+    ``source`` then no longer matches the task data and the ledger is rebuilt.
+    """
+
+    format_name = 'tasklist-score-ledger'
+    format_version = 1
+
+    def __init__(self, path, coordinator):
+        self.path = path
+        self.coordinator = coordinator
+        self.source = None
+        self.loaded = False
+        self.dirty = False
+        self._days = {}
+
+    def load(self):
+        self.loaded = True
+        self.dirty = False
+        self.source = None
+        self._days = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file_obj:
+                data = json.load(file_obj)
+        except (OSError, json.JSONDecodeError):
+            return
+        if (
+            not isinstance(data, dict)
+            or data.get('format') != self.format_name
+            or data.get('version') != self.format_version
+            or not isinstance(data.get('days'), dict)
+        ):
+            return
+        self.source = data.get('source')
+        self._days = {
+            day: {tag: int(score) for tag, score in tags.items()}
+            for day, tags in data['days'].items()
+            if isinstance(tags, dict)
+        }
+
+    def save(self):
+        """Write the totals if they changed since they were loaded or saved."""
+        if not self.dirty:
+            return False
+        text = json.dumps({
+            'format': self.format_name,
+            'version': self.format_version,
+            'source': self.source,
+            'saved_at': time.time(),
+            'days': self._days,
+        }, ensure_ascii=False, sort_keys=True)
+        self.coordinator.atomic_write_data_file(
+            self.path,
+            lambda file_obj: file_obj.write(text),
+            create_backup=False
+        )
+        self.dirty = False
+        return True
+
+    def _add(self, day, tag, score):
+        tags = self._days.setdefault(day, {})
+        total = tags.get(tag, 0) + score
+        if total:
+            tags[tag] = total
+        else:
+            tags.pop(tag, None)
+            if not tags:
+                del self._days[day]
+
+    def rebuild(self, entries, source):
+        """Replace the totals with ``(date_iso, tag, score)`` entries."""
+        self._days = {}
+        for day, tag, score in entries:
+            self._add(day, tag, score)
+        self.source = source
+        self.dirty = True
+
+    def apply(self, removed, added, source):
+        """Move the given ``(date_iso, tag, score)`` contributions."""
+        for day, tag, score in removed:
+            self._add(day, tag, -score)
+        for day, tag, score in added:
+            self._add(day, tag, score)
+        self.source = source
+        self.dirty = True
+
+    def totals(self):
+        return {day: dict(tags) for day, tags in self._days.items()}
+
+    def series(self, start, end):
+        """Per-day totals from ``start`` to ``end`` and totals per tag."""
+        days = []
+        tag_totals = {}
+        day = start
+        while day <= end:
+            tags = self._days.get(day.isoformat(), {})
+            days.append({
+                'date': day.isoformat(),
+                'total': sum(tags.values()),
+                'tags': dict(tags),
+            })
+            for tag, score in tags.items():
+                tag_totals[tag] = tag_totals.get(tag, 0) + score
+            day += dt.timedelta(days=1)
+        return days, tag_totals
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Measure the per-request time of the index page.
+
+The app and its data directory are copied to a temporary directory, a
+number of open and completed tasks are added there, and ``/`` is requested
+repeatedly through the Flask test client. With ``--from-string`` every
+request compiles its template again through ``render_template_string``, as
+app.py used to do, which gives the "before" number.
+
+    python scripts/bench_index_render.py --tasks 200 --runs 50
+    python scripts/bench_index_render.py --tasks 200 --runs 50 --from-string
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from bench_startup import copy_app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark index page rendering.')
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--from-string', action='store_true',
+                        help='compile the template on every request, as before')
+    args = parser.parse_args(argv)
+
+    app_dir = tempfile.mkdtemp(prefix='tasklist-bench-')
+    try:
+        copy_app(app_dir)
+        os.chdir(app_dir)
+        sys.path.insert(0, app_dir)
+        os.environ['GOOGLE_SYNC_ENABLED'] = '0'
+        os.environ['TASKLIST_CHART_PRERENDER_SEC'] = '-1'
+        os.environ.pop('TASKLIST_DATA_DIR', None)
+        import app
+        from flask import render_template_string
+
+        if args.from_string:
+            app.render_template = lambda name, **context: render_template_string(
+                app.TEMPLATES[name], **context
+            )
+
+        client = app.app.test_client()
+        for i in range(args.tasks):
+            client.post('/add', data={'title': f'bench {i}', 'score': '30'})
+        for task_id in range(2, args.tasks + 1, 3):
+            client.post(f'/complete/{task_id}')
+
+        client.get('/')
+        samples = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            response = client.get('/')
+            samples.append(time.perf_counter() - started)
+            assert response.status_code == 200
+    finally:
+        shutil.rmtree(app_dir, ignore_errors=True)
+
+    mode = 'from string' if args.from_string else 'compiled'
+    print(
+        f'{mode:11s} index ({args.tasks} tasks) '
+        f'median {statistics.median(samples) * 1000:7.1f} ms  '
+        f'min {min(samples) * 1000:7.1f} ms'
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
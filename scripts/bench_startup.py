@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Measure time-to-first-index for a fresh app process.
+
+Each run starts a new interpreter that imports app.py and renders ``/``
+through the Flask test client, so nothing is shared between runs. With
+``--eager-charts`` the chart module (and matplotlib) is imported during
+start-up as app.py used to do, which gives the "before" number.
+
+The app and its data directory are copied to a temporary directory first,
+so the benchmark never writes to the real task data.
+
+    python scripts/bench_startup.py --runs 5
+    python scripts/bench_startup.py --runs 5 --eager-charts
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD_SOURCE = r'''
+import json
+import sys
+import time
+
+started = time.perf_counter()
+if sys.argv[1] == '1':
+    import charts  # noqa: F401
+import app
+
+imported = time.perf_counter()
+client = app.app.test_client()
+response = client.get('/')
+finished = time.perf_counter()
+print(json.dumps({
+    'status': response.status_code,
+    'import_sec': imported - started,
+    'first_index_sec': finished - started,
+    'matplotlib_loaded': 'matplotlib' in sys.modules,
+}))
+'''
+
+
+def copy_app(target_dir):
+    for name in os.listdir(REPO_DIR):
+        path = os.path.join(REPO_DIR, name)
+        if name.endswith('.py') and os.path.isfile(path):
+            shutil.copy2(path, os.path.join(target_dir, name))
+    for name in ('data', 'static'):
+        source_dir = os.path.join(REPO_DIR, name)
+        if os.path.isdir(source_dir):
+            shutil.copytree(source_dir, os.path.join(target_dir, name))
+
+
+def run_once(app_dir, eager_charts):
+    env = dict(os.environ)
+    env['GOOGLE_SYNC_ENABLED'] = '0'
+    env.pop('TASKLIST_DATA_DIR', None)
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_SOURCE, '1' if eager_charts else '0'],
+        cwd=app_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark app start-up time.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--eager-charts', action='store_true',
+                        help='import matplotlib at start-up, as before lazy loading')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='tasklist-bench-') as app_dir:
+        copy_app(app_dir)
+        # The first run also builds matplotlib's font cache if it is missing.
+        run_once(app_dir, args.eager_charts)
+        samples = [run_once(app_dir, args.eager_charts) for _ in range(args.runs)]
+
+    mode = 'eager charts' if args.eager_charts else 'lazy charts'
+    for key in ('import_sec', 'first_index_sec'):
+        values = [sample[key] for sample in samples]
+        print(
+            f'{mode:12s} {key:16s} '
+            f'median {statistics.median(values) * 1000:7.1f} ms  '
+            f'min {min(values) * 1000:7.1f} ms'
+        )
+    print(f'{mode:12s} matplotlib loaded: {samples[-1]["matplotlib_loaded"]}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
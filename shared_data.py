@@ -176,6 +176,34 @@ class SharedDataCoordinator:
                 self._backup_data_file(path)
             self.atomic_write_text(path, writer)
 
+    def append_data_text(self, path, text):
+        """Append ``text`` to a data file without rewriting or backing it up."""
+        with self._write_lock:
+            if self.enabled:
+                self.assert_write_allowed()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', newline='', encoding='utf-8') as file_obj:
+                file_obj.write(text)
+                self._flush_and_sync(file_obj)
+
+    def truncate_data_file(self, path, size):
+        """Cut a data file back to ``size`` bytes, e.g. to drop a torn append."""
+        with self._write_lock:
+            if self.enabled:
+                self.assert_write_allowed()
+            with open(path, 'r+b') as file_obj:
+                file_obj.truncate(size)
+                self._flush_and_sync(file_obj)
+
+    def remove_data_file(self, path):
+        with self._write_lock:
+            if self.enabled:
+                self.assert_write_allowed()
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
     @staticmethod
     def _windows_process_is_running(pid):
         """Check a Windows PID without sending it a signal.
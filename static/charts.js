@@ -0,0 +1,180 @@
+(() => {
+  // charts.py と同じ配色・行数上限。サーバーでmatplotlibを使わずに描く
+  const COLORS = ['#4f83f1', '#f45b69', '#f2c94c', '#2fb344', '#9b5de5', '#00a6a6', '#f2994a', '#6c757d'];
+  const TEXT_COLORS = ['#2457c5', '#c5303f', '#9a6b00', '#1f7a32', '#6f35c2', '#007575', '#b75f00', '#444444'];
+  const SUMMARY_COLOR = '#adb5bd';
+  const SUMMARY_TEXT_COLOR = '#6c757d';
+  const TODAY_MAX_ROWS = 12;
+  const SVG_NS = 'http://www.w3.org/2000/svg';
+
+  function el(name, attrs, text) {
+    const node = document.createElementNS(SVG_NS, name);
+    Object.entries(attrs || {}).forEach(([key, value]) => node.setAttribute(key, value));
+    if (text !== undefined) node.textContent = text;
+    return node;
+  }
+
+  function shortDate(iso) {
+    return iso.slice(5).replace('-', '/');
+  }
+
+  function truncate(text, max) {
+    return text.length > max ? text.slice(0, max - 1) + '…' : text;
+  }
+
+  function todayRows(tasks) {
+    let rows = tasks.map((task, j) => ({
+      label: task.title,
+      score: Math.max(task.score, 0),
+      color: COLORS[j % COLORS.length],
+      textColor: TEXT_COLORS[j % TEXT_COLORS.length],
+    }));
+    if (rows.length > TODAY_MAX_ROWS) {
+      const hidden = rows.length - (TODAY_MAX_ROWS - 1);
+      const folded = rows.slice(0, hidden).reduce((sum, row) => sum + row.score, 0);
+      rows = [{
+        label: `ほか ${hidden} 件`,
+        score: folded,
+        color: SUMMARY_COLOR,
+        textColor: SUMMARY_TEXT_COLOR,
+      }].concat(rows.slice(hidden));
+    }
+    let cumulative = 0;
+    rows.forEach((row) => {
+      row.start = cumulative;
+      cumulative += row.score;
+      row.end = cumulative;
+    });
+    return rows;
+  }
+
+  function drawToday(data) {
+    const rows = todayRows(data.tasks);
+    const width = 1100;
+    const rowHeight = 52;
+    if (!rows.length) {
+      const svg = el('svg', { viewBox: `0 0 ${width} 120` });
+      svg.appendChild(el('text', {
+        x: width / 2, y: 66, 'text-anchor': 'middle', 'font-size': 28,
+      }, '今日はまだ完了タスクがありません'));
+      return svg;
+    }
+    const height = rows.length * rowHeight + 16;
+    const maxTotal = Math.max(rows[rows.length - 1].end, 1);
+    const scale = (width - 20) / (maxTotal * 2.15);
+    const svg = el('svg', { viewBox: `0 0 ${width} ${height}` });
+    rows.forEach((row, r) => {
+      const y = (rows.length - 1 - r) * rowHeight + 8;
+      rows.slice(0, r + 1).forEach((segment) => {
+        if (segment.score <= 0) return;
+        svg.appendChild(el('rect', {
+          x: 10 + segment.start * scale,
+          y,
+          width: segment.score * scale,
+          height: rowHeight * 0.78,
+          fill: segment.color,
+          stroke: 'white',
+        }));
+      });
+      svg.appendChild(el('text', {
+        x: 10 + row.end * scale + maxTotal * 0.03 * scale,
+        y: y + rowHeight * 0.39,
+        'dominant-baseline': 'middle',
+        'font-size': 20,
+        'font-weight': 'bold',
+        fill: row.textColor,
+      }, truncate(row.label, 24)));
+    });
+    svg.appendChild(el('text', {
+      x: 10 + maxTotal * 1.45 * scale,
+      y: (rows.length - 1) * rowHeight + 8 + rowHeight * 0.39,
+      'dominant-baseline': 'middle',
+      'font-size': 34,
+      'font-weight': 'bold',
+    }, `合計 ${data.total} 点`));
+    return svg;
+  }
+
+  function drawLast14(data) {
+    const width = 900;
+    const height = 320;
+    const svg = el('svg', { viewBox: `0 0 ${width} ${height}` });
+
+    // 左: 14日折れ線
+    const left = { x: 50, y: 20, w: 520, h: 230 };
+    const maxSum = Math.max(...data.sums, 1);
+    const px = (i) => left.x + (data.days.length > 1 ? i * left.w / (data.days.length - 1) : 0);
+    const py = (value) => left.y + left.h - value / maxSum * left.h;
+    svg.appendChild(el('text', { x: left.x + left.w / 2, y: 14, 'text-anchor': 'middle', 'font-size': 14 }, '過去14日のスコア'));
+    svg.appendChild(el('line', { x1: left.x, y1: left.y + left.h, x2: left.x + left.w, y2: left.y + left.h, stroke: '#999' }));
+    svg.appendChild(el('polyline', {
+      points: data.sums.map((value, i) => `${px(i)},${py(value)}`).join(' '),
+      fill: 'none',
+      stroke: COLORS[0],
+      'stroke-width': 2,
+    }));
+    data.sums.forEach((value, i) => {
+      const point = el('circle', { cx: px(i), cy: py(value), r: 3.5, fill: COLORS[0] });
+      point.appendChild(el('title', {}, `${shortDate(data.days[i])}: ${value} 点`));
+      svg.appendChild(point);
+      svg.appendChild(el('text', {
+        x: px(i), y: left.y + left.h + 16, 'text-anchor': 'end', 'font-size': 10,
+        transform: `rotate(-45 ${px(i)} ${left.y + left.h + 16})`,
+      }, shortDate(data.days[i])));
+    });
+    svg.appendChild(el('text', { x: left.x - 8, y: left.y + 4, 'text-anchor': 'end', 'font-size': 10 }, maxSum));
+
+    // 右: 昨日と今日の縦積み棒
+    const right = { x: 620, y: 20, w: 260, h: 230 };
+    const maxStack = Math.max(...data.stacks.map((stack) => (
+      stack.tasks.reduce((sum, task) => sum + Math.max(task.score, 0), 0)
+    )), 1) * 1.15;
+    svg.appendChild(el('text', { x: right.x + right.w / 2, y: 14, 'text-anchor': 'middle', 'font-size': 14 }, '昨日と今日'));
+    data.stacks.forEach((stack, i) => {
+      const x = right.x + 10 + i * 80;
+      let bottom = 0;
+      stack.tasks.forEach((task, j) => {
+        if (task.score <= 0) return;
+        const h = task.score / maxStack * right.h;
+        const y = right.y + right.h - (bottom + task.score) / maxStack * right.h;
+        const bar = el('rect', { x, y, width: 48, height: h, fill: COLORS[j % COLORS.length] });
+        bar.appendChild(el('title', {}, `${task.title}: ${task.score} 点`));
+        svg.appendChild(bar);
+        if (stack.date === data.today) {
+          svg.appendChild(el('text', {
+            x: x + 56, y: y + h / 2, 'dominant-baseline': 'middle', 'font-size': 10,
+          }, truncate(task.title, 15)));
+        }
+        bottom += task.score;
+      });
+      svg.appendChild(el('text', {
+        x: x + 24, y: right.y + right.h + 16, 'text-anchor': 'middle', 'font-size': 10,
+      }, shortDate(stack.date)));
+    });
+    return svg;
+  }
+
+  const DRAW = { today: drawToday, last14: drawLast14 };
+
+  async function draw(box) {
+    try {
+      const response = await fetch(box.dataset.src, { headers: { Accept: 'application/json' } });
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      box.replaceChildren(DRAW[box.dataset.chart](await response.json()));
+    } catch (error) {
+      box.textContent = `グラフを表示できません: ${error.message}`;
+    }
+  }
+
+  document.querySelectorAll('.chart-svg[data-chart]').forEach(draw);
+
+  // index.js がタスクの変更を当てたら、新しいデータの版で描き直す
+  document.addEventListener('tasks-changed', (event) => {
+    document.querySelectorAll('.chart-svg[data-chart]').forEach((box) => {
+      const url = new URL(box.dataset.src, window.location.href);
+      url.searchParams.set('v', event.detail.chart_version);
+      box.dataset.src = url.pathname + url.search;
+      draw(box);
+    });
+  });
+})();
@@ -0,0 +1,495 @@
+(() => {
+  const addForm = document.getElementById('task-add-form');
+  const scoreValue = document.getElementById('quick-score-value');
+  const scoreButtons = Array.from(document.querySelectorAll('.quick-score-button'));
+
+  function selectQuickScore(button) {
+    if (!scoreValue) return;
+    scoreValue.value = button.dataset.score;
+    scoreButtons.forEach((item) => {
+      item.setAttribute('aria-pressed', item === button ? 'true' : 'false');
+    });
+  }
+
+  scoreButtons.forEach((button) => {
+    button.addEventListener('click', () => selectQuickScore(button));
+    button.addEventListener('keydown', (event) => {
+      if (event.key !== 'Enter' || !addForm) return;
+      event.preventDefault();
+      selectQuickScore(button);
+      addForm.requestSubmit();
+    });
+  });
+
+  const tree = document.getElementById('task-tree');
+  const reorderStatus = document.getElementById('reorder-status');
+  const detachParentDrop = document.getElementById('detach-parent-drop');
+  if (!tree) return;
+
+  let draggedTask = null;
+  let draggedList = null;
+  let dragIntent = null;
+  let dropMode = null;
+  let orderReference = null;
+  let parentTarget = null;
+  let suppressRowClickUntil = 0;
+  let pointerStart = null;
+  const dragClickThreshold = 4;
+  const dragClickSuppressMs = 350;
+
+  function clearDropMarkers() {
+    tree.querySelectorAll('.is-order-target').forEach((node) => {
+      node.classList.remove('is-order-target');
+    });
+    tree.querySelectorAll('.drop-as-parent').forEach((node) => {
+      node.classList.remove('drop-as-parent');
+      const row = node.querySelector(':scope > .task-row');
+      if (row) row.removeAttribute('data-drop-label');
+    });
+    detachParentDrop?.classList.remove('is-active');
+  }
+
+  function clearDropIntent() {
+    dropMode = null;
+    orderReference = null;
+    parentTarget = null;
+  }
+
+  async function persistOrder(list, dueDate) {
+    const orderedIds = Array.from(list.children)
+      .filter((node) => (
+        node.matches('li.task')
+        && node.dataset.dueDate === dueDate
+      ))
+      .map((node) => Number(node.dataset.taskId));
+    const response = await fetch(tree.dataset.reorderUrl, {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      body: JSON.stringify({
+        parent_id: '',
+        due_date: dueDate,
+        ordered_ids: orderedIds
+      })
+    });
+    if (!response.ok) throw new Error('並び順を保存できませんでした');
+  }
+
+  async function persistParent(task, parentId) {
+    const response = await fetch(task.dataset.parentUrl, {
+      method: 'POST',
+      headers: {'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8'},
+      body: new URLSearchParams({parent_id: parentId})
+    });
+    if (!response.ok) {
+      const message = (await response.text()).trim();
+      throw new Error(message || '親子関係を保存できませんでした');
+    }
+  }
+
+  function orderReferenceForGap(gap) {
+    const dueDate = draggedTask?.dataset.dueDate;
+    if (!dueDate || draggedList !== tree) return null;
+
+    if (
+      gap.dataset.beforeDueDate === dueDate
+      && gap.dataset.beforeTaskId
+    ) {
+      return {position: 'before', taskId: gap.dataset.beforeTaskId};
+    }
+    if (
+      gap.dataset.afterDueDate === dueDate
+      && gap.dataset.afterTaskId
+    ) {
+      return {position: 'after', taskId: gap.dataset.afterTaskId};
+    }
+    return null;
+  }
+
+  function moveTaskToOrderReference(task, reference) {
+    const referenceTask = Array.from(tree.children).find((node) => (
+      node.matches('li.task')
+      && node.dataset.taskId === reference.taskId
+    ));
+    if (!referenceTask) return false;
+
+    if (reference.position === 'before') {
+      tree.insertBefore(task, referenceTask);
+    } else {
+      tree.insertBefore(task, referenceTask.nextElementSibling);
+    }
+    return true;
+  }
+
+  function finishDrag() {
+    clearDropMarkers();
+    clearDropIntent();
+    tree.classList.remove('is-dragging', 'is-order-dragging');
+    detachParentDrop?.classList.remove('is-visible', 'is-active');
+    detachParentDrop?.setAttribute('aria-hidden', 'true');
+    if (draggedTask) draggedTask.classList.remove('dragging');
+    draggedTask = null;
+    draggedList = null;
+    dragIntent = null;
+  }
+
+  function finishPointerTracking() {
+    pointerStart = null;
+  }
+
+  tree.addEventListener('pointerdown', (event) => {
+    const row = event.target.closest('.task-row');
+    if (
+      !row
+      || event.button !== 0
+      || event.target.closest('button, input, select, form')
+    ) {
+      pointerStart = null;
+      return;
+    }
+    pointerStart = {
+      x: event.clientX,
+      y: event.clientY
+    };
+  });
+
+  window.addEventListener('pointermove', (event) => {
+    if (!pointerStart) return;
+    const moved = Math.hypot(
+      event.clientX - pointerStart.x,
+      event.clientY - pointerStart.y
+    );
+    if (moved >= dragClickThreshold) {
+      suppressRowClickUntil = performance.now() + dragClickSuppressMs;
+    }
+  });
+
+  window.addEventListener('pointerup', finishPointerTracking);
+  window.addEventListener('pointercancel', finishPointerTracking);
+
+  tree.addEventListener('dragstart', (event) => {
+    const parentHandle = event.target.closest('.parent-drag-handle');
+    const orderHandle = event.target.closest('.order-drag-handle');
+    const handle = parentHandle || orderHandle;
+    if (!handle) {
+      event.preventDefault();
+      return;
+    }
+    const row = handle.closest('.task-row');
+    if (!row) return;
+    draggedTask = row.closest('li.task');
+    draggedList = draggedTask.parentElement;
+    dragIntent = orderHandle ? 'order' : 'parent';
+    if (dragIntent === 'order' && draggedList !== tree) {
+      event.preventDefault();
+      finishDrag();
+      return;
+    }
+    draggedTask.classList.add('dragging');
+    tree.classList.add('is-dragging');
+    if (dragIntent === 'order') tree.classList.add('is-order-dragging');
+    if (dragIntent === 'parent' && draggedTask.dataset.parentId && detachParentDrop) {
+      detachParentDrop.classList.add('is-visible');
+      detachParentDrop.setAttribute('aria-hidden', 'false');
+    }
+    event.dataTransfer.effectAllowed = 'move';
+    event.dataTransfer.setData('text/plain', draggedTask.dataset.taskId);
+  });
+
+  tree.addEventListener('dragover', (event) => {
+    if (!draggedTask) return;
+
+    if (dragIntent === 'order') {
+      const gap = event.target.closest('.task-order-gap');
+      if (!gap) {
+        clearDropMarkers();
+        clearDropIntent();
+        return;
+      }
+      const reference = orderReferenceForGap(gap);
+      if (!reference) return;
+      event.preventDefault();
+      clearDropMarkers();
+      clearDropIntent();
+      dropMode = 'order';
+      orderReference = reference;
+      gap.classList.add('is-order-target');
+      event.dataTransfer.dropEffect = 'move';
+      return;
+    }
+
+    if (dragIntent !== 'parent') return;
+
+    const row = event.target.closest('.task-row');
+    const target = row?.closest('li.task');
+    if (
+      !row
+      || !target
+      || target === draggedTask
+      || draggedTask.contains(target)
+    ) {
+      clearDropMarkers();
+      clearDropIntent();
+      return;
+    }
+
+    event.preventDefault();
+    clearDropMarkers();
+    clearDropIntent();
+    dropMode = 'parent';
+    parentTarget = target;
+    target.classList.add('drop-as-parent');
+    row.dataset.dropLabel = `${target.dataset.title} の子にする`;
+    event.dataTransfer.dropEffect = 'move';
+  });
+
+  tree.addEventListener('drop', async (event) => {
+    if (!draggedTask) return;
+    const sourceTask = draggedTask;
+    const sourceList = draggedList;
+    const selectedMode = dropMode;
+    const selectedOrderReference = orderReference;
+    const selectedParentTarget = parentTarget;
+    event.preventDefault();
+    clearDropMarkers();
+    try {
+      if (selectedMode === 'order' && selectedOrderReference) {
+        if (!moveTaskToOrderReference(sourceTask, selectedOrderReference)) {
+          throw new Error('並び替え先を見つけられませんでした');
+        }
+        await persistOrder(sourceList, sourceTask.dataset.dueDate);
+        reorderStatus.textContent = '並び順を保存しました';
+      } else if (selectedMode === 'parent' && selectedParentTarget) {
+        await persistParent(sourceTask, selectedParentTarget.dataset.taskId);
+        reorderStatus.textContent = `${selectedParentTarget.dataset.title}の子にしました`;
+      } else {
+        return;
+      }
+      window.location.reload();
+    } catch (error) {
+      reorderStatus.textContent = error.message;
+      window.location.reload();
+    }
+  });
+
+  detachParentDrop?.addEventListener('dragover', (event) => {
+    if (dragIntent !== 'parent' || !draggedTask || !draggedTask.dataset.parentId) return;
+    event.preventDefault();
+    clearDropMarkers();
+    clearDropIntent();
+    dropMode = 'detach';
+    detachParentDrop.classList.add('is-active');
+    event.dataTransfer.dropEffect = 'move';
+  });
+
+  detachParentDrop?.addEventListener('drop', async (event) => {
+    if (dragIntent !== 'parent' || !draggedTask || !draggedTask.dataset.parentId) return;
+    const sourceTask = draggedTask;
+    event.preventDefault();
+    event.stopPropagation();
+    clearDropMarkers();
+    try {
+      await persistParent(sourceTask, '');
+      reorderStatus.textContent = '親から外しました';
+      window.location.reload();
+    } catch (error) {
+      reorderStatus.textContent = error.message;
+      window.location.reload();
+    }
+  });
+
+  tree.addEventListener('dragend', () => {
+    suppressRowClickUntil = performance.now() + dragClickSuppressMs;
+    finishDrag();
+  });
+
+  tree.addEventListener('click', (event) => {
+    if (performance.now() < suppressRowClickUntil) {
+      event.preventDefault();
+      event.stopPropagation();
+      suppressRowClickUntil = 0;
+      return;
+    }
+    const row = event.target.closest('.task-row');
+    if (!row || event.target.closest('a, button, input, select, form, .drag-handle')) return;
+    const task = row.closest('li.task');
+    if (task?.dataset.detailUrl) window.location.assign(task.dataset.detailUrl);
+  });
+})();
+
+(() => {
+  // 完了・取り消し・延長・削除はJSONで送り、返ってきた変更分だけをページに当てる。
+  // 当てられなかったときだけページを読み直す
+  const tree = document.getElementById('task-tree');
+  const treeEmpty = document.getElementById('task-tree-empty');
+  const parentSelect = document.getElementById('new-parent');
+  const overdueSummary = document.getElementById('overdue-summary');
+  const fragmentSlots = {
+    overdue: document.getElementById('overdue-fragment'),
+    calendar: document.getElementById('calendar-fragment'),
+    recent_done: document.getElementById('recent-done-fragment'),
+  };
+  const scoreClasses = [
+    'badge-score-bonus', 'badge-score-max', 'badge-score-high', 'badge-score-mid', 'badge-score-low'
+  ];
+  if (!tree) return;
+
+  function scoreClass(score, bonus) {
+    if (bonus) return 'badge-score-bonus';
+    if (score === 100) return 'badge-score-max';
+    if (score >= 80) return 'badge-score-high';
+    if (score >= 50) return 'badge-score-mid';
+    return 'badge-score-low';
+  }
+
+  function taskItem(taskId) {
+    return tree.querySelector(`li.task[data-task-id="${taskId}"]`);
+  }
+
+  // サーバーの task_sort_key と同じ（期日、並び順、ID）
+  function sortKey(item) {
+    return [item.dataset.dueDate, Number(item.dataset.sortOrder), Number(item.dataset.taskId)];
+  }
+
+  function compareKeys(a, b) {
+    for (let i = 0; i < a.length; i += 1) {
+      if (a[i] < b[i]) return -1;
+      if (a[i] > b[i]) return 1;
+    }
+    return 0;
+  }
+
+  function placeInList(list, item) {
+    const key = sortKey(item);
+    const next = Array.from(list.querySelectorAll(':scope > li.task'))
+      .find((node) => compareKeys(sortKey(node), key) > 0);
+    list.insertBefore(item, next || null);
+  }
+
+  function orderGap(before, after) {
+    const gap = document.createElement('li');
+    gap.className = 'task-order-gap';
+    gap.setAttribute('aria-hidden', 'true');
+    if (before) {
+      gap.dataset.beforeTaskId = before.dataset.taskId;
+      gap.dataset.beforeDueDate = before.dataset.dueDate;
+    }
+    if (after) {
+      gap.dataset.afterTaskId = after.dataset.taskId;
+      gap.dataset.afterDueDate = after.dataset.dueDate;
+    }
+    return gap;
+  }
+
+  function refreshOrderGaps() {
+    tree.querySelectorAll(':scope > .task-order-gap').forEach((gap) => gap.remove());
+    const items = Array.from(tree.querySelectorAll(':scope > li.task'));
+    items.forEach((item, i) => tree.insertBefore(orderGap(item, items[i - 1]), item));
+    if (items.length) tree.appendChild(orderGap(null, items[items.length - 1]));
+  }
+
+  function htmlElement(html) {
+    const template = document.createElement('template');
+    template.innerHTML = html.trim();
+    return template.content.firstElementChild;
+  }
+
+  function setBadge(row, field, value, text) {
+    const badge = row.querySelector(`:scope > [data-field="${field}"]`);
+    badge.hidden = !value;
+    badge.textContent = text;
+  }
+
+  function updateScore(item, score) {
+    const row = item.querySelector(':scope > .task-row');
+    const badge = row.querySelector(':scope > [data-field="score"]');
+    badge.textContent = `点: ${score.effective_score}`;
+    badge.classList.remove(...scoreClasses);
+    badge.classList.add(scoreClass(score.effective_score, score.link_bonus_awarded));
+    setBadge(row, 'children-score', score.completed_children_score,
+      `完了した子 +${score.completed_children_score}`);
+    setBadge(row, 'link-count', score.link_count, `紐付け: ${score.link_count}本`);
+    setBadge(row, 'link-bonus', score.link_bonus_awarded, '4紐付け +1000');
+  }
+
+  // サーバーの親の候補と同じ（期日、新しいID順）
+  function optionKey(option) {
+    return [option.dataset.dueDate, -Number(option.value)];
+  }
+
+  function updateParentOptions(change) {
+    const selected = parentSelect.value;
+    change.removed_ids.forEach((taskId) => {
+      parentSelect.querySelector(`option[value="${taskId}"]`)?.remove();
+    });
+    change.options.forEach((values) => {
+      const option = document.createElement('option');
+      option.value = values.id;
+      option.dataset.dueDate = values.due_date;
+      option.textContent = values.title;
+      const key = optionKey(option);
+      const next = Array.from(parentSelect.querySelectorAll('option:not(:first-child)'))
+        .find((node) => compareKeys(optionKey(node), key) > 0);
+      parentSelect.insertBefore(option, next || null);
+    });
+    parentSelect.value = selected;
+    if (parentSelect.selectedIndex < 0) parentSelect.value = '';
+  }
+
+  function applyChange(change) {
+    change.removed_ids.forEach((taskId) => taskItem(taskId)?.remove());
+    change.rows.forEach((row) => {
+      // 行には子孫も含まれるので、今ある同じタスクの行は先に外す
+      const item = htmlElement(row.html);
+      [item, ...item.querySelectorAll('li.task')].forEach((node) => {
+        taskItem(node.dataset.taskId)?.remove();
+      });
+      const list = row.parent_id ? taskItem(row.parent_id)?.querySelector(':scope > ul') : tree;
+      if (!list) throw new Error('親タスクの行が見つかりません');
+      placeInList(list, item);
+    });
+    refreshOrderGaps();
+    Object.entries(change.scores).forEach(([taskId, score]) => {
+      const item = taskItem(taskId);
+      if (item) updateScore(item, score);
+    });
+
+    if (change.parent_options) updateParentOptions(change.parent_options);
+    Object.entries(change.fragments).forEach(([name, html]) => {
+      if (fragmentSlots[name]) fragmentSlots[name].innerHTML = html;
+    });
+    const values = {...change.summary, total_14d: change.total_14d};
+    document.querySelectorAll('[data-summary]').forEach((node) => {
+      node.textContent = values[node.dataset.summary];
+    });
+    overdueSummary?.classList.toggle('is-alert', change.summary.overdue > 0);
+    if (treeEmpty) treeEmpty.hidden = change.summary.open > 0;
+
+    document.querySelectorAll('img[data-chart-image]').forEach((img) => {
+      const url = new URL(img.src);
+      url.searchParams.set('v', change.chart_version);
+      img.src = url.href;
+    });
+    document.dispatchEvent(new CustomEvent('tasks-changed', {detail: change}));
+  }
+
+  document.addEventListener('submit', async (event) => {
+    const form = event.target.closest('form[data-patch]');
+    // 削除の確認で取り消されたときは何もしない
+    if (!form || event.defaultPrevented) return;
+    event.preventDefault();
+    form.querySelectorAll('button, input[type=submit]').forEach((button) => {
+      button.disabled = true;
+    });
+    try {
+      const response = await fetch(form.action, {
+        method: 'POST',
+        headers: {Accept: 'application/json'},
+        body: new FormData(form),
+      });
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      applyChange(await response.json());
+    } catch (error) {
+      window.location.reload();
+    }
+  });
+})();
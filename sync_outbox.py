@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""Persistent, deduplicating queue of Google sync jobs."""
+
+import json
+import threading
+import time
+
+
+def job_keys(job):
+    """Split ``job`` into ``(key, job)`` pairs, one per task it touches."""
+    action = job.get('action')
+    if action == 'sync_task':
+        return [(f'sync:{int(job["local_task_id"])}', job)]
+    if action == 'delete_google_tasks':
+        return [
+            (f'delete:{google_task_id}', {
+                'action': 'delete_google_tasks',
+                'google_task_ids': [google_task_id],
+            })
+            for google_task_id in dict.fromkeys(job.get('google_task_ids') or [])
+            if google_task_id
+        ]
+    if action == 'pull':
+        return [('pull', job)]
+    return []
+
+
+class SyncOutbox:
+    """Jobs keyed by local task id or Google task id, saved as JSON.
+
+    Queuing a key that is already waiting keeps one job, so five edits of a
+    task cost one sync. ``take`` hands jobs to the worker without forgetting
+    them; only ``done`` removes them from disk, so jobs that were running
+    when the app stopped are picked up again on the next start. A key queued
+    again while its job is running stays queued for the next round, because
+    the task changed after the running job read it.
+
+    A job that failed goes back through ``retry`` and is held back from
+    ``take`` for a delay that doubles with each failure of the same key, from
+    ``retry_delay`` up to ``max_retry_delay`` seconds.
+    """
+
+    format_name = 'tasklist-sync-outbox'
+    format_version = 1
+
+    def __init__(self, path, coordinator, retry_delay=30, max_retry_delay=30 * 60):
+        self.path = path
+        self.coordinator = coordinator
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._running = {}
+        self._failures = {}
+        self._retry_at = {}
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file_obj:
+                data = json.load(file_obj)
+        except (OSError, json.JSONDecodeError):
+            return
+        if (
+            not isinstance(data, dict)
+            or data.get('format') != self.format_name
+            or data.get('version') != self.format_version
+        ):
+            return
+        for job in data.get('jobs') or []:
+            if not isinstance(job, dict):
+                continue
+            try:
+                for key, keyed_job in job_keys(job):
+                    self._pending.setdefault(key, keyed_job)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def _save(self):
+        jobs = list(self._running.values())
+        jobs.extend(job for key, job in self._pending.items() if key not in self._running)
+        if not jobs:
+            self.coordinator.remove_data_file(self.path)
+            return
+        text = json.dumps({
+            'format': self.format_name,
+            'version': self.format_version,
+            'saved_at': time.time(),
+            'jobs': jobs,
+        }, ensure_ascii=False)
+        self.coordinator.atomic_write_data_file(
+            self.path,
+            lambda file_obj: file_obj.write(text),
+            create_backup=False
+        )
+
+    def load(self):
+        """Read jobs left over from the previous run and return how many."""
+        with self._cond:
+            self._load()
+            if self._pending:
+                self._cond.notify_all()
+            return len(self._pending)
+
+    def put(self, job):
+        with self._cond:
+            self._load()
+            added = False
+            for key, keyed_job in job_keys(job):
+                if key not in self._pending:
+                    self._pending[key] = keyed_job
+                    added = True
+            if added:
+                self._save()
+                self._cond.notify_all()
+            return added
+
+    def _due_keys(self, now):
+        return [
+            key for key in self._pending
+            if key not in self._retry_at or self._retry_at[key] <= now
+        ]
+
+    def take(self, timeout=None, limit=None):
+        """Wait up to ``timeout`` seconds and return the due jobs, oldest first."""
+        with self._cond:
+            self._load()
+            now = time.monotonic()
+            keys = self._due_keys(now)
+            if not keys:
+                if self._pending:
+                    # Everything queued is waiting for a retry; wake up when the first is due.
+                    wait = min(self._retry_at[key] for key in self._pending) - now
+                    timeout = wait if timeout is None else min(timeout, wait)
+                self._cond.wait(timeout)
+                keys = self._due_keys(time.monotonic())
+            keys = keys[:limit]
+            jobs = []
+            for key in keys:
+                job = self._pending.pop(key)
+                self._running[key] = job
+                jobs.append(job)
+            return jobs
+
+    def done(self, jobs):
+        """Forget jobs returned by ``take`` once the worker has handled them."""
+        with self._cond:
+            for job in jobs:
+                for key, _ in job_keys(job):
+                    if self._running.get(key) is job:
+                        del self._running[key]
+                        self._failures.pop(key, None)
+                        self._retry_at.pop(key, None)
+            self._save()
+
+    def retry(self, jobs):
+        """Queue jobs returned by ``take`` again after a growing delay.
+
+        A newer job queued for the same key while this one ran takes its
+        place. Nothing is written, since running jobs are already on disk.
+        """
+        with self._cond:
+            now = time.monotonic()
+            for job in jobs:
+                for key, _ in job_keys(job):
+                    if self._running.get(key) is not job:
+                        continue
+                    del self._running[key]
+                    self._pending.setdefault(key, job)
+                    failures = self._failures.get(key, 0) + 1
+                    self._failures[key] = failures
+                    self._retry_at[key] = now + min(
+                        self.retry_delay * 2 ** (failures - 1),
+                        self.max_retry_delay
+                    )
+
+    def __len__(self):
+        with self._cond:
+            self._load()
+            return len(self._pending) + len(self._running)
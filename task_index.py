@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""Derived task indexes that TaskStore keeps in step with each write.
+
+An index is built from the full record list and then receives
+``(old_record, new_record)`` pairs for the tasks a write changed. ``apply``
+returns False when it cannot update incrementally; the store then drops the
+index and rebuilds it on next use.
+"""
+
+import datetime as dt
+
+
+def _int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def completed_datetime(record):
+    """Parse the ``completed_at`` of a completed task, or None."""
+    value = record.get('completed_at')
+    if record.get('completed') != 1 or not value:
+        return None
+    try:
+        return dt.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _ScoreNode:
+    __slots__ = ('own', 'completed', 'parent', 'children_score', 'effective')
+
+    def __init__(self, record):
+        self.own = _int(record.get('score'))
+        self.completed = record.get('completed') == 1
+        self.parent = _int(record.get('parent_id'))
+        self.children_score = 0
+        self.effective = self.own
+
+
+class ScoreIndex:
+    """Effective score = own score + effective scores of completed children.
+
+    A change only moves the contribution of one task between ancestor
+    chains, so complete, reopen, reparent and delete cost O(depth). The walk
+    up stops at the first open ancestor, because open tasks do not pass their
+    score on to their parent.
+    """
+
+    def __init__(self, records):
+        self._nodes = {}
+        self._children = {}
+        for record in records:
+            self._nodes[record['id']] = _ScoreNode(record)
+        for task_id, node in self._nodes.items():
+            self._link_child(task_id, node.parent)
+        self._rebuild(records)
+
+    def _rebuild(self, records):
+        # Mirrors annotate_effective_scores(), including its handling of a
+        # parent cycle, so that a rebuilt index matches a full recompute.
+        memo = {}
+
+        def effective_score(task_id, path):
+            if task_id in memo:
+                return memo[task_id]
+            node = self._nodes[task_id]
+            if task_id in path:
+                return node.own
+            child_score = 0
+            next_path = path | {task_id}
+            for child_id in self._linked_children(task_id):
+                if self._nodes[child_id].completed:
+                    child_score += effective_score(child_id, next_path)
+            node.children_score = child_score
+            node.effective = node.own + child_score
+            memo[task_id] = node.effective
+            return node.effective
+
+        for record in records:
+            effective_score(record['id'], set())
+
+    def _link_child(self, task_id, parent_id):
+        if parent_id > 0 and parent_id != task_id:
+            self._children.setdefault(parent_id, []).append(task_id)
+
+    def _unlink_child(self, task_id, parent_id):
+        children = self._children.get(parent_id)
+        if children and task_id in children:
+            children.remove(task_id)
+            if not children:
+                del self._children[parent_id]
+
+    def _linked_children(self, task_id):
+        return self._children.get(task_id, ()) if task_id in self._nodes else ()
+
+    def _linked_parent(self, task_id):
+        parent_id = self._nodes[task_id].parent
+        if parent_id > 0 and parent_id != task_id and parent_id in self._nodes:
+            return parent_id
+        return 0
+
+    def _contribution(self, task_id):
+        node = self._nodes[task_id]
+        if node.completed and self._linked_parent(task_id):
+            return node.effective
+        return 0
+
+    def _propagate(self, parent_id, delta):
+        seen = set()
+        while parent_id and delta:
+            if parent_id in seen:
+                return False
+            seen.add(parent_id)
+            node = self._nodes[parent_id]
+            node.children_score += delta
+            node.effective += delta
+            if not node.completed:
+                break
+            parent_id = self._linked_parent(parent_id)
+        return True
+
+    def _remove(self, task_id):
+        ok = self._propagate(self._linked_parent(task_id), -self._contribution(task_id))
+        self._unlink_child(task_id, self._nodes[task_id].parent)
+        del self._nodes[task_id]
+        return ok
+
+    def _insert(self, record):
+        task_id = record['id']
+        node = _ScoreNode(record)
+        self._nodes[task_id] = node
+        self._link_child(task_id, node.parent)
+        # Tasks that pointed at a missing parent with this id attach now.
+        node.children_score = sum(
+            self._contribution(child_id)
+            for child_id in self._linked_children(task_id)
+        )
+        node.effective = node.own + node.children_score
+        return self._propagate(self._linked_parent(task_id), self._contribution(task_id))
+
+    def _update(self, record):
+        task_id = record['id']
+        node = self._nodes[task_id]
+        updated = _ScoreNode(record)
+        if (
+            node.own == updated.own
+            and node.completed == updated.completed
+            and node.parent == updated.parent
+        ):
+            return True
+        ok = self._propagate(self._linked_parent(task_id), -self._contribution(task_id))
+        if node.parent != updated.parent:
+            self._unlink_child(task_id, node.parent)
+            self._link_child(task_id, updated.parent)
+        node.own = updated.own
+        node.completed = updated.completed
+        node.parent = updated.parent
+        node.effective = node.own + node.children_score
+        return self._propagate(self._linked_parent(task_id), self._contribution(task_id)) and ok
+
+    def apply(self, changes):
+        for old, new in changes:
+            if old is not None and old['id'] in self._nodes:
+                if new is None:
+                    ok = self._remove(old['id'])
+                else:
+                    ok = self._update(new)
+            elif new is not None:
+                if new['id'] in self._nodes:
+                    ok = self._update(new)
+                else:
+                    ok = self._insert(new)
+            else:
+                ok = True
+            if not ok:
+                return False
+        return True
+
+    def get(self, task_id):
+        node = self._nodes.get(task_id)
+        if node is None:
+            return None
+        return (node.own, node.children_score, node.effective)
+
+    def lookup(self, record):
+        """Like ``get``, but None unless ``record`` agrees with the index.
+
+        A caller that changed a task's score, completion or parent in memory
+        gets None and has to compute the scores itself.
+        """
+        node = self._nodes.get(record['id'])
+        if (
+            node is None
+            or node.own != _int(record.get('score'))
+            or node.completed != (record.get('completed') == 1)
+            or node.parent != _int(record.get('parent_id'))
+        ):
+            return None
+        return (node.own, node.children_score, node.effective)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def values(self):
+        return {
+            task_id: (node.own, node.children_score, node.effective)
+            for task_id, node in self._nodes.items()
+        }
+
+
+class CompletionIndex:
+    """Parsed ``completed_at`` of the completed tasks, keyed by task id.
+
+    Each value is parsed once, when the store builds the index or a write
+    changes the task, so bucketing completions by day does not parse them
+    again on every call.
+    """
+
+    def __init__(self, records):
+        self._done = {}
+        for record in records:
+            self._add(record)
+
+    def _add(self, record):
+        completed_at = completed_datetime(record)
+        if completed_at is not None:
+            self._done[record['id']] = (record['completed_at'], completed_at)
+
+    def apply(self, changes):
+        for old, new in changes:
+            if old is not None:
+                self._done.pop(old['id'], None)
+            if new is not None:
+                self._add(new)
+        return True
+
+    def get(self, task_id):
+        entry = self._done.get(task_id)
+        return None if entry is None else entry[1]
+
+    def lookup(self, record):
+        """Return the completion time of ``record``, parsing it only if needed.
+
+        A caller that changed a task's completion in memory still gets the
+        right value, because the stored one is used only while the
+        ``completed_at`` strings agree.
+        """
+        if record.get('completed') != 1:
+            return None
+        entry = self._done.get(record['id'])
+        if entry is not None and entry[0] == record.get('completed_at'):
+            return entry[1]
+        return completed_datetime(record)
+
+    def __len__(self):
+        return len(self._done)
+
+    def values(self):
+        return {task_id: completed_at for task_id, (_, completed_at) in self._done.items()}
+
+
+class TreeIndex:
+    """Parent/child structure with Euler-tour enter/exit positions.
+
+    ``is_descendant`` is O(1) and ``subtree_ids`` is O(subtree). With
+    ``active_only`` the tree holds only open tasks, and a task whose parent is
+    completed becomes a root, as on the index page. With ``sort_key`` siblings
+    are kept in that order, so ``children`` and ``subtree_ids`` follow it;
+    otherwise they follow the record order. The index is never mutated: any
+    change to membership, to a parent link or to a sort key makes ``apply``
+    fail so that the store rebuilds it, and other changes keep it as is.
+    """
+
+    def __init__(self, records, active_only=False, sort_key=None):
+        self.active_only = active_only
+        self.size = len(records)
+        self._sort_key = sort_key
+        self._positions = {}
+        members = []
+        for position, record in enumerate(records):
+            if active_only and record.get('completed') != 0:
+                continue
+            self._positions[record['id']] = position
+            members.append(record['id'])
+
+        self._parent = {}
+        self._children = {}
+        for task_id in members:
+            parent_id = _int(records[self._positions[task_id]].get('parent_id'))
+            if parent_id != task_id and parent_id in self._positions:
+                self._parent[task_id] = parent_id
+                self._children.setdefault(parent_id, []).append(task_id)
+        if sort_key is not None:
+            record_key = lambda task_id: sort_key(records[self._positions[task_id]])
+            for children in self._children.values():
+                children.sort(key=record_key)
+            members.sort(key=record_key)
+
+        self._enter = {}
+        self._exit = {}
+        self._order = []
+        roots = [task_id for task_id in members if task_id not in self._parent]
+        # Tasks on a parent cycle are not reachable from any root.
+        for root in roots + members:
+            if root not in self._enter:
+                self._walk(root)
+
+    def _walk(self, root):
+        self._enter[root] = len(self._order)
+        self._order.append(root)
+        stack = [(root, iter(self._children.get(root, ())))]
+        while stack:
+            task_id, children = stack[-1]
+            child_id = next(children, None)
+            if child_id is None:
+                self._exit[task_id] = len(self._order) - 1
+                stack.pop()
+                continue
+            if child_id in self._enter:
+                continue
+            self._enter[child_id] = len(self._order)
+            self._order.append(child_id)
+            stack.append((child_id, iter(self._children.get(child_id, ()))))
+
+    def apply(self, changes):
+        for old, new in changes:
+            if old is None or new is None:
+                return False
+            if old.get('parent_id') != new.get('parent_id'):
+                return False
+            if self.active_only and old.get('completed') != new.get('completed'):
+                return False
+            if self._sort_key is not None and self._sort_key(old) != self._sort_key(new):
+                return False
+        return True
+
+    def values(self):
+        # Immutable once built, so callers may share it without copying.
+        return self
+
+    def __contains__(self, task_id):
+        return task_id in self._enter
+
+    def position(self, task_id):
+        return self._positions.get(task_id)
+
+    def parent(self, task_id):
+        return self._parent.get(task_id)
+
+    def children(self, task_id):
+        return list(self._children.get(task_id, ()))
+
+    def is_descendant(self, task_id, ancestor_id, inclusive=True):
+        if task_id == ancestor_id:
+            return inclusive
+        if task_id not in self._enter or ancestor_id not in self._enter:
+            return False
+        return self._enter[ancestor_id] < self._enter[task_id] <= self._exit[ancestor_id]
+
+    def subtree_ids(self, task_id):
+        if task_id not in self._enter:
+            return []
+        return self._order[self._enter[task_id] + 1:self._exit[task_id] + 1]
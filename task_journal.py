@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""Append-only log of task mutations layered on top of tasks.csv."""
+
+import hashlib
+import json
+import os
+import time
+
+
+def content_digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+class TaskJournal:
+    """Record row-level task changes instead of rewriting the whole CSV.
+
+    The first line of the journal names the SHA-1 of the tasks.csv it applies
+    to. A compaction writes a new CSV first and removes the journal second, so
+    a crash in between leaves a journal whose base no longer matches and is
+    ignored rather than replayed twice.
+
+    An append interrupted by a crash leaves a last line without a newline.
+    Replay ignores it, and the next append first cuts the file back to the
+    last complete line so that the new entry does not land on the torn one.
+    """
+
+    format_name = 'tasklist-task-journal'
+    format_version = 1
+
+    def __init__(self, path, coordinator, max_bytes=256 * 1024,
+                 max_age_seconds=6 * 60 * 60):
+        self.path = path
+        self.coordinator = coordinator
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.base_digest = None
+        self._active = False
+        self._created_at = 0.0
+        self._seq = 0
+        self._complete_size = None
+
+    @staticmethod
+    def _row_key(row):
+        return (row.get('id') or '').strip()
+
+    def _read_entries(self):
+        """Return the entries on complete lines and the size of those lines.
+
+        Bytes after the last newline are an interrupted append and are left
+        out. A complete line that does not parse is skipped, so one damaged
+        line does not hide the entries after it.
+        """
+        try:
+            with open(self.path, 'rb') as file_obj:
+                data = file_obj.read()
+        except FileNotFoundError:
+            return [], None
+        complete_size = data.rfind(b'\n') + 1
+        entries = []
+        for line in data[:complete_size].splitlines():
+            try:
+                entry = json.loads(line.decode('utf-8')) if line.strip() else None
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                continue
+            if isinstance(entry, dict):
+                entries.append(entry)
+        return entries, complete_size if complete_size < len(data) else None
+
+    def replay(self, rows, base_digest):
+        """Apply the journaled changes to ``rows`` read from ``base_digest``."""
+        self.base_digest = base_digest
+        self._active = False
+        self._created_at = 0.0
+        self._seq = 0
+
+        entries, self._complete_size = self._read_entries()
+        if not entries:
+            return rows
+        header = entries[0]
+        if (
+            header.get('format') != self.format_name
+            or header.get('version') != self.format_version
+            or header.get('base') != base_digest
+        ):
+            return rows
+
+        self._active = True
+        self._created_at = float(header.get('created_at') or 0)
+
+        rows = list(rows)
+        positions = {}
+        for index, row in enumerate(rows):
+            positions.setdefault(self._row_key(row), []).append(index)
+
+        for entry in entries[1:]:
+            self._seq = max(self._seq, int(entry.get('seq') or 0))
+            for task_id in entry.get('delete') or []:
+                for index in positions.pop(str(task_id), []):
+                    rows[index] = None
+            for row in entry.get('upsert') or []:
+                if not isinstance(row, dict):
+                    continue
+                key = self._row_key(row)
+                indexes = positions.get(key)
+                if indexes:
+                    rows[indexes[0]] = row
+                    for index in indexes[1:]:
+                        rows[index] = None
+                    positions[key] = indexes[:1]
+                else:
+                    positions[key] = [len(rows)]
+                    rows.append(row)
+
+        return [row for row in rows if row is not None]
+
+    def needs_compaction(self):
+        if not self._active:
+            return False
+        if time.time() - self._created_at > self.max_age_seconds:
+            return True
+        try:
+            return os.path.getsize(self.path) > self.max_bytes
+        except OSError:
+            return False
+
+    def append(self, op, upserts, deletes):
+        if not self._active:
+            header = {
+                'format': self.format_name,
+                'version': self.format_version,
+                'base': self.base_digest,
+                'created_at': time.time(),
+            }
+            # A journal for an older CSV is stale and must not be appended to.
+            self.coordinator.atomic_write_data_file(
+                self.path,
+                lambda file_obj: file_obj.write(json.dumps(header) + '\n'),
+                create_backup=False
+            )
+            self._active = True
+            self._created_at = header['created_at']
+            self._seq = 0
+            self._complete_size = None
+        elif self._complete_size is not None:
+            self.coordinator.truncate_data_file(self.path, self._complete_size)
+            self._complete_size = None
+
+        self._seq += 1
+        entry = {
+            'seq': self._seq,
+            'op': op,
+            'at': time.time(),
+            'upsert': upserts,
+            'delete': deletes,
+        }
+        self.coordinator.append_data_text(
+            self.path,
+            json.dumps(entry, ensure_ascii=False) + '\n'
+        )
+
+    def reset(self, base_digest):
+        """Forget the journal after its changes were compacted into the CSV."""
+        self.coordinator.remove_data_file(self.path)
+        self.base_digest = base_digest
+        self._active = False
+        self._created_at = 0.0
+        self._seq = 0
+        self._complete_size = None
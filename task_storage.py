@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""Storage backends for task and tag rows.
+
+Backends exchange tasks as CSV-style rows: dictionaries of strings keyed by
+the task field names. Parsing and sanitizing those rows stays in app.py, so
+every backend round-trips exactly what tasks.csv would contain.
+"""
+
+import argparse
+import csv
+import io
+import os
+import sqlite3
+import sys
+import threading
+
+from task_journal import content_digest
+
+TASK_FIELDS = [
+    'id', 'title', 'tag', 'score', 'base_score',
+    'extension_count', 'link_bonus_awarded', 'sort_order', 'due_date',
+    'completed', 'completed_at', 'parent_id', 'recur',
+    'google_task_id', 'sync_pending'
+]
+
+
+def normalize_row(row, fields):
+    return {field: '' if row.get(field) is None else str(row.get(field)) for field in fields}
+
+
+def read_tags_csv(path):
+    with open(path, 'r', newline='', encoding='utf-8-sig') as file_obj:
+        return [row['tag'] for row in csv.DictReader(file_obj)]
+
+
+def write_tags_csv(file_obj, tags):
+    writer = csv.writer(file_obj)
+    writer.writerow(['tag'])
+    for tag in tags:
+        writer.writerow([tag])
+
+
+class CsvTaskStorage:
+    """tasks.csv and tags.csv, with single-row changes kept in a journal."""
+
+    name = 'csv'
+
+    def __init__(self, tasks_path, tags_path, fields, coordinator, journal):
+        self.tasks_path = tasks_path
+        self.tags_path = tags_path
+        self.fields = list(fields)
+        self.coordinator = coordinator
+        self.journal = journal
+
+    @property
+    def paths(self):
+        return (self.tasks_path, self.journal.path)
+
+    def ensure(self):
+        if not os.path.exists(self.tags_path):
+            self.coordinator.atomic_write_data_file(
+                self.tags_path,
+                lambda file_obj: write_tags_csv(file_obj, ['マイタスク']),
+                create_backup=False
+            )
+        if not os.path.exists(self.tasks_path):
+            self.coordinator.atomic_write_data_file(
+                self.tasks_path,
+                lambda file_obj: csv.DictWriter(
+                    file_obj,
+                    fieldnames=self.fields
+                ).writeheader(),
+                create_backup=False
+            )
+
+    def load_task_rows(self):
+        with open(self.tasks_path, 'rb') as file_obj:
+            data = file_obj.read()
+        rows = csv.DictReader(io.StringIO(data.decode('utf-8-sig'), newline=''))
+        return self.journal.replay(list(rows), content_digest(data))
+
+    def save_task_rows(self, rows, upserts, deletes, journal_op=None):
+        if journal_op and not self.journal.needs_compaction():
+            if upserts or deletes:
+                self.journal.append(journal_op, upserts, deletes)
+            return
+
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=self.fields)
+        writer.writeheader()
+        writer.writerows(rows)
+        text = buf.getvalue()
+        self.coordinator.atomic_write_data_file(
+            self.tasks_path,
+            lambda file_obj: file_obj.write(text)
+        )
+        # The new CSV already contains every journaled change.
+        self.journal.reset(content_digest(text.encode('utf-8')))
+
+    def load_tags(self):
+        return read_tags_csv(self.tags_path)
+
+    def save_tags(self, tags):
+        self.coordinator.atomic_write_data_file(
+            self.tags_path,
+            lambda file_obj: write_tags_csv(file_obj, tags)
+        )
+
+
+OBSOLETE_INDEXES = ('tasks_completed_due', 'tasks_parent_due', 'tasks_google_task_id')
+
+
+class SqliteTaskStorage:
+    """A single SQLite database in WAL mode.
+
+    Columns are stored as TEXT so that importing and exporting tasks.csv is
+    lossless. Rows are updated and deleted by id, which is the only index.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, db_path, fields, import_task_rows=None, import_tags=None):
+        self.db_path = db_path
+        self.fields = list(fields)
+        self._import_task_rows = import_task_rows
+        self._import_tags = import_tags
+        self._lock = threading.RLock()
+        self._conn = None
+
+    @property
+    def paths(self):
+        return (self.db_path, f'{self.db_path}-wal')
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            columns = ', '.join(
+                f'"{field}" TEXT NOT NULL DEFAULT \'\'' for field in self.fields
+            )
+            with conn:
+                conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS tasks (seq INTEGER PRIMARY KEY, {columns})'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS tasks_id ON tasks (id)')
+                # Reads load every row into the TaskStore, which answers the
+                # open/children/due-date lookups in memory, so only writes by
+                # id need an index. Drop the ones older databases created.
+                for index_name in OBSOLETE_INDEXES:
+                    conn.execute(f'DROP INDEX IF EXISTS {index_name}')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS tags '
+                    '(seq INTEGER PRIMARY KEY, tag TEXT NOT NULL)'
+                )
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS meta '
+                    '(key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+                )
+            self._conn = conn
+        return self._conn
+
+    def _meta(self, conn, key):
+        row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def ensure(self):
+        with self._lock:
+            conn = self._connect()
+            if self._meta(conn, 'initialized'):
+                return
+            task_rows = self._import_task_rows() if self._import_task_rows else []
+            tags = self._import_tags() if self._import_tags else []
+            with conn:
+                self._insert_task_rows(conn, task_rows)
+                self._replace_tags(conn, tags or ['マイタスク'])
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('initialized', '1')"
+                )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _insert_task_rows(self, conn, rows):
+        columns = ', '.join(f'"{field}"' for field in self.fields)
+        placeholders = ', '.join('?' for _ in self.fields)
+        conn.executemany(
+            f'INSERT INTO tasks ({columns}) VALUES ({placeholders})',
+            (
+                [normalize_row(row, self.fields)[field] for field in self.fields]
+                for row in rows
+            )
+        )
+
+    def _replace_tags(self, conn, tags):
+        conn.execute('DELETE FROM tags')
+        conn.executemany('INSERT INTO tags (tag) VALUES (?)', ((tag,) for tag in tags))
+
+    def load_task_rows(self):
+        with self._lock:
+            conn = self._connect()
+            columns = ', '.join(f'"{field}"' for field in self.fields)
+            cursor = conn.execute(f'SELECT {columns} FROM tasks ORDER BY seq')
+            return [dict(zip(self.fields, values)) for values in cursor]
+
+    def save_task_rows(self, rows, upserts, deletes, journal_op=None):
+        assignments = ', '.join(f'"{field}" = ?' for field in self.fields)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    'DELETE FROM tasks WHERE id = ?',
+                    ((str(task_id),) for task_id in deletes)
+                )
+                for row in upserts:
+                    row = normalize_row(row, self.fields)
+                    values = [row[field] for field in self.fields]
+                    cursor = conn.execute(
+                        f'UPDATE tasks SET {assignments} WHERE id = ?',
+                        values + [row['id']]
+                    )
+                    if cursor.rowcount == 0:
+                        self._insert_task_rows(conn, [row])
+
+    def load_tags(self):
+        with self._lock:
+            conn = self._connect()
+            return [row[0] for row in conn.execute('SELECT tag FROM tags ORDER BY seq')]
+
+    def save_tags(self, tags):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._replace_tags(conn, tags)
+
+    def import_csv(self, tasks_path, tags_path=None):
+        """Replace the database contents with tasks.csv (and tags.csv)."""
+        with open(tasks_path, 'r', newline='', encoding='utf-8-sig') as file_obj:
+            rows = list(csv.DictReader(file_obj))
+        tags = read_tags_csv(tags_path) if tags_path else None
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute('DELETE FROM tasks')
+                self._insert_task_rows(conn, rows)
+                if tags is not None:
+                    self._replace_tags(conn, tags)
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('initialized', '1')"
+                )
+        return len(rows)
+
+    def export_csv(self, tasks_path, tags_path=None):
+        rows = self.load_task_rows()
+        with open(tasks_path, 'w', newline='', encoding='utf-8') as file_obj:
+            writer = csv.DictWriter(file_obj, fieldnames=self.fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        if tags_path:
+            with open(tags_path, 'w', newline='', encoding='utf-8') as file_obj:
+                write_tags_csv(file_obj, self.load_tags())
+        return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Copy tasks between CSV and SQLite.')
+    parser.add_argument('command', choices=('import', 'export'))
+    parser.add_argument('database')
+    parser.add_argument('tasks_csv')
+    parser.add_argument('--tags-csv')
+    args = parser.parse_args(argv)
+
+    storage = SqliteTaskStorage(args.database, TASK_FIELDS)
+    try:
+        if args.command == 'import':
+            count = storage.import_csv(args.tasks_csv, args.tags_csv)
+        else:
+            count = storage.export_csv(args.tasks_csv, args.tags_csv)
+    finally:
+        storage.close()
+    print(f'{args.command}: {count} tasks')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""Process-wide cache of parsed tasks, invalidated by the data file signatures."""
+
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+
+def file_signature(path):
+    """Return ``(mtime_ns, size, inode)`` for ``path`` or ``None`` if missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class TaskSnapshot(list):
+    """A private copy of the cached tasks that remembers its store version.
+
+    Callers freely annotate and mutate the task dictionaries, so every
+    snapshot copies each record. The values are immutable scalars, which keeps
+    a shallow per-task copy safe and much cheaper than parsing the CSV again.
+    """
+
+    def __init__(self, records=(), version=None):
+        super().__init__(dict(record) for record in records)
+        self.version = version
+
+
+class TaskStore:
+    def __init__(self, paths, loader, indexes=None):
+        self.paths = (paths,) if isinstance(paths, str) else tuple(paths)
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._signature = None
+        self._records = None
+        self._version = 0
+        self._index_factories = dict(indexes or {})
+        self._indexes = {}
+
+    @property
+    def version(self):
+        return self._version
+
+    def token(self, include_version=True):
+        """Return a short string that changes whenever the stored tasks change.
+
+        Unlike ``version`` it also differs between processes, because it
+        includes the file signatures, so it can key HTTP caches. Without
+        ``include_version`` it depends on the files alone and stays the same
+        across restarts, which suits state saved next to the data. It is then
+        taken from the files directly and never loads the tasks.
+        """
+        if not include_version:
+            key = self._signature_now()
+        else:
+            with self._lock:
+                self._revalidate()
+                key = (self._signature, self._version)
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+
+    def _signature_now(self):
+        return tuple(file_signature(path) for path in self.paths)
+
+    def _revalidate(self):
+        signature = self._signature_now()
+        if self._records is not None and signature == self._signature:
+            return
+        # The signature is taken before parsing. If the file is replaced while
+        # it is being read, the next call sees a different signature and
+        # reloads instead of trusting a half-old cache.
+        self._records = [dict(record) for record in self._loader()]
+        self._signature = signature
+        self._version += 1
+        self._indexes.clear()
+
+    def snapshot(self):
+        with self._lock:
+            self._revalidate()
+            return TaskSnapshot(self._records, self._version)
+
+    def peek(self):
+        """Return the cached records themselves. Callers must not mutate them."""
+        with self._lock:
+            self._revalidate()
+            return self._records
+
+    def replace(self, records, changed_ids=None):
+        """Adopt ``records`` that were just written to the data files.
+
+        ``changed_ids`` lists the task ids the write inserted, updated or
+        deleted. With it, derived indexes are updated in place; without it
+        they are rebuilt on next use.
+        """
+        with self._lock:
+            records = [dict(record) for record in records]
+            if changed_ids is None or self._records is None:
+                self._indexes.clear()
+            elif self._indexes:
+                old_by_id = {record['id']: record for record in self._records}
+                new_by_id = {record['id']: record for record in records}
+                changes = [
+                    (old_by_id.get(task_id), new_by_id.get(task_id))
+                    for task_id in changed_ids
+                ]
+                for name, index in list(self._indexes.items()):
+                    if not index.apply(changes):
+                        del self._indexes[name]
+            self._records = records
+            self._signature = self._signature_now()
+            self._version += 1
+            return self._version
+
+    def _index(self, name, version):
+        if self._records is None or version != self._version:
+            return None
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._index_factories[name](self._records)
+            self._indexes[name] = index
+        return index
+
+    def index_values(self, name, version):
+        """Return a copy of index ``name`` if ``version`` is still current."""
+        with self._lock:
+            index = self._index(name, version)
+            return None if index is None else index.values()
+
+    @contextmanager
+    def index_view(self, name, version):
+        """Yield index ``name`` itself if ``version`` is still current, else None.
+
+        Nothing is copied. The store lock is held until the block ends, so a
+        write cannot update the index while it is being read; values read from
+        it should not be kept past the block.
+        """
+        with self._lock:
+            yield self._index(name, version)
+
+    def invalidate(self):
+        with self._lock:
+            self._records = None
+            self._signature = None
+            self._indexes.clear()
@@ -0,0 +1,67 @@
+"""Load app.py against a throwaway data directory for tests."""
+
+import importlib.util
+import os
+from pathlib import Path
+import shutil
+import unittest
+import uuid
+
+APP_PATH = Path(__file__).with_name('app.py')
+RUNTIME_DIR = Path(__file__).with_name('.test-runtime-app')
+
+
+def load_app(module_name, data_dir):
+    """Import a fresh copy of app.py that keeps its data in ``data_dir``.
+
+    Shared (Google Drive) mode stays off, so no lease or heartbeat runs, and
+    Google sync is disabled. The environment is restored afterwards.
+    """
+    overrides = {
+        'GOOGLE_SYNC_ENABLED': '0',
+        'TASKLIST_DATA_DIR': str(data_dir),
+        'TASKLIST_SHARED_DATA': '0',
+        'TASKLIST_STORAGE_BACKEND': 'csv',
+    }
+    previous = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return module
+
+
+class AppDataTestCase(unittest.TestCase):
+    """Loads app.py once per class with a data directory of its own.
+
+    Subclasses set ``module_name``. Every test starts from an empty
+    tasks.csv; tags.csv holds ``tags``.
+    """
+
+    module_name = None
+    tags = ('マイタスク',)
+
+    @classmethod
+    def setUpClass(cls):
+        RUNTIME_DIR.mkdir(exist_ok=True)
+        cls.data_dir = RUNTIME_DIR / f'{cls.module_name}-{uuid.uuid4().hex}'
+        cls.data_dir.mkdir()
+        cls.tasklist = load_app(cls.module_name, cls.data_dir)
+        (cls.data_dir / 'tags.csv').write_text(
+            ''.join(f'{tag}\n' for tag in ('tag', *cls.tags)), encoding='utf-8'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.data_dir, ignore_errors=True)
+
+    def setUp(self):
+        header = ','.join(self.tasklist.TASK_FIELDS) + '\n'
+        (self.data_dir / 'tasks.csv').write_text(header, encoding='utf-8')
@@ -0,0 +1,112 @@
+import threading
+import unittest
+from unittest import mock
+
+import codex_task_client
+from tasklist_testing import AppDataTestCase
+
+LOCAL = {'REMOTE_ADDR': '127.0.0.1'}
+
+
+class BulkDeleteTests(AppDataTestCase):
+    module_name = 'tasklist_bulk_delete_tests'
+
+    def setUp(self):
+        super().setUp()
+        tasklist = self.tasklist
+        # 1 ─ 2 ─ 3,  4 ─ 5,  6
+        self.ids = {}
+        for name, parent in (('1', ''), ('2', '1'), ('3', '2'), ('4', ''), ('5', '4'), ('6', '')):
+            parent_id = str(self.ids[parent]) if parent else ''
+            self.ids[name] = tasklist.create_local_task(title=f'task {name}', parent_id=parent_id)['id']
+        self.client = tasklist.app.test_client()
+
+    def remaining_ids(self):
+        return sorted(task['id'] for task in self.tasklist.read_tasks())
+
+    def post_delete(self, payload):
+        return self.client.post('/api/codex/tasks/delete', json=payload, environ_base=LOCAL)
+
+    def test_several_roots_are_removed_in_one_locked_write(self):
+        tasklist = self.tasklist
+        write_tasks = tasklist.write_tasks
+        writes = []
+
+        def locked_write(tasks, op=None):
+            # Another thread cannot take the lock while the delete holds it.
+            probe = []
+
+            def try_lock():
+                probe.append(tasklist.TASKS_LOCK.acquire(blocking=False))
+                if probe[0]:
+                    tasklist.TASKS_LOCK.release()
+
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            writes.append((op, probe[0]))
+            write_tasks(tasks, op=op)
+
+        with mock.patch.object(tasklist, 'write_tasks', side_effect=locked_write):
+            response = self.post_delete({'ids': [self.ids['1'], self.ids['4']]})
+
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(
+            data['deleted_ids'],
+            sorted(self.ids[name] for name in ('1', '2', '3', '4', '5'))
+        )
+        self.assertEqual(writes, [('delete', False)])
+        self.assertEqual(self.remaining_ids(), [self.ids['6']])
+
+    def test_duplicate_and_nested_roots_are_deleted_once(self):
+        response = self.post_delete({
+            'ids': [self.ids['2'], self.ids['1'], self.ids['3'], self.ids['1'], 999]
+        })
+
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['deleted_ids'], sorted(self.ids[name] for name in ('1', '2', '3')))
+        self.assertEqual(self.remaining_ids(), [self.ids['4'], self.ids['5'], self.ids['6']])
+
+    def test_bad_input_is_400_and_unknown_ids_are_404(self):
+        for payload in ({}, {'ids': []}, {'ids': 'abc'}, {'ids': [1, 'x']}):
+            with self.subTest(payload=payload):
+                self.assertEqual(self.post_delete(payload).status_code, 400)
+
+        response = self.post_delete({'ids': [998, 999]})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.get_json()['ok'])
+        self.assertEqual(len(self.remaining_ids()), 6)
+
+    def test_google_deletes_for_a_subtree_are_one_job(self):
+        tasklist = self.tasklist
+        tasks = tasklist.read_tasks()
+        for task in tasks:
+            task['google_task_id'] = f'g-{task["id"]}'
+        tasklist.write_tasks(tasks)
+
+        with mock.patch.object(tasklist, 'GOOGLE_SYNC_ENABLED', True), \
+                mock.patch.object(tasklist, 'enqueue_sync_job') as enqueue:
+            tasklist.delete_local_tasks([self.ids['1']])
+
+        enqueue.assert_called_once()
+        job = enqueue.call_args.args[0]
+        self.assertEqual(job['action'], 'delete_google_tasks')
+        self.assertEqual(
+            sorted(job['google_task_ids']),
+            sorted(f'g-{self.ids[name]}' for name in ('1', '2', '3'))
+        )
+
+
+class ClientTests(unittest.TestCase):
+    def test_delete_command_posts_all_ids_at_once(self):
+        args = codex_task_client.build_parser().parse_args(['delete', '3', '5'])
+        with mock.patch.object(codex_task_client, 'api_request', return_value={'ok': True}) as api_request:
+            codex_task_client.run_command(args)
+        api_request.assert_called_once_with('POST', 'tasks/delete', {'ids': [3, 5]})
+
+
+if __name__ == '__main__':
+    unittest.main()
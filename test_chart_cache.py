@@ -0,0 +1,147 @@
+import datetime as dt
+import importlib.util
+import os
+from pathlib import Path
+import threading
+import unittest
+from unittest import mock
+
+
+APP_PATH = Path(__file__).with_name('app.py')
+os.environ['GOOGLE_SYNC_ENABLED'] = '0'
+
+
+def load_app(module_name):
+    spec = importlib.util.spec_from_file_location(module_name, APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+tasklist = load_app('tasklist_chart_cache_tests')
+
+
+class ChartPrerenderTests(unittest.TestCase):
+    def setUp(self):
+        tasklist.CHART_CACHE.clear()
+        self.addCleanup(tasklist.CHART_CACHE.clear)
+        self.version = 'v1'
+        self.rendered = []
+
+        def renderer(name):
+            def render(tasks):
+                self.rendered.append(name)
+                return f'{name}:{self.version}'.encode('ascii')
+            return render
+
+        patches = [
+            mock.patch.object(tasklist, 'read_tasks', return_value=[]),
+            mock.patch.object(tasklist, 'get_chart_version', side_effect=lambda: self.version),
+            mock.patch.dict(tasklist.CHART_RENDERERS, {
+                'last_14': renderer('last_14'),
+                'today_progress': renderer('today_progress'),
+            }),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_prerender_redraws_only_charts_that_were_shown(self):
+        tasklist.get_chart_png_bytes('today_progress')
+        self.version = 'v2'
+
+        tasklist.prerender_charts()
+        self.assertEqual(self.rendered, ['today_progress', 'today_progress'])
+
+        # The next request is served from the cache.
+        _, png = tasklist.get_chart_png_bytes('today_progress')
+        self.assertEqual(png, b'today_progress:v2')
+        self.assertEqual(len(self.rendered), 2)
+
+    def test_writes_in_quick_succession_prerender_once(self):
+        done = threading.Event()
+        calls = []
+
+        def prerender():
+            calls.append(1)
+            done.set()
+
+        with mock.patch.object(tasklist, 'prerender_charts', side_effect=prerender):
+            for _ in range(5):
+                tasklist.schedule_chart_prerender(delay_sec=0.05)
+            self.assertTrue(done.wait(2))
+            tasklist.CHART_PRERENDER_TIMER.join(1)
+        self.assertEqual(calls, [1])
+
+    def test_negative_delay_disables_prerender(self):
+        self.assertIsNone(tasklist.schedule_chart_prerender(delay_sec=-1))
+
+
+def make_task(task_id, score, completed_at='', parent_id=''):
+    return {
+        'id': task_id,
+        'title': f'task {task_id}',
+        'tag': 'マイタスク',
+        'score': score,
+        'completed': 1 if completed_at else 0,
+        'completed_at': completed_at,
+        'parent_id': parent_id,
+    }
+
+
+class ChartDataTests(unittest.TestCase):
+    def setUp(self):
+        now = dt.datetime.now().replace(microsecond=0)
+        yesterday = now - dt.timedelta(days=1)
+        self.tasks = [
+            make_task(1, 30, (now - dt.timedelta(seconds=10)).isoformat(sep=' ')),
+            make_task(2, 60, (now - dt.timedelta(seconds=20)).isoformat(sep=' '), parent_id='1'),
+            make_task(3, 100, yesterday.isoformat(sep=' ')),
+            make_task(4, 30),
+        ]
+        patches = [
+            mock.patch.object(tasklist, 'read_tasks', side_effect=lambda: [dict(t) for t in self.tasks]),
+            mock.patch.object(tasklist, 'get_chart_version', return_value='v1'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client = tasklist.app.test_client()
+
+    def test_today_endpoint_lists_tasks_in_completion_order(self):
+        data = self.client.get('/api/charts/today').get_json()
+        self.assertEqual(
+            [(task['id'], task['score']) for task in data['tasks']],
+            [(2, 60), (1, 90)]
+        )
+        self.assertEqual(data['total'], 150)
+
+    def test_last14_endpoint_matches_the_page_total(self):
+        data = self.client.get('/api/charts/last14').get_json()
+        self.assertEqual(len(data['days']), 14)
+        self.assertEqual(data['days'][-1], data['today'])
+        self.assertEqual(data['total'], sum(data['sums']))
+        self.assertEqual(data['total'], tasklist.score_total_last_14_days(tasklist.read_tasks()))
+        self.assertEqual([task['id'] for task in data['stacks'][0]['tasks']], [3])
+
+    def test_unchanged_data_answers_304(self):
+        etag = self.client.get('/api/charts/today').headers['ETag']
+        response = self.client.get('/api/charts/today', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_png_bytes_are_passed_through_unchanged(self):
+        png = b'\x89PNG raw'
+        with mock.patch.object(tasklist.CHART_POOL, 'render', return_value=png) as render:
+            self.assertIs(tasklist.chart_today_progress_png_bytes(tasklist.read_tasks()), png)
+            self.assertIs(tasklist.chart_last_14_days_png_bytes(tasklist.read_tasks()), png)
+        self.assertEqual(render.call_args_list[0].args, ('render_today_progress', [('task 2', 60), ('task 1', 90)]))
+
+    def test_chart_mode_can_be_chosen_per_request(self):
+        with tasklist.app.test_request_context('/?charts=svg'):
+            self.assertEqual(tasklist.chart_mode(), 'svg')
+        with tasklist.app.test_request_context('/?charts=gif'):
+            self.assertEqual(tasklist.chart_mode(), 'png')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import datetime as dt
+import unittest
+from unittest import mock
+
+from concurrent.futures.process import BrokenProcessPool
+
+import chart_pool
+from chart_pool import ChartRenderPool
+
+
+TODAY_ITEMS = [('レポート', 30), ('買い物', 60)]
+
+
+class ChartRenderPoolTests(unittest.TestCase):
+    def test_worker_output_matches_in_process_rendering(self):
+        pool = ChartRenderPool(workers=1, timeout=120)
+        self.addCleanup(pool.shutdown)
+
+        days = [dt.date(2026, 1, 1) + dt.timedelta(days=i) for i in range(14)]
+        args = (days, list(range(14)), days[-2:], {days[-1]: [('a', 30)]}, days[-1])
+        for function_name, function_args in (
+            ('render_today_progress', (TODAY_ITEMS,)),
+            ('render_last_14_days', args),
+        ):
+            with self.subTest(function_name):
+                png = pool.render(function_name, *function_args)
+                self.assertTrue(png.startswith(b'\x89PNG'))
+                self.assertEqual(png, pool.render_local(function_name, *function_args))
+
+    def test_disabled_pool_draws_in_process(self):
+        pool = ChartRenderPool(workers=0)
+        with mock.patch.object(chart_pool, 'ProcessPoolExecutor') as executor:
+            png = pool.render('render_today_progress', TODAY_ITEMS)
+        executor.assert_not_called()
+        self.assertTrue(png.startswith(b'\x89PNG'))
+
+    def test_broken_pool_falls_back_and_is_eventually_turned_off(self):
+        pool = ChartRenderPool(workers=1, max_restarts=1)
+        broken = mock.Mock()
+        broken.submit.return_value.result.side_effect = BrokenProcessPool('worker died')
+
+        with mock.patch.object(chart_pool, 'ProcessPoolExecutor', return_value=broken), \
+                mock.patch.object(pool, 'render_local', return_value=b'png') as render_local, \
+                self.assertLogs(pool.logger, 'ERROR'):
+            self.assertEqual(pool.render('render_today_progress', TODAY_ITEMS), b'png')
+            self.assertTrue(pool.enabled)
+            self.assertEqual(pool.render('render_today_progress', TODAY_ITEMS), b'png')
+
+        self.assertFalse(pool.enabled)
+        self.assertEqual(render_local.call_count, 2)
+        self.assertEqual(broken.shutdown.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
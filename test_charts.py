@@ -0,0 +1,54 @@
+import datetime as dt
+import unittest
+
+import charts
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class ChartRenderingTests(unittest.TestCase):
+    def test_last_14_days_renders_png(self):
+        today = dt.date(2026, 1, 14)
+        days = [today - dt.timedelta(days=i) for i in range(13, -1, -1)]
+        yesterday = today - dt.timedelta(days=1)
+        png = charts.render_last_14_days(
+            days,
+            [0] * 12 + [30, 90],
+            [yesterday, today],
+            {yesterday: [('昨日のタスク', 30)], today: [('今日のタスク', 60), ('別のタスク', 30)]},
+            today
+        )
+        self.assertTrue(png.startswith(PNG_SIGNATURE))
+
+    def test_today_progress_renders_empty_and_filled_days(self):
+        self.assertTrue(charts.render_today_progress([]).startswith(PNG_SIGNATURE))
+        png = charts.render_today_progress([('とても長いタイトルのタスク' * 3, 60), ('短い', 30)])
+        self.assertTrue(png.startswith(PNG_SIGNATURE))
+
+    def test_busy_days_fold_older_tasks_into_a_summary_row(self):
+        items = [(f'task {i}', 30) for i in range(20)]
+        rows, scores, cumulative = charts.today_progress_rows(items, max_rows=5)
+
+        self.assertEqual([row[0] for row in rows], ['ほか 16 件', 'task 16', 'task 17', 'task 18', 'task 19'])
+        self.assertEqual(list(scores), [480, 30, 30, 30, 30])
+        self.assertEqual(cumulative[-1], 600)
+        self.assertTrue(charts.render_today_progress(items, max_rows=5).startswith(PNG_SIGNATURE))
+
+    def test_cumulative_rows_repeat_earlier_segments(self):
+        _, scores, cumulative = charts.today_progress_rows([('a', 30), ('b', 0), ('c', 60)])
+        polygons, cols = charts.cumulative_bar_polygons(scores, cumulative, height=0.5)
+
+        # Rows 0..2 hold 1, 1 and 2 segments once the zero score is skipped.
+        self.assertEqual(list(cols), [0, 0, 0, 2])
+        self.assertEqual(polygons.shape, (4, 4, 2))
+        self.assertEqual(list(polygons[-1][:, 0]), [30, 90, 90, 30])
+        self.assertEqual(list(polygons[-1][:, 1]), [1.75, 1.75, 2.25, 2.25])
+
+    def test_wrap_label_counts_wide_characters_twice(self):
+        self.assertEqual(charts.wrap_label('あいうえお', max_width=4, max_lines=2), 'あい\nうえ…')
+        self.assertEqual(charts.wrap_label('abc', max_width=4), 'abc')
+
+
+if __name__ == '__main__':
+    unittest.main()
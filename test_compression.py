@@ -0,0 +1,80 @@
+import datetime as dt
+import gzip
+import importlib.util
+import os
+from pathlib import Path
+import unittest
+from unittest import mock
+
+
+APP_PATH = Path(__file__).with_name('app.py')
+os.environ['GOOGLE_SYNC_ENABLED'] = '0'
+
+
+def load_app(module_name):
+    spec = importlib.util.spec_from_file_location(module_name, APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+tasklist = load_app('tasklist_compression_tests')
+GZIP = {'Accept-Encoding': 'gzip, deflate'}
+
+
+class CompressionTests(unittest.TestCase):
+    def setUp(self):
+        self.client = tasklist.app.test_client()
+        self.css_url = '/assets/' + tasklist.STATIC_ASSET_NAMES['index.css']
+
+    def test_large_text_is_gzipped_when_accepted(self):
+        plain = self.client.get(self.css_url)
+        compressed = self.client.get(self.css_url, headers=GZIP)
+
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.data), plain.data)
+        self.assertLess(len(compressed.data), len(plain.data))
+        for response in (plain, compressed):
+            self.assertIn('Accept-Encoding', response.headers['Vary'])
+
+    def test_static_assets_are_compressed_once(self):
+        tasklist.STATIC_GZIP_CACHE.clear()
+        with mock.patch.object(tasklist.gzip, 'compress', wraps=gzip.compress) as compress:
+            first = self.client.get(self.css_url, headers=GZIP)
+            second = self.client.get(self.css_url, headers=GZIP)
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first.data, second.data)
+
+    def test_small_and_png_responses_are_left_alone(self):
+        small = self.client.get('/assets/index.0000000000.css', headers=GZIP)
+        self.assertNotIn('Content-Encoding', small.headers)
+
+        png = b'\x89PNG' + b'\0' * 4096
+        with mock.patch.object(tasklist, 'get_chart_png_bytes', return_value=(('today_progress', 'v', 'd'), png)), \
+                mock.patch.object(tasklist, 'chart_cache_key', return_value=('today_progress', 'v', 'd')):
+            response = self.client.get('/chart_today_progress.png', headers=GZIP)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.data, png)
+
+    def test_compressed_json_keeps_answering_304(self):
+        done_at = dt.datetime.now().replace(microsecond=0).isoformat(sep=' ')
+        tasks = [
+            {'id': i, 'title': f'task {i}', 'tag': 'x', 'score': 30, 'completed': 1,
+             'completed_at': done_at, 'parent_id': ''}
+            for i in range(1, 200)
+        ]
+        with mock.patch.object(tasklist, 'read_tasks', side_effect=lambda: [dict(t) for t in tasks]), \
+                mock.patch.object(tasklist, 'get_chart_version', return_value='v1'):
+            first = self.client.get('/api/charts/last14', headers=GZIP)
+            self.assertEqual(first.headers['Content-Encoding'], 'gzip')
+            self.assertTrue(first.headers['ETag'].startswith('W/'))
+            again = self.client.get('/api/charts/last14', headers={
+                **GZIP, 'If-None-Match': first.headers['ETag']
+            })
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.headers['ETag'], first.headers['ETag'])
+
+
+if __name__ == '__main__':
+    unittest.main()
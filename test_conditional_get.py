@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+
+from tasklist_testing import AppDataTestCase
+
+LOCAL = {'REMOTE_ADDR': '127.0.0.1'}
+
+
+class ConditionalGetTests(AppDataTestCase):
+    module_name = 'tasklist_conditional_get_tests'
+
+    def setUp(self):
+        super().setUp()
+        self.task = self.tasklist.create_local_task(title='report', score=30)
+        self.client = self.tasklist.app.test_client()
+
+    def assert_not_modified_without_loading(self, url, **kwargs):
+        first = self.client.get(url, **kwargs)
+        etag = first.headers['ETag']
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(etag.startswith('W/'))
+
+        with mock.patch.object(self.tasklist, 'read_tasks') as read_tasks:
+            again = self.client.get(url, headers={'If-None-Match': etag}, **kwargs)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.headers['ETag'], etag)
+        read_tasks.assert_not_called()
+        return etag
+
+    def test_pages_and_api_answer_304_before_loading_tasks(self):
+        for url, kwargs in (
+            ('/', {}),
+            (f'/task/{self.task["id"]}', {}),
+            ('/api/codex/tasks?status=all', {'environ_base': LOCAL}),
+        ):
+            with self.subTest(url):
+                self.assert_not_modified_without_loading(url, **kwargs)
+
+    def test_a_write_changes_the_etag(self):
+        etag = self.assert_not_modified_without_loading('/')
+        self.tasklist.complete_local_task(self.task['id'])
+
+        response = self.client.get('/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_tags_and_query_are_part_of_the_etag(self):
+        open_etag = self.client.get('/api/codex/tasks', environ_base=LOCAL).headers['ETag']
+        all_etag = self.client.get('/api/codex/tasks?status=all', environ_base=LOCAL).headers['ETag']
+        self.assertNotEqual(open_etag, all_etag)
+
+        etag = self.client.get('/').headers['ETag']
+        self.tasklist.write_tags(['マイタスク', 'home'])
+        self.assertNotEqual(self.client.get('/').headers['ETag'], etag)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import datetime as dt
+import importlib.util
+import os
+from pathlib import Path
+import unittest
+
+
+APP_PATH = Path(__file__).with_name('app.py')
+os.environ['GOOGLE_SYNC_ENABLED'] = '0'
+
+
+def load_app(module_name):
+    spec = importlib.util.spec_from_file_location(module_name, APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+tasklist = load_app('tasklist_daily_scores_tests')
+
+
+def make_task(task_id, score, completed_at='', parent_id=''):
+    return {
+        'id': task_id,
+        'title': f'task {task_id}',
+        'tag': 'マイタスク',
+        'score': score,
+        'completed': 1 if completed_at else 0,
+        'completed_at': completed_at,
+        'parent_id': parent_id,
+    }
+
+
+class DailyScoreTests(unittest.TestCase):
+    def test_tasks_are_bucketed_by_day_in_completion_order(self):
+        tasks = [
+            make_task(1, 30, '2026-01-02 18:00:00'),
+            make_task(2, 60, '2026-01-02 09:00:00'),
+            make_task(3, 30, '2026-01-01 12:00:00'),
+            make_task(4, 30, '2025-12-31 12:00:00'),
+            make_task(5, 30),
+            make_task(6, 30, 'not a date'),
+        ]
+        buckets = tasklist.completed_tasks_by_day(
+            tasks,
+            dt.date(2026, 1, 1),
+            dt.date(2026, 1, 2)
+        )
+
+        self.assertEqual(
+            {day: [task['id'] for task in day_tasks] for day, day_tasks in buckets.items()},
+            {dt.date(2026, 1, 1): [3], dt.date(2026, 1, 2): [2, 1]}
+        )
+
+    def test_daily_totals_use_effective_scores(self):
+        tasks = [
+            make_task(1, 30, '2026-01-02 18:00:00'),
+            make_task(2, 60, '2026-01-02 09:00:00', parent_id='1'),
+            make_task(3, 100, '2026-01-01 12:00:00'),
+        ]
+        days = [dt.date(2026, 1, 1), dt.date(2026, 1, 2), dt.date(2026, 1, 3)]
+        sums, _ = tasklist.daily_score_totals(tasks, days)
+
+        # Task 1 carries its completed child's score as well.
+        self.assertEqual(sums, [100, 30 + 60 + 60, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
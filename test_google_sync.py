@@ -0,0 +1,402 @@
+import importlib.util
+import os
+from pathlib import Path
+import shutil
+import unittest
+from unittest import mock
+
+from shared_data import SharedDataCoordinator
+from sync_outbox import SyncOutbox
+
+
+APP_PATH = Path(__file__).with_name('app.py')
+os.environ['GOOGLE_SYNC_ENABLED'] = '0'
+
+
+def load_app(module_name):
+    spec = importlib.util.spec_from_file_location(module_name, APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+tasklist = load_app('tasklist_google_sync_tests')
+RUNTIME_DIR = Path(__file__).with_name('.test-runtime-google-sync')
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status):
+        super().__init__(f'HTTP {status}')
+        self.resp = FakeResponse(status)
+
+
+class FakeRequest:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+class FakeTasklists:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, **kwargs):
+        self.service.calls.append('tasklists.list')
+        return FakeRequest({'items': [{'id': 'list-1', 'title': tasklist.GOOGLE_TASKLIST_TITLE}]})
+
+    def insert(self, **kwargs):
+        self.service.calls.append('tasklists.insert')
+        return FakeRequest({'id': 'list-new'})
+
+
+class FakeTasks:
+    def __init__(self, service):
+        self.service = service
+
+    def patch(self, **kwargs):
+        self.service.calls.append('tasks.patch')
+        self.service.patched.append((kwargs['task'], kwargs['body']))
+        result = self.service.patch_result
+        if isinstance(result, dict) and kwargs['task'] in result:
+            result = result[kwargs['task']]
+        return FakeRequest(result)
+
+    def delete(self, **kwargs):
+        self.service.calls.append('tasks.delete')
+        return FakeRequest(self.service.delete_result.get(kwargs['task'], ''))
+
+    def list(self, **kwargs):
+        self.service.calls.append('tasks.list')
+        self.service.list_params.append(kwargs)
+        if self.service.list_error is not None:
+            return FakeRequest(self.service.list_error)
+        return FakeRequest({'items': list(self.service.google_tasks)})
+
+
+class FakeService:
+    def __init__(self):
+        self.calls = []
+        self.patch_result = {}
+        self.delete_result = {}
+        self.list_params = []
+        self.list_error = None
+        self.google_tasks = []
+        self.patched = []
+        self.batches = []
+
+    def tasklists(self):
+        return FakeTasklists(self)
+
+    def tasks(self):
+        return FakeTasks(self)
+
+    def new_batch_http_request(self, callback):
+        batch = FakeBatch(callback)
+        self.batches.append(batch)
+        return batch
+
+
+class FakeBatch:
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            try:
+                response = request.execute()
+            except Exception as exc:
+                self.callback(request_id, None, exc)
+            else:
+                self.callback(request_id, response, None)
+
+
+class GoogleClientCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.service = FakeService()
+        tasklist.invalidate_google_client()
+        with tasklist.SYNC_METRICS_LOCK:
+            for name in tasklist.SYNC_METRICS:
+                tasklist.SYNC_METRICS[name] = 0
+        self.original_get_service = tasklist.get_google_service
+        tasklist.get_google_service = lambda: self.service
+
+    def tearDown(self):
+        tasklist.get_google_service = self.original_get_service
+
+    def test_tasklist_id_is_looked_up_once(self):
+        for _ in range(3):
+            self.assertTrue(tasklist.google_patch_task('task-1', {'title': 'x'}))
+
+        self.assertEqual(self.service.calls.count('tasklists.list'), 1)
+        self.assertEqual(self.service.calls.count('tasks.patch'), 3)
+        metrics = tasklist.sync_metrics_snapshot()
+        self.assertEqual(metrics['tasklist_lookups'], 1)
+        self.assertEqual(metrics['tasklist_reuses'], 2)
+        self.assertEqual(metrics['setup_round_trips_saved'], 2)
+
+    def test_missing_task_keeps_tasklist_id(self):
+        self.service.patch_result = FakeHttpError(404)
+        ok, status = tasklist.google_patch_task_result('task-1', {'title': 'x'})
+        self.assertFalse(ok)
+        self.assertEqual(status, 404)
+
+        self.service.patch_result = {}
+        self.assertTrue(tasklist.google_patch_task('task-1', {'title': 'x'}))
+        self.assertEqual(self.service.calls.count('tasklists.list'), 1)
+
+    def test_missing_tasklist_forgets_tasklist_id(self):
+        original = tasklist.GOOGLE_SYNC_ENABLED
+        tasklist.GOOGLE_SYNC_ENABLED = True
+        self.addCleanup(setattr, tasklist, 'GOOGLE_SYNC_ENABLED', original)
+        self.service.list_error = FakeHttpError(404)
+        tasklist.sync_google_to_local()
+
+        self.service.list_error = None
+        self.assertTrue(tasklist.google_patch_task('task-1', {'title': 'x'}))
+        self.assertEqual(self.service.calls.count('tasklists.list'), 2)
+
+    def test_browser_authorization_runs_outside_the_client_lock(self):
+        creds = object()
+        lock_free = []
+
+        def authorize():
+            lock_free.append(tasklist.GOOGLE_CLIENT_LOCK.acquire(blocking=False))
+            if lock_free[0]:
+                tasklist.GOOGLE_CLIENT_LOCK.release()
+            return creds
+
+        self.addCleanup(setattr, tasklist, 'load_google_credentials', tasklist.load_google_credentials)
+        self.addCleanup(
+            setattr, tasklist, 'authorize_google_interactively', tasklist.authorize_google_interactively
+        )
+        tasklist.load_google_credentials = lambda: None
+        tasklist.authorize_google_interactively = authorize
+
+        self.assertIs(tasklist.google_credentials()[0], creds)
+        self.assertEqual(lock_free, [True])
+        with tasklist.GOOGLE_CLIENT_LOCK:
+            self.assertIs(tasklist.GOOGLE_CLIENT_CACHE['creds'], creds)
+
+    def test_unauthorized_drops_cached_credentials(self):
+        with tasklist.GOOGLE_CLIENT_LOCK:
+            tasklist.GOOGLE_CLIENT_CACHE['creds'] = object()
+            generation = tasklist.GOOGLE_CLIENT_CACHE['generation']
+
+        self.assertEqual(tasklist.google_error_status(FakeHttpError(401)), 401)
+
+        with tasklist.GOOGLE_CLIENT_LOCK:
+            self.assertIsNone(tasklist.GOOGLE_CLIENT_CACHE['creds'])
+            self.assertIsNone(tasklist.GOOGLE_CLIENT_CACHE['tasklist_id'])
+            self.assertGreater(tasklist.GOOGLE_CLIENT_CACHE['generation'], generation)
+
+
+class BatchedSyncTests(unittest.TestCase):
+    def setUp(self):
+        self.service = FakeService()
+        self.tasks = [
+            {
+                'id': task_id,
+                'title': f'task {task_id}',
+                'due_date': '2026-01-01',
+                'completed': task_id % 2,
+                'completed_at': '2026-01-01 09:00:00' if task_id % 2 else '',
+                'google_task_id': f'g-{task_id}',
+                'sync_pending': 1
+            }
+            for task_id in range(1, 4)
+        ]
+        self.writes = []
+        self.originals = (
+            tasklist.get_google_service,
+            tasklist.read_tasks,
+            tasklist.write_tasks,
+            tasklist.GOOGLE_SYNC_ENABLED
+        )
+        tasklist.get_google_service = lambda: self.service
+        tasklist.read_tasks = lambda: tasklist.TaskSnapshot(self.tasks)
+        tasklist.write_tasks = self.write_tasks
+        tasklist.GOOGLE_SYNC_ENABLED = True
+        tasklist.invalidate_google_client()
+
+    def tearDown(self):
+        (
+            tasklist.get_google_service,
+            tasklist.read_tasks,
+            tasklist.write_tasks,
+            tasklist.GOOGLE_SYNC_ENABLED
+        ) = self.originals
+
+    def write_tasks(self, tasks, op=None):
+        self.writes.append(op)
+        self.tasks = [dict(task) for task in tasks]
+
+    def test_changes_to_one_task_become_one_patch(self):
+        results = tasklist.google_patch_tasks([
+            ('g-1', {'title': 'x'}),
+            ('g-2', {'title': 'y'}),
+            ('g-1', {'status': 'completed'}),
+        ])
+
+        self.assertEqual(results, {'g-1': (True, None), 'g-2': (True, None)})
+        self.assertEqual(len(self.service.batches), 1)
+        self.assertEqual(
+            sorted(self.service.patched),
+            [('g-1', {'title': 'x', 'status': 'completed'}), ('g-2', {'title': 'y'})]
+        )
+
+    def test_sync_jobs_share_one_batch_and_one_write(self):
+        jobs = [{'action': 'sync_task', 'local_task_id': task_id} for task_id in (1, 2, 3, 2)]
+        tasklist.process_sync_jobs(jobs)
+
+        self.assertEqual(len(self.service.batches), 1)
+        self.assertEqual(self.service.calls.count('tasks.patch'), 3)
+        bodies = dict(self.service.patched)
+        self.assertEqual(bodies['g-1']['status'], 'completed')
+        self.assertEqual(bodies['g-2']['status'], 'needsAction')
+        self.assertEqual(bodies['g-3']['notes'], 'LOCAL_ID=3')
+        self.assertEqual(len(self.writes), 1)
+        self.assertEqual([task['sync_pending'] for task in self.tasks], [0, 0, 0])
+
+    def test_failed_patch_keeps_task_pending(self):
+        self.service.patch_result = {'g-2': FakeHttpError(500)}
+        results = tasklist.sync_local_tasks_to_google([1, 2])
+
+        self.assertEqual(results, {1: True, 2: False})
+        self.assertEqual([task['sync_pending'] for task in self.tasks], [0, 1, 1])
+
+    def test_failed_delete_stays_queued_for_the_next_round(self):
+        RUNTIME_DIR.mkdir(exist_ok=True)
+        self.addCleanup(lambda: shutil.rmtree(RUNTIME_DIR, ignore_errors=True))
+        path = RUNTIME_DIR / 'sync_outbox.json'
+        outbox = SyncOutbox(str(path), SharedDataCoordinator(RUNTIME_DIR), retry_delay=0)
+        outbox.put({'action': 'delete_google_tasks', 'google_task_ids': ['g-1', 'g-2']})
+        delete = mock.Mock(side_effect=[RuntimeError('offline'), {'g-1': True, 'g-2': True}])
+
+        with mock.patch.object(tasklist, 'SYNC_OUTBOX', outbox), \
+                mock.patch.object(tasklist, 'google_delete_tasks', delete):
+            tasklist.run_sync_jobs(outbox.take(timeout=0))
+            # Both deletes are still on disk after the failed round.
+            self.assertEqual(SyncOutbox(str(path), outbox.coordinator).load(), 2)
+
+            tasklist.run_sync_jobs(outbox.take(timeout=0))
+
+        self.assertEqual(delete.call_args_list, [mock.call(['g-1', 'g-2'])] * 2)
+        self.assertEqual(len(outbox), 0)
+        self.assertFalse(path.exists())
+
+    def test_deletes_of_tasks_already_gone_count_as_done(self):
+        self.service.delete_result = {'g-1': FakeHttpError(404), 'g-2': FakeHttpError(503)}
+        self.assertEqual(
+            tasklist.google_delete_tasks(['g-1', 'g-2', 'g-3']),
+            {'g-1': True, 'g-2': False, 'g-3': True}
+        )
+
+
+class IncrementalPullTests(unittest.TestCase):
+    def setUp(self):
+        shutil.rmtree(RUNTIME_DIR, ignore_errors=True)
+        RUNTIME_DIR.mkdir(parents=True)
+        self.service = FakeService()
+        self.originals = (
+            tasklist.get_google_service,
+            tasklist.read_tasks,
+            tasklist.GOOGLE_SYNC_STATE_JSON,
+            tasklist.GOOGLE_SYNC_ENABLED
+        )
+        tasklist.get_google_service = lambda: self.service
+        tasklist.read_tasks = lambda: tasklist.TaskSnapshot([])
+        tasklist.GOOGLE_SYNC_STATE_JSON = str(RUNTIME_DIR / 'google_sync_state.json')
+        tasklist.GOOGLE_SYNC_ENABLED = True
+        tasklist.invalidate_google_client()
+        # Tasks deleted on Google that were never linked locally leave the
+        # local task list untouched.
+        self.service.google_tasks = [
+            {'id': 'g-1', 'deleted': True, 'updated': '2026-01-01T00:00:00.000Z'},
+            {'id': 'g-2', 'deleted': True, 'updated': '2026-01-02T00:00:00.000Z'},
+        ]
+
+    def tearDown(self):
+        (
+            tasklist.get_google_service,
+            tasklist.read_tasks,
+            tasklist.GOOGLE_SYNC_STATE_JSON,
+            tasklist.GOOGLE_SYNC_ENABLED
+        ) = self.originals
+        shutil.rmtree(RUNTIME_DIR, ignore_errors=True)
+
+    def test_second_pull_requests_only_updated_tasks(self):
+        tasklist.sync_google_to_local()
+        self.assertNotIn('updatedMin', self.service.list_params[-1])
+
+        self.service.google_tasks = []
+        tasklist.sync_google_to_local()
+        self.assertEqual(
+            self.service.list_params[-1]['updatedMin'],
+            '2026-01-02T00:00:00.000Z'
+        )
+        self.assertEqual(
+            tasklist.load_google_sync_state()['updated_min'],
+            '2026-01-02T00:00:00.000Z'
+        )
+
+    def test_idle_pull_applies_no_changes(self):
+        tasklist.sync_google_to_local()
+        state = tasklist.load_google_sync_state()
+        self.assertEqual(state['updated_min_ids'], ['g-2'])
+
+        # updatedMin is inclusive, so Google returns the newest task again.
+        self.service.google_tasks = self.service.google_tasks[1:]
+        with mock.patch.object(tasklist, 'read_tasks') as read_tasks, \
+                mock.patch.object(tasklist, 'save_google_sync_state') as save_state:
+            tasklist.sync_google_to_local()
+        self.assertEqual(self.service.list_params[-1]['updatedMin'], '2026-01-02T00:00:00.000Z')
+        read_tasks.assert_not_called()
+        save_state.assert_not_called()
+
+        # Another task updated in the same millisecond is still merged.
+        self.service.google_tasks.append(
+            {'id': 'g-3', 'deleted': True, 'updated': '2026-01-02T00:00:00.000Z'}
+        )
+        tasklist.sync_google_to_local()
+        self.assertEqual(tasklist.load_google_sync_state()['updated_min_ids'], ['g-2', 'g-3'])
+
+    def test_forced_and_stale_pulls_reconcile_everything(self):
+        tasklist.sync_google_to_local()
+        tasklist.sync_google_to_local(force_full=True)
+        self.assertNotIn('updatedMin', self.service.list_params[-1])
+
+        state = tasklist.load_google_sync_state()
+        state['last_full_sync_at'] -= tasklist.GOOGLE_FULL_SYNC_INTERVAL_SEC
+        tasklist.save_google_sync_state(state)
+        tasklist.sync_google_to_local()
+        self.assertNotIn('updatedMin', self.service.list_params[-1])
+
+    def test_cursor_from_another_tasklist_is_ignored(self):
+        tasklist.save_google_sync_state({
+            'tasklist_id': 'other-list',
+            'updated_min': '2026-01-05T00:00:00.000Z',
+            'last_full_sync_at': tasklist.time.time()
+        })
+        tasklist.sync_google_to_local()
+        self.assertNotIn('updatedMin', self.service.list_params[-1])
+        self.assertEqual(
+            tasklist.load_google_sync_state()['updated_min'],
+            '2026-01-02T00:00:00.000Z'
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import importlib.util
 import os
 from pathlib import Path
+import subprocess
+import sys
 import unittest
 
 
@@ -37,6 +39,19 @@ class GooglelessStartupTests(unittest.TestCase):
         tasklist.start_sync_worker()
         self.assertFalse(tasklist.SYNC_WORKER_STARTED)
 
+    def test_startup_does_not_load_matplotlib(self):
+        env = dict(os.environ, GOOGLE_SYNC_ENABLED='0')
+        env.pop('TASKLIST_DATA_DIR', None)
+        result = subprocess.run(
+            [sys.executable, '-c', "import sys, app; print('matplotlib' in sys.modules)"],
+            cwd=APP_PATH.parent,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        self.assertEqual(result.stdout.strip(), 'False')
+
 
 if __name__ == '__main__':
     unittest.main()
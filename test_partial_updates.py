@@ -0,0 +1,105 @@
+import unittest
+from unittest import mock
+
+from tasklist_testing import AppDataTestCase
+
+JSON = {'Accept': 'application/json'}
+
+
+class PartialUpdateTests(AppDataTestCase):
+    module_name = 'tasklist_partial_update_tests'
+
+    def setUp(self):
+        super().setUp()
+        tasklist = self.tasklist
+        self.root = tasklist.create_local_task(title='root', score=30)
+        self.middle = tasklist.create_local_task(title='middle', score=60, parent_id=str(self.root['id']))
+        self.leaf = tasklist.create_local_task(title='leaf', score=100, parent_id=str(self.middle['id']))
+        self.client = tasklist.app.test_client()
+        self.client.get('/')
+
+    def test_complete_returns_the_change_without_rendering_the_tree(self):
+        with mock.patch.object(self.tasklist, 'index_fragment', wraps=self.tasklist.index_fragment) as fragment:
+            response = self.client.post(f'/complete/{self.middle["id"]}', headers=JSON)
+        change = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('tree', [call.args[0] for call in fragment.call_args_list])
+        self.assertEqual(change['removed_ids'], [self.middle['id']])
+        # The open leaf is no longer under an open parent, so it moves to the top level.
+        self.assertEqual([(row['id'], row['parent_id']) for row in change['rows']], [(self.leaf['id'], '')])
+        self.assertIn('data-task-id="%d"' % self.leaf['id'], change['rows'][0]['html'])
+        self.assertEqual(change['scores'][str(self.root['id'])]['effective_score'], 90)
+        self.assertEqual(change['summary']['open'], 2)
+        self.assertIn('middle', change['fragments']['recent_done'])
+
+    def test_undo_sends_the_reopened_row_with_its_open_children(self):
+        self.client.post(f'/complete/{self.middle["id"]}', headers=JSON)
+        change = self.client.post(f'/undo/{self.middle["id"]}', headers=JSON).get_json()
+
+        self.assertEqual(change['removed_ids'], [])
+        self.assertEqual(
+            [(row['id'], row['parent_id']) for row in change['rows']],
+            [(self.middle['id'], str(self.root['id']))]
+        )
+        self.assertIn('data-task-id="%d"' % self.leaf['id'], change['rows'][0]['html'])
+        self.assertEqual(change['scores'][str(self.root['id'])]['effective_score'], 30)
+
+    def test_delete_and_reschedule(self):
+        change = self.client.post(
+            f'/reschedule/{self.leaf["id"]}', data={'new_due_date': '2030-01-01'}, headers=JSON
+        ).get_json()
+        self.assertEqual([row['id'] for row in change['rows']], [self.leaf['id']])
+        self.assertIn('2030-01-01', change['rows'][0]['html'])
+
+        change = self.client.post(f'/delete/{self.middle["id"]}', headers=JSON).get_json()
+        self.assertEqual(sorted(change['removed_ids']), [self.middle['id'], self.leaf['id']])
+        self.assertEqual(change['scores'][str(self.root['id'])]['link_count'], 0)
+
+    def test_update_meta_moves_the_row_and_sends_the_old_parent(self):
+        change = self.client.post(
+            f'/update_meta/{self.leaf["id"]}',
+            data={'tag': 'マイタスク', 'parent_id': str(self.root['id'])},
+            headers=JSON
+        ).get_json()
+
+        self.assertEqual(
+            [(row['id'], row['parent_id']) for row in change['rows']],
+            [(self.leaf['id'], str(self.root['id']))]
+        )
+        # The old parent lost its link to the leaf but keeps the one to the root.
+        old_parent = change['scores'][str(self.middle['id'])]
+        self.assertEqual(old_parent['link_count'], 1)
+        self.assertEqual(old_parent['effective_score'], 60)
+        self.assertEqual(change['scores'][str(self.root['id'])]['link_count'], 2)
+        self.assertIsNone(change['parent_options'])
+
+    def test_changes_are_built_from_the_written_snapshot(self):
+        tasklist = self.tasklist
+        with mock.patch.object(tasklist, 'read_tasks', wraps=tasklist.read_tasks) as read_tasks, \
+                mock.patch.object(tasklist, 'write_tasks', wraps=tasklist.write_tasks) as write_tasks, \
+                mock.patch.object(tasklist, 'index_fragment', wraps=tasklist.index_fragment) as fragment:
+            change = self.client.post(f'/complete/{self.leaf["id"]}', headers=JSON).get_json()
+
+        self.assertEqual(read_tasks.call_count, 1)
+        self.assertEqual(write_tasks.call_count, 1)
+        # The leaf was due today, so the calendar changes; nothing is overdue.
+        self.assertEqual(
+            sorted(call.args[0] for call in fragment.call_args_list), ['calendar', 'recent_done']
+        )
+        self.assertEqual(
+            change['parent_options'], {'removed_ids': [self.leaf['id']], 'options': []}
+        )
+        self.assertEqual(change['scores'][str(self.middle['id'])]['effective_score'], 160)
+        self.assertEqual(change['total_14d'], 100)
+
+    def test_form_posts_still_redirect_and_unknown_tasks_are_404(self):
+        self.assertEqual(self.client.post(f'/complete/{self.leaf["id"]}').status_code, 302)
+
+        response = self.client.post('/complete/999', headers=JSON)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.get_json()['ok'])
+
+
+if __name__ == '__main__':
+    unittest.main()
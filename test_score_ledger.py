@@ -0,0 +1,159 @@
+import datetime as dt
+import os
+from pathlib import Path
+import shutil
+import unittest
+from unittest import mock
+import uuid
+
+from shared_data import SharedDataCoordinator
+from score_ledger import ScoreLedger
+from tasklist_testing import AppDataTestCase
+
+RUNTIME_DIR = Path(__file__).with_name('.test-runtime-score-ledger')
+RUNTIME_DIR.mkdir(exist_ok=True)
+
+
+class ScoreLedgerTests(unittest.TestCase):
+    def make_ledger(self):
+        root = RUNTIME_DIR / f'case-{uuid.uuid4().hex}'
+        root.mkdir()
+        self.addCleanup(lambda: shutil.rmtree(root, ignore_errors=True))
+        path = root / 'score_ledger.json'
+        return path, ScoreLedger(str(path), SharedDataCoordinator(root))
+
+    def test_apply_moves_contributions_and_survives_a_restart(self):
+        path, ledger = self.make_ledger()
+        ledger.rebuild([
+            ('2026-01-01', 'work', 30),
+            ('2026-01-01', 'home', 10),
+            ('2026-01-03', 'work', 60),
+        ], source='a')
+        ledger.apply(
+            removed=[('2026-01-01', 'home', 10)],
+            added=[('2026-01-02', 'home', 20)],
+            source='b'
+        )
+        self.assertFalse(path.exists())
+        self.assertTrue(ledger.save())
+        self.assertFalse(ledger.save())
+
+        restarted = ScoreLedger(str(path), ledger.coordinator)
+        restarted.load()
+        self.assertEqual(restarted.source, 'b')
+        self.assertEqual(restarted.totals(), {
+            '2026-01-01': {'work': 30},
+            '2026-01-02': {'home': 20},
+            '2026-01-03': {'work': 60},
+        })
+
+    def test_series_covers_every_day_in_range(self):
+        _, ledger = self.make_ledger()
+        ledger.rebuild([
+            ('2026-01-01', 'work', 30),
+            ('2026-01-03', 'work', 60),
+            ('2026-01-03', 'home', 10),
+            ('2026-01-05', 'work', 99),
+        ], source='a')
+
+        series, tags = ledger.series(dt.date(2026, 1, 1), dt.date(2026, 1, 3))
+        self.assertEqual([day['total'] for day in series], [30, 0, 70])
+        self.assertEqual(series[2]['tags'], {'work': 60, 'home': 10})
+        self.assertEqual(tags, {'work': 90, 'home': 10})
+
+    def test_unreadable_file_loads_empty(self):
+        path, ledger = self.make_ledger()
+        path.write_text('{broken', encoding='utf-8')
+        ledger.load()
+        self.assertIsNone(ledger.source)
+        self.assertEqual(ledger.totals(), {})
+
+
+class AppScoreLedgerTests(AppDataTestCase):
+    module_name = 'tasklist_score_ledger_tests'
+    tags = ('work', 'home')
+
+    def rebuilt_totals(self):
+        tasklist = self.tasklist
+        ledger = ScoreLedger(os.devnull, None)
+        ledger.rebuild(tasklist.score_ledger_entries().values(), source=None)
+        return ledger.totals()
+
+    def test_ledger_follows_complete_reopen_and_delete(self):
+        tasklist = self.tasklist
+        parent = tasklist.create_local_task(title='parent', tag='work', score=30)
+        child = tasklist.create_local_task(title='child', tag='home', score=60, parent_id=str(parent['id']))
+        today = dt.date.today().isoformat()
+
+        tasklist.complete_local_task(child['id'])
+        tasklist.complete_local_task(parent['id'])
+        self.assertEqual(tasklist.score_ledger().totals()[today], {'work': 90, 'home': 60})
+
+        tasklist.reopen_local_task(child['id'])
+        self.assertEqual(tasklist.score_ledger().totals()[today], {'work': 30})
+        self.assertEqual(tasklist.score_ledger().totals(), self.rebuilt_totals())
+
+        tasklist.delete_local_tasks([parent['id']])
+        self.assertNotIn(today, tasklist.score_ledger().totals())
+
+    def test_writes_update_only_the_changed_chain_and_save_in_batches(self):
+        tasklist = self.tasklist
+        tasklist.score_ledger()
+        tasklist.save_score_ledger()
+        root = tasklist.create_local_task(title='root', tag='work', score=30)
+        middle = tasklist.create_local_task(title='middle', tag='work', score=60, parent_id=str(root['id']))
+        leaf = tasklist.create_local_task(title='leaf', tag='home', score=100, parent_id=str(middle['id']))
+        other = tasklist.create_local_task(title='other', tag='home', score=30)
+        tasklist.complete_local_task(other['id'])
+
+        entries = mock.Mock(wraps=tasklist.score_ledger_entries)
+        with mock.patch.object(tasklist, 'score_ledger_entries', entries), \
+                mock.patch.object(tasklist, 'schedule_score_ledger_save') as schedule, \
+                mock.patch.object(tasklist.SCORE_LEDGER, 'save') as save:
+            tasklist.complete_local_task(leaf['id'])
+            tasklist.complete_local_task(middle['id'])
+            tasklist.reopen_local_task(leaf['id'])
+        save.assert_not_called()
+        self.assertEqual(schedule.call_count, 3)
+        # Only the changed task and the ancestors its score reaches are looked at.
+        for call in entries.call_args_list:
+            self.assertLessEqual(set(call.args[1]), {root['id'], middle['id'], leaf['id']})
+        self.assertTrue(tasklist.SCORE_LEDGER.dirty)
+        self.assertEqual(tasklist.score_ledger().totals(), self.rebuilt_totals())
+
+        tasklist.save_score_ledger()
+        restarted = ScoreLedger(tasklist.SCORE_LEDGER_JSON, tasklist.SHARED_STORAGE)
+        restarted.load()
+        self.assertEqual(restarted.totals(), tasklist.score_ledger().totals())
+        self.assertEqual(restarted.source, tasklist.SCORE_LEDGER.source)
+
+    def test_analytics_endpoint(self):
+        tasklist = self.tasklist
+        task = tasklist.create_local_task(title='report', tag='work', score=60)
+        tasklist.complete_local_task(task['id'])
+
+        client = tasklist.app.test_client()
+        response = client.get('/api/analytics/scores?days=90')
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data['series']), 90)
+        self.assertEqual(data['series'][-1]['date'], dt.date.today().isoformat())
+        self.assertEqual(data['total'], sum(data['tags'].values()))
+        self.assertEqual(data['tags'], {'work': 60})
+
+        self.assertEqual(client.get('/api/analytics/scores?days=7').status_code, 400)
+
+    def test_files_changed_outside_the_app_trigger_a_rebuild(self):
+        tasklist = self.tasklist
+        task = tasklist.create_local_task(title='edited by hand', tag='work', score=10)
+        tasklist.complete_local_task(task['id'])
+        tasklist.score_ledger()
+
+        # Simulate a stale ledger left by another copy of the app.
+        tasklist.SCORE_LEDGER.source = 'stale'
+        tasklist.SCORE_LEDGER._days = {}
+        self.assertEqual(tasklist.score_ledger().totals(), self.rebuilt_totals())
+
+
+if __name__ == '__main__':
+    unittest.main()
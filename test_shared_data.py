@@ -82,6 +82,25 @@ class SharedDataCoordinatorTests(unittest.TestCase):
             )
         self.assertEqual(tasks_path.read_text(encoding='utf-8'), 'old\n')
 
+    def test_append_is_blocked_by_other_device(self):
+        data_dir = self.make_shared_dir(self.make_root())
+        journal_path = data_dir / 'tasks.journal.jsonl'
+        coordinator = SharedDataCoordinator(data_dir, enabled=True)
+        lease_dir = Path(coordinator.coordination_dir)
+        lease_dir.mkdir(parents=True)
+        (lease_dir / 'active-other-session.json').write_text(
+            json.dumps({
+                'device_id': 'other-mac',
+                'pid': 99999,
+                'heartbeat_epoch': time.time()
+            }),
+            encoding='utf-8'
+        )
+
+        with self.assertRaises(SharedDataConflictError):
+            coordinator.append_data_text(str(journal_path), 'blocked\n')
+        self.assertFalse(journal_path.exists())
+
     def test_shared_mode_rejects_wrong_sentinel_schema(self):
         data_dir = self.make_root() / 'shared-data'
         data_dir.mkdir()
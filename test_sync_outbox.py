@@ -0,0 +1,104 @@
+from pathlib import Path
+import shutil
+import unittest
+from unittest import mock
+import uuid
+
+from shared_data import SharedDataCoordinator
+from sync_outbox import SyncOutbox
+
+RUNTIME_DIR = Path(__file__).with_name('.test-runtime-outbox')
+RUNTIME_DIR.mkdir(exist_ok=True)
+
+
+class SyncOutboxTests(unittest.TestCase):
+    def make_outbox(self, **kwargs):
+        root = RUNTIME_DIR / f'case-{uuid.uuid4().hex}'
+        root.mkdir()
+        self.addCleanup(lambda: shutil.rmtree(root, ignore_errors=True))
+        path = root / 'sync_outbox.json'
+        return path, SyncOutbox(str(path), SharedDataCoordinator(root), **kwargs)
+
+    def test_repeated_jobs_for_a_task_collapse(self):
+        _, outbox = self.make_outbox()
+        for _ in range(5):
+            outbox.put({'action': 'sync_task', 'local_task_id': 7})
+        outbox.put({'action': 'delete_google_tasks', 'google_task_ids': ['g-1', 'g-2']})
+        outbox.put({'action': 'delete_google_tasks', 'google_task_ids': ['g-2']})
+
+        jobs = outbox.take(timeout=0)
+        self.assertEqual(jobs, [
+            {'action': 'sync_task', 'local_task_id': 7},
+            {'action': 'delete_google_tasks', 'google_task_ids': ['g-1']},
+            {'action': 'delete_google_tasks', 'google_task_ids': ['g-2']},
+        ])
+        self.assertEqual(outbox.take(timeout=0), [])
+
+    def test_unfinished_jobs_survive_a_restart(self):
+        path, outbox = self.make_outbox()
+        outbox.put({'action': 'sync_task', 'local_task_id': 1})
+        outbox.put({'action': 'sync_task', 'local_task_id': 2})
+        first = outbox.take(timeout=0, limit=1)
+        outbox.done(first)
+        outbox.take(timeout=0)
+
+        # The worker stopped while the job for task 2 was running.
+        restarted = SyncOutbox(str(path), outbox.coordinator)
+        self.assertEqual(restarted.load(), 1)
+        self.assertEqual(restarted.take(timeout=0), [{'action': 'sync_task', 'local_task_id': 2}])
+
+    def test_job_queued_while_running_runs_again(self):
+        path, outbox = self.make_outbox()
+        outbox.put({'action': 'sync_task', 'local_task_id': 3})
+        running = outbox.take(timeout=0)
+        self.assertTrue(outbox.put({'action': 'sync_task', 'local_task_id': 3}))
+        outbox.done(running)
+
+        again = outbox.take(timeout=0)
+        self.assertEqual(again, [{'action': 'sync_task', 'local_task_id': 3}])
+        outbox.done(again)
+        self.assertEqual(len(outbox), 0)
+        self.assertFalse(path.exists())
+
+    def test_failed_jobs_wait_longer_after_each_failure(self):
+        path, outbox = self.make_outbox(retry_delay=10, max_retry_delay=15)
+        outbox.put({'action': 'sync_task', 'local_task_id': 1})
+        outbox.put({'action': 'sync_task', 'local_task_id': 2})
+
+        with mock.patch('sync_outbox.time.monotonic', return_value=100) as clock:
+            jobs = outbox.take(timeout=0)
+            outbox.done(jobs[1:])
+            outbox.retry(jobs[:1])
+            self.assertEqual(outbox.take(timeout=0), [])
+            self.assertEqual(len(outbox), 1)
+            self.assertIn('"local_task_id": 1', path.read_text(encoding='utf-8'))
+
+            clock.return_value = 110
+            jobs = outbox.take(timeout=0)
+            self.assertEqual(jobs, [{'action': 'sync_task', 'local_task_id': 1}])
+            outbox.retry(jobs)
+
+            # The second delay doubles to 20 seconds but is capped at 15.
+            clock.return_value = 124
+            self.assertEqual(outbox.take(timeout=0), [])
+            clock.return_value = 125
+            outbox.done(outbox.take(timeout=0))
+
+        self.assertEqual(len(outbox), 0)
+        self.assertFalse(path.exists())
+
+    def test_empty_outbox_removes_its_file(self):
+        path, outbox = self.make_outbox()
+        outbox.put({'action': 'pull'})
+        self.assertTrue(path.exists())
+        outbox.done(outbox.take(timeout=0))
+        self.assertFalse(path.exists())
+
+    def test_unreadable_file_is_ignored(self):
+        path, outbox = self.make_outbox()
+        path.write_text('{"format": "tasklist-sync-outbox", "ver', encoding='utf-8')
+        self.assertEqual(outbox.load(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+import datetime as dt
+import random
+import unittest
+
+from task_index import CompletionIndex, ScoreIndex, TreeIndex
+
+
+def record(task_id, score=30, completed=0, parent_id=''):
+    return {
+        'id': task_id,
+        'score': score,
+        'completed': completed,
+        'parent_id': str(parent_id),
+    }
+
+
+class ScoreIndexTests(unittest.TestCase):
+    def test_completed_children_roll_up_to_ancestors(self):
+        records = [
+            record(1, 30),
+            record(2, 60, completed=1, parent_id=1),
+            record(3, 100, completed=1, parent_id=2),
+            record(4, 30, completed=0, parent_id=2),
+        ]
+        index = ScoreIndex(records)
+
+        self.assertEqual(index.get(1), (30, 160, 190))
+        self.assertEqual(index.get(2), (60, 100, 160))
+        self.assertEqual(index.get(4), (30, 0, 30))
+
+    def test_incremental_changes_match_full_rebuild(self):
+        rng = random.Random(20240101)
+        records = {
+            task_id: record(
+                task_id,
+                rng.choice((30, 60, 100)),
+                rng.randint(0, 1),
+                rng.choice(['', *range(1, task_id)]),
+            )
+            for task_id in range(1, 40)
+        }
+        index = ScoreIndex(list(records.values()))
+        next_id = 40
+
+        for _ in range(400):
+            action = rng.choice(('complete', 'reopen', 'score', 'reparent', 'delete', 'add'))
+            task_id = rng.choice(list(records))
+            old = records[task_id]
+            if action == 'add':
+                new = record(next_id, 30, rng.randint(0, 1), rng.choice(['', *records]))
+                change = (None, new)
+                records[next_id] = new
+                next_id += 1
+            elif action == 'delete':
+                change = (old, None)
+                del records[task_id]
+            else:
+                new = dict(old)
+                if action == 'complete':
+                    new['completed'] = 1
+                elif action == 'reopen':
+                    new['completed'] = 0
+                elif action == 'score':
+                    new['score'] = old['score'] + 1000
+                else:
+                    # Only reparent under older ids so that no cycle appears.
+                    candidates = [item for item in records if item < task_id]
+                    new['parent_id'] = str(rng.choice(candidates)) if candidates else ''
+                change = (old, new)
+                records[task_id] = new
+
+            self.assertTrue(index.apply([change]))
+            self.assertEqual(index.values(), ScoreIndex(list(records.values())).values())
+
+    def test_lookup_refuses_records_changed_in_memory(self):
+        parent = record(1, 30)
+        child = record(2, 60, completed=1, parent_id=1)
+        index = ScoreIndex([parent, child])
+
+        self.assertEqual(index.lookup(parent), (30, 60, 90))
+        self.assertIsNone(index.lookup(dict(child, completed=0)))
+        self.assertIsNone(index.lookup(dict(child, score=1060)))
+        self.assertIsNone(index.lookup(dict(child, parent_id='')))
+
+    def test_completed_cycle_requests_rebuild(self):
+        index = ScoreIndex([
+            record(1, 30, completed=1, parent_id=2),
+            record(2, 30, completed=0, parent_id=''),
+        ])
+        old = record(2, 30, completed=0, parent_id='')
+        self.assertFalse(index.apply([(old, record(2, 30, completed=1, parent_id=1))]))
+
+
+class CompletionIndexTests(unittest.TestCase):
+    def test_completions_follow_incremental_changes(self):
+        done = dict(record(1, completed=1), completed_at='2026-01-02 09:00:00')
+        broken = dict(record(2, completed=1), completed_at='not a date')
+        index = CompletionIndex([done, broken, record(3)])
+        self.assertEqual(index.values(), {1: dt.datetime(2026, 1, 2, 9)})
+
+        reopened = dict(done, completed=0, completed_at='')
+        finished = dict(record(3, completed=1), completed_at='2026-01-03 18:30:00')
+        self.assertTrue(index.apply([(done, reopened), (record(3), finished)]))
+        self.assertEqual(index.values(), {3: dt.datetime(2026, 1, 3, 18, 30)})
+        self.assertTrue(index.apply([(finished, None)]))
+        self.assertEqual(len(index), 0)
+
+    def test_lookup_parses_records_changed_in_memory(self):
+        done = dict(record(1, completed=1), completed_at='2026-01-02 09:00:00')
+        index = CompletionIndex([done])
+
+        self.assertEqual(index.lookup(done), dt.datetime(2026, 1, 2, 9))
+        self.assertEqual(
+            index.lookup(dict(done, completed_at='2026-01-04 10:00:00')),
+            dt.datetime(2026, 1, 4, 10)
+        )
+        self.assertIsNone(index.lookup(dict(done, completed=0)))
+
+
+class TreeIndexTests(unittest.TestCase):
+    def test_descendant_checks_match_parent_walk(self):
+        rng = random.Random(7)
+        records = [
+            record(task_id, completed=rng.randint(0, 1), parent_id=rng.choice(['', *range(1, task_id)]))
+            for task_id in range(1, 60)
+        ]
+        parents = {item['id']: int(item['parent_id'] or 0) for item in records}
+        tree = TreeIndex(records)
+
+        for task_id in parents:
+            ancestors = set()
+            parent_id = parents[task_id]
+            while parent_id:
+                ancestors.add(parent_id)
+                parent_id = parents[parent_id]
+            for other_id in parents:
+                self.assertEqual(
+                    tree.is_descendant(task_id, other_id, inclusive=False),
+                    other_id in ancestors,
+                )
+            self.assertEqual(
+                set(tree.subtree_ids(task_id)),
+                {other for other in parents if task_id != other and tree.is_descendant(other, task_id)},
+            )
+
+    def test_active_tree_detaches_children_of_completed_tasks(self):
+        records = [
+            record(1),
+            record(2, completed=1, parent_id=1),
+            record(3, parent_id=2),
+            record(4, parent_id=1),
+        ]
+        tree = TreeIndex(records, active_only=True)
+
+        self.assertNotIn(2, tree)
+        self.assertIsNone(tree.parent(3))
+        self.assertEqual(tree.children(1), [4])
+        self.assertFalse(tree.is_descendant(3, 1))
+        self.assertTrue(TreeIndex(records).is_descendant(3, 1))
+
+    def test_only_structural_changes_require_rebuild(self):
+        old = record(2, parent_id=1)
+        tree = TreeIndex([record(1), old], active_only=True)
+
+        self.assertTrue(tree.apply([(old, dict(old, score=60))]))
+        self.assertFalse(tree.apply([(old, dict(old, parent_id=''))]))
+        self.assertFalse(tree.apply([(old, dict(old, completed=1))]))
+        self.assertTrue(TreeIndex([record(1), old]).apply([(old, dict(old, completed=1))]))
+
+    def test_siblings_follow_the_sort_key(self):
+        records = [record(1), record(2, parent_id=1), record(3, parent_id=1), record(4, parent_id=3)]
+        for item, sort_order in zip(records, (10, 30, 20, 10)):
+            item['sort_order'] = sort_order
+        sort_key = lambda item: (item['sort_order'], item['id'])
+        tree = TreeIndex(records, sort_key=sort_key)
+
+        self.assertEqual(tree.children(1), [3, 2])
+        self.assertEqual(tree.subtree_ids(1), [3, 4, 2])
+        self.assertTrue(tree.apply([(records[1], dict(records[1], score=60))]))
+        self.assertFalse(tree.apply([(records[1], dict(records[1], sort_order=5))]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+from pathlib import Path
+import shutil
+import unittest
+import uuid
+
+from shared_data import SharedDataCoordinator
+from task_journal import TaskJournal, content_digest
+
+RUNTIME_DIR = Path(__file__).with_name('.test-runtime-journal')
+RUNTIME_DIR.mkdir(exist_ok=True)
+
+ROWS = [
+    {'id': '1', 'title': 'first', 'completed': '0'},
+    {'id': '2', 'title': 'second', 'completed': '0'},
+]
+
+
+class TaskJournalTests(unittest.TestCase):
+    def make_journal(self, **kwargs):
+        root = RUNTIME_DIR / f'case-{uuid.uuid4().hex}'
+        root.mkdir()
+        self.addCleanup(lambda: shutil.rmtree(root, ignore_errors=True))
+        coordinator = SharedDataCoordinator(root)
+        path = root / 'tasks.journal.jsonl'
+        return path, TaskJournal(str(path), coordinator, **kwargs)
+
+    def test_appended_changes_are_replayed_on_load(self):
+        path, journal = self.make_journal()
+        self.assertEqual(journal.replay(ROWS, 'base'), ROWS)
+        journal.append('complete', [{'id': '1', 'title': 'first', 'completed': '1'}], [])
+        journal.append('delete', [], ['2'])
+        journal.append('complete', [{'id': '3', 'title': 'new', 'completed': '0'}], [])
+
+        reloaded = TaskJournal(str(path), journal.coordinator)
+        self.assertEqual(reloaded.replay(ROWS, 'base'), [
+            {'id': '1', 'title': 'first', 'completed': '1'},
+            {'id': '3', 'title': 'new', 'completed': '0'},
+        ])
+
+    def test_journal_for_another_csv_is_ignored_and_replaced(self):
+        path, journal = self.make_journal()
+        journal.replay(ROWS, 'old-base')
+        journal.append('delete', [], ['1'])
+
+        self.assertEqual(journal.replay(ROWS, 'new-base'), ROWS)
+        journal.append('delete', [], ['2'])
+        header = json.loads(path.read_text(encoding='utf-8').splitlines()[0])
+        self.assertEqual(header['base'], 'new-base')
+        self.assertEqual(journal.replay(ROWS, 'new-base'), ROWS[:1])
+
+    def test_torn_last_line_is_ignored(self):
+        path, journal = self.make_journal()
+        journal.replay(ROWS, 'base')
+        journal.append('delete', [], ['1'])
+        with open(path, 'a', encoding='utf-8') as file_obj:
+            file_obj.write('{"seq": 2, "delete": ["2"')
+
+        self.assertEqual(journal.replay(ROWS, 'base'), ROWS[1:])
+
+    def test_append_after_a_torn_line_survives_a_reload(self):
+        path, journal = self.make_journal()
+        journal.replay(ROWS, 'base')
+        journal.append('delete', [], ['1'])
+        journal.append('delete', [], ['2'])
+        data = path.read_bytes()
+        path.write_bytes(data[:-10])
+
+        reloaded = TaskJournal(str(path), journal.coordinator)
+        self.assertEqual(reloaded.replay(ROWS, 'base'), ROWS[1:])
+        reloaded.append('complete', [{'id': '3', 'title': 'new', 'completed': '0'}], [])
+
+        replayed = TaskJournal(str(path), journal.coordinator).replay(ROWS, 'base')
+        self.assertEqual(replayed, [ROWS[1], {'id': '3', 'title': 'new', 'completed': '0'}])
+        self.assertTrue(path.read_bytes().endswith(b'\n'))
+
+    def test_damaged_line_does_not_hide_later_entries(self):
+        path, journal = self.make_journal()
+        journal.replay(ROWS, 'base')
+        journal.append('delete', [], ['1'])
+        with open(path, 'a', encoding='utf-8') as file_obj:
+            file_obj.write('{"seq": 2, "delete"\n')
+        journal.append('delete', [], ['2'])
+
+        self.assertEqual(journal.replay(ROWS, 'base'), [])
+
+    def test_size_threshold_requests_compaction(self):
+        path, journal = self.make_journal(max_bytes=200)
+        journal.replay(ROWS, content_digest(b'csv'))
+        self.assertFalse(journal.needs_compaction())
+        for _ in range(3):
+            journal.append('reorder', ROWS, [])
+        self.assertTrue(journal.needs_compaction())
+
+        journal.reset(content_digest(b'compacted csv'))
+        self.assertFalse(path.exists())
+        self.assertFalse(journal.needs_compaction())
+
+
+if __name__ == '__main__':
+    unittest.main()
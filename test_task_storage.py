@@ -0,0 +1,93 @@
+import csv
+from pathlib import Path
+import shutil
+import unittest
+import uuid
+
+from task_storage import SqliteTaskStorage
+
+RUNTIME_DIR = Path(__file__).with_name('.test-runtime-storage')
+RUNTIME_DIR.mkdir(exist_ok=True)
+
+FIELDS = ['id', 'title', 'completed', 'parent_id', 'due_date', 'google_task_id']
+
+
+class SqliteTaskStorageTests(unittest.TestCase):
+    def make_storage(self, **kwargs):
+        root = RUNTIME_DIR / f'case-{uuid.uuid4().hex}'
+        root.mkdir()
+        self.addCleanup(lambda: shutil.rmtree(root, ignore_errors=True))
+        storage = SqliteTaskStorage(str(root / 'tasklist.sqlite3'), FIELDS, **kwargs)
+        self.addCleanup(storage.close)
+        return root, storage
+
+    def test_first_open_imports_rows_and_tags(self):
+        rows = [
+            {'id': '1', 'title': ' spaced ', 'completed': '0', 'parent_id': '',
+             'due_date': '2024-01-01', 'google_task_id': ''},
+            {'id': '2', 'title': 'child', 'completed': '1', 'parent_id': '1',
+             'due_date': '2024-01-02', 'google_task_id': 'g2'},
+        ]
+        _, storage = self.make_storage(
+            import_task_rows=lambda: rows,
+            import_tags=lambda: ['マイタスク', '家事'],
+        )
+        storage.ensure()
+        storage.ensure()
+
+        self.assertEqual(storage.load_task_rows(), rows)
+        self.assertEqual(storage.load_tags(), ['マイタスク', '家事'])
+
+    def test_changes_update_and_append_rows_in_order(self):
+        _, storage = self.make_storage()
+        storage.ensure()
+        first = {'id': '1', 'title': 'a', 'completed': '0'}
+        second = {'id': '2', 'title': 'b', 'completed': '0'}
+        storage.save_task_rows([first, second], [first, second], [])
+
+        storage.save_task_rows([], [dict(first, completed='1')], ['2'])
+        storage.save_task_rows([], [{'id': '3', 'title': 'c'}], [])
+
+        self.assertEqual(
+            [(row['id'], row['completed']) for row in storage.load_task_rows()],
+            [('1', '1'), ('3', '')]
+        )
+
+    def test_csv_round_trip_is_lossless(self):
+        root, storage = self.make_storage()
+        source = root / 'tasks.csv'
+        with open(source, 'w', newline='', encoding='utf-8') as file_obj:
+            writer = csv.DictWriter(file_obj, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerow({'id': '7', 'title': 'カンマ, "引用"\n改行',
+                             'completed': '0', 'parent_id': '',
+                             'due_date': '2024-02-29', 'google_task_id': ''})
+            writer.writerow({'id': '8', 'title': '  ', 'completed': '1',
+                             'parent_id': '7', 'due_date': '',
+                             'google_task_id': 'abc'})
+
+        self.assertEqual(storage.import_csv(str(source)), 2)
+        exported = root / 'exported.csv'
+        storage.export_csv(str(exported))
+
+        self.assertEqual(exported.read_bytes(), source.read_bytes())
+
+    def test_only_the_id_index_is_kept(self):
+        _, storage = self.make_storage()
+        storage.ensure()
+        with storage._connect() as conn:
+            # Older databases also indexed these columns.
+            conn.execute('CREATE INDEX tasks_parent_due ON tasks (parent_id, due_date)')
+        storage.close()
+
+        storage.ensure()
+        indexes = [
+            row[0] for row in storage._connect().execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tasks'"
+            )
+        ]
+        self.assertEqual(indexes, ['tasks_id'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+from pathlib import Path
+import shutil
+import unittest
+import uuid
+
+from task_store import TaskSnapshot, TaskStore
+
+RUNTIME_DIR = Path(__file__).with_name('.test-runtime-store')
+RUNTIME_DIR.mkdir(exist_ok=True)
+
+
+class TaskStoreTests(unittest.TestCase):
+    def make_store(self):
+        root = RUNTIME_DIR / f'case-{uuid.uuid4().hex}'
+        root.mkdir()
+        self.addCleanup(lambda: shutil.rmtree(root, ignore_errors=True))
+        path = root / 'tasks.csv'
+        path.write_text('1\n', encoding='utf-8')
+        self.loads = 0
+
+        def loader():
+            self.loads += 1
+            lines = path.read_text(encoding='utf-8').split()
+            return [{'id': int(line), 'title': f'task {line}'} for line in lines]
+
+        return path, TaskStore(str(path), loader)
+
+    def test_snapshot_is_cached_until_file_changes(self):
+        path, store = self.make_store()
+        self.assertEqual([task['id'] for task in store.snapshot()], [1])
+        store.snapshot()
+        self.assertEqual(self.loads, 1)
+
+        path.write_text('1\n2\n', encoding='utf-8')
+        self.assertEqual([task['id'] for task in store.snapshot()], [1, 2])
+        self.assertEqual(self.loads, 2)
+
+    def test_snapshots_do_not_share_task_dicts(self):
+        _, store = self.make_store()
+        first = store.snapshot()
+        first[0]['title'] = 'changed'
+        first.append({'id': 9})
+
+        second = store.snapshot()
+        self.assertIsInstance(second, TaskSnapshot)
+        self.assertEqual(second, [{'id': 1, 'title': 'task 1'}])
+
+    def test_replace_adopts_written_records_without_reloading(self):
+        path, store = self.make_store()
+        store.snapshot()
+        path.write_text('5\n', encoding='utf-8')
+        version = store.replace([{'id': 5, 'title': 'task 5'}])
+
+        snapshot = store.snapshot()
+        self.assertEqual(snapshot.version, version)
+        self.assertEqual(snapshot, [{'id': 5, 'title': 'task 5'}])
+        self.assertEqual(self.loads, 1)
+
+    def test_token_changes_with_the_data(self):
+        path, store = self.make_store()
+        token = store.token()
+        self.assertEqual(store.token(), token)
+
+        path.write_text('7\n', encoding='utf-8')
+        store.replace([{'id': 7, 'title': 'task 7'}])
+        self.assertNotEqual(store.token(), token)
+
+    def test_file_token_is_stable_across_processes(self):
+        path, store = self.make_store()
+        file_token = store.token(include_version=False)
+        restarted = TaskStore(str(path), store._loader)
+        self.assertEqual(restarted.token(include_version=False), file_token)
+
+        path.write_text('8\n9\n', encoding='utf-8')
+        self.assertNotEqual(restarted.token(include_version=False), file_token)
+
+    def test_indexes_follow_replaced_records(self):
+        path, _ = self.make_store()
+        built = []
+
+        class CountingIndex:
+            def __init__(self, records):
+                built.append(len(records))
+                self.ids = {record['id'] for record in records}
+
+            def apply(self, changes):
+                for old, new in changes:
+                    self.ids.discard(old['id'] if old else None)
+                    if new:
+                        self.ids.add(new['id'])
+                return True
+
+            def values(self):
+                return set(self.ids)
+
+        store = TaskStore(str(path), lambda: [{'id': 1}], indexes={'ids': CountingIndex})
+        snapshot = store.snapshot()
+        self.assertEqual(store.index_values('ids', snapshot.version), {1})
+
+        version = store.replace([{'id': 1}, {'id': 2}], changed_ids=[2])
+        self.assertIsNone(store.index_values('ids', snapshot.version))
+        self.assertEqual(store.index_values('ids', version), {1, 2})
+        self.assertEqual(built, [1])
+
+        with store.index_view('ids', version) as index:
+            self.assertIs(index, store._indexes['ids'])
+        with store.index_view('ids', snapshot.version) as index:
+            self.assertIsNone(index)
+
+
+if __name__ == '__main__':
+    unittest.main()
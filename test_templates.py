@@ -0,0 +1,166 @@
+import importlib.util
+import os
+from pathlib import Path
+import shutil
+import unittest
+from unittest import mock
+import uuid
+
+
+APP_PATH = Path(__file__).with_name('app.py')
+os.environ['GOOGLE_SYNC_ENABLED'] = '0'
+
+
+def load_app(module_name):
+    spec = importlib.util.spec_from_file_location(module_name, APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+tasklist = load_app('tasklist_templates_tests')
+
+RUNTIME_DIR = Path(__file__).with_name('.test-runtime-templates')
+RUNTIME_DIR.mkdir(exist_ok=True)
+
+
+class TemplateTests(unittest.TestCase):
+    def test_templates_are_compiled_once(self):
+        env = tasklist.app.jinja_env
+        for name in tasklist.TEMPLATES:
+            with self.subTest(name):
+                self.assertIs(env.get_template(name), env.get_template(name))
+
+    def test_registered_templates_escape_like_inline_ones(self):
+        with tasklist.app.test_request_context('/'):
+            html = tasklist.render_template('tags.html', tags=['<b>x</b>'])
+        self.assertIn('&lt;b&gt;x&lt;/b&gt;', html)
+        self.assertNotIn('<b>x</b>', html)
+
+
+class StaticAssetTests(unittest.TestCase):
+    def test_asset_names_follow_the_content(self):
+        root = RUNTIME_DIR / f'case-{uuid.uuid4().hex}'
+        root.mkdir()
+        self.addCleanup(lambda: shutil.rmtree(root, ignore_errors=True))
+        (root / 'page.css').write_text('body { color: red; }', encoding='utf-8')
+        names, files = tasklist.load_static_assets(str(root))
+
+        (root / 'page.css').write_text('body { color: blue; }', encoding='utf-8')
+        changed_names, _ = tasklist.load_static_assets(str(root))
+
+        self.assertRegex(names['page.css'], r'^page\.[0-9a-f]{10}\.css$')
+        self.assertNotEqual(names['page.css'], changed_names['page.css'])
+        self.assertEqual(files[names['page.css']], (b'body { color: red; }', 'text/css'))
+
+    def test_assets_are_served_with_immutable_caching(self):
+        client = tasklist.app.test_client()
+        for name, hashed_name in tasklist.STATIC_ASSET_NAMES.items():
+            with self.subTest(name):
+                response = client.get(f'/assets/{hashed_name}')
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertEqual(client.get('/assets/index.0000000000.css').status_code, 404)
+
+    def test_templates_link_every_page_asset(self):
+        for name in ('index.css', 'index.js', 'charts.js', 'task_detail.css', 'tags.css', 'edit.css'):
+            with self.subTest(name):
+                self.assertIn(name, tasklist.STATIC_ASSET_NAMES)
+
+
+def make_task(task_id, completed=0, parent_id='', **values):
+    task = {
+        'id': task_id,
+        'completed': completed,
+        'parent_id': parent_id,
+        'title': f'task {task_id}',
+        'tag': 'マイタスク',
+        'due_date': '2000-01-01',
+        'extension_count': 0,
+        'sort_order': 0,
+    }
+    task.update(values)
+    return task
+
+
+def by_task_id(records):
+    return {record['id']: record for record in records}
+
+
+class IndexFragmentTests(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.dict(tasklist.INDEX_FRAGMENT_VERSIONS),
+            mock.patch.dict(tasklist.INDEX_FRAGMENT_CACHE, clear=True),
+            mock.patch.object(tasklist, 'INDEX_FRAGMENT_STORE_VERSION', 1),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_sections_follow_the_changed_task_and_its_ancestors(self):
+        records = [make_task(1), make_task(2, 1, '1'), make_task(3, 1, '2'), make_task(4)]
+        # A completed grandchild moves the completed parent's score and the open root's.
+        by_id = by_task_id(records)
+        self.assertEqual(
+            tasklist.touched_index_sections(by_id, by_id, [3]), {'recent_done', 'tree'}
+        )
+        completed = by_task_id([dict(records[3], completed=1)])
+        self.assertEqual(
+            tasklist.touched_index_sections(by_task_id(records[3:]), completed, [4]),
+            {'overdue', 'parent_options', 'tree', 'recent_done'}
+        )
+
+    def test_sections_compare_only_the_values_they_show(self):
+        today = tasklist.dt.date(2026, 1, 10)
+        task = make_task(1, due_date='2026-03-01')
+
+        def touched(**values):
+            return tasklist.touched_index_sections(
+                {1: task}, {1: dict(task, **values)}, [1], today
+            )
+
+        self.assertEqual(touched(tag='仕事'), {'tree'})
+        self.assertEqual(touched(title='renamed'), {'tree', 'parent_options'})
+        self.assertEqual(
+            touched(due_date='2026-01-12'), {'tree', 'parent_options', 'calendar'}
+        )
+        self.assertEqual(
+            touched(due_date='2026-01-09'), {'tree', 'parent_options', 'overdue'}
+        )
+
+    def test_only_touched_fragments_are_rendered_again(self):
+        built = []
+
+        def render_all():
+            versions = tasklist.index_fragment_versions(tasklist.INDEX_FRAGMENT_STORE_VERSION)
+            with tasklist.app.test_request_context('/'):
+                for name, variable in (
+                    ('calendar', 'week_calendar'),
+                    ('recent_done', 'recent_done'),
+                ):
+                    def build(name=name, variable=variable):
+                        built.append(name)
+                        return {variable: []}
+                    tasklist.index_fragment(name, versions[name], build)
+
+        render_all()
+        old_by_id = by_task_id([make_task(1, 1), make_task(2, 1)])
+        new_by_id = by_task_id([make_task(1, 1), make_task(2, 1, title='renamed')])
+        tasklist.mark_index_fragments_dirty(1, 2, old_by_id, new_by_id, [2])
+        render_all()
+        self.assertEqual(built, ['calendar', 'recent_done', 'recent_done'])
+
+    def test_unknown_store_version_renders_everything_again(self):
+        before = dict(tasklist.INDEX_FRAGMENT_VERSIONS)
+        tasklist.mark_index_fragments_dirty(5, 6, {}, by_task_id([make_task(1, 1)]), [1])
+        after = tasklist.index_fragment_versions(6)
+        self.assertTrue(all(after[name] > before[name] for name in before))
+
+        tasklist.index_fragment_versions(9)
+        self.assertEqual(tasklist.INDEX_FRAGMENT_STORE_VERSION, 9)
+        self.assertTrue(all(tasklist.INDEX_FRAGMENT_VERSIONS[name] > after[name] for name in after))
+
+
+if __name__ == '__main__':
+    unittest.main()